@@ -3,6 +3,7 @@
 # Define os ficheiros de dados para incluir
 data_files = [
     ('Arial.ttf', '.'),
+    ('arialbd.ttf', '.'),
     ('app_icon.ico', '.'), # <-- VÍRGULA ADICIONADA
     ('splash_screen.png', '.')
 ]
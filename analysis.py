@@ -1,142 +1,239 @@
-# analysis.py (versão com varredura robusta)
+# analysis.py
+"""
+Ligação entre o motor de análise (engine.py) e a janela: corre o motor na thread do trabalho
+e traduz os seus eventos em atributos da aplicação e atualizações agendadas com app.post.
+A interface é apenas um dos subscritores do motor; a linha de comandos (cli.py) é outro.
+"""
 import os
-import time
 import logging
+import tempfile
+from functools import partial
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
 import pandas as pd
-from tkinter import messagebox
-from typing import List, Dict, TYPE_CHECKING
-import i18n
+
+import treemap
+
+from engine import BulkOutcome, DirectoryView, Engine, Event
+from retention import RetentionPlan
+from scan_table import ScanTable, remap_rows
+from snapshots import SnapshotInfo
 
 if TYPE_CHECKING:
     from ui import FinalDiskAnalyzerApp
 
-from utils import calculate_quick_hash
-
-_ = i18n.get_text
 
 def run_full_scan_and_analyze(app: 'FinalDiskAnalyzerApp', path: str, analyses: Dict[str, bool], params: Dict) -> None:
     """
-    Função mestra que percorre o disco UMA VEZ usando o robusto os.walk,
-    recolhe os dados e depois executa as análises selecionadas em memória.
+    Percorre o disco UMA VEZ (ou reutiliza a varredura da sessão) e corre as análises pedidas.
+    O trabalho é controlado por app.current_job: em pausa, a varredura e os hashes param entre
+    lotes; cancelado, mostra-se o resultado parcial e as análises pedidas não chegam a correr.
     """
-    all_files_data = []
-    
+    engine = Engine(job=app.current_job, session=app.scan_session)
+    engine.subscribe(partial(publish_to_ui, app))
     try:
-        logging.info(f"Iniciando varredura robusta em: {path}")
-        app.after(0, app.set_determinate_progress, 0) # Modo indeterminado
-
-        def handle_error(e):
-            """Função para ser chamada quando os.walk encontra um erro."""
-            logging.warning(f"Erro ao aceder a {e.filename}: {e.strerror}")
-
-        # --- ETAPA 1: PERCORRER O DISCO COM OS.WALK (ROBUSTO) ---
-        for dirpath, _, filenames in os.walk(path, onerror=handle_error):
-            for filename in filenames:
-                full_path = os.path.join(dirpath, filename)
-                try:
-                    stat = os.stat(full_path)
-                    all_files_data.append({
-                        "path": full_path,
-                        "name": filename,
-                        "size": stat.st_size,
-                        "mtime": stat.st_mtime,
-                        "atime": stat.st_atime,
-                        "ext": os.path.splitext(filename)[1].lower() or '.sem_extensao'
-                    })
-                except (PermissionError, FileNotFoundError) as e:
-                    logging.warning(f"Ignorando ficheiro {full_path}: {e}")
-                    continue
-        
-        logging.info(f"Varredura concluída. {len(all_files_data)} ficheiros encontrados.")
-        df_all_files = pd.DataFrame(all_files_data)
+        engine.run(path, analyses, params)
+    except Exception as e:
+        logging.error(f"Erro fatal durante a análise de {path}: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
 
+def save_snapshot(app: 'FinalDiskAnalyzerApp', table: ScanTable) -> None:
+    """Grava o instantâneo da raiz mostrada, revalidada no disco (ficheiros que cresceram no sítio incluídos)."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    engine.save_snapshot(table)
+
+
+def run_snapshot_diff(app: 'FinalDiskAnalyzerApp', snapshot: SnapshotInfo, table: ScanTable) -> None:
+    """Compara o instantâneo com a raiz mostrada, revalidada no disco."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    engine.diff(snapshot, table)
+
+
+def export_report(app: 'FinalDiskAnalyzerApp', table: ScanTable, dir_id: int, duplicates: pd.DataFrame,
+                  output_path: str, chart: Optional[Tuple]) -> None:
+    """Grava o relatório PDF (e o anexo) da pasta mostrada; 'chart' são os argumentos de treemap.save_png."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    chart_path = None
+    try:
+        if chart:
+            chart_path = os.path.join(tempfile.gettempdir(), f"analisador_treemap_{os.getpid()}.png")
+            items, width, height, background, text_color = chart
+            treemap.save_png(items, chart_path, width, height, background, text_color)
+        engine.export_report(table, output_path, dir_id, duplicates if len(duplicates) else None, chart_path)
+    except Exception as e:
+        logging.error(f"Erro ao exportar o relatório PDF: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+    finally:
+        if chart_path and os.path.exists(chart_path): os.remove(chart_path)
+
+
+def export_data(app: 'FinalDiskAnalyzerApp', table: ScanTable, dir_id: int, base_path: str,
+                duplicates: pd.DataFrame, old_files: pd.DataFrame, big_files: pd.DataFrame) -> None:
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    try:
+        engine.export_data(table, base_path, dir_id=dir_id, duplicates=duplicates, old_files=old_files, big_files=big_files)
+    except Exception as e:
+        logging.error(f"Erro ao exportar os dados para {base_path}: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
+
+def run_compression_and_deletion(app: 'FinalDiskAnalyzerApp', files, save_path: str, resume: bool = False) -> None:
+    """Arquiva os ficheiros antigos selecionados e apaga os originais depois de verificados no arquivo."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    try:
+        engine.archive(list(files), save_path, resume=resume)
+    except Exception as e:
+        logging.error(f"Erro ao arquivar ficheiros em {save_path}: {e}", exc_info=True)
+        app.post(app.show_message, "error", "compress_error_title", "archive_error_message")
+
+
+def run_bulk_action(app: 'FinalDiskAnalyzerApp', table: ScanTable, rows: pd.DataFrame, action: str) -> None:
+    """Apaga ou move para a reciclagem as linhas escolhidas de um resultado e atualiza as vistas sem nova varredura."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    same_table = app.view_location is not None and app.view_location[0] is table
+    try:
+        engine.bulk_action(table, rows, action, groups=app.duplicates if same_table and not app.duplicates.empty else None)
     except Exception as e:
-        logging.error(f"Erro fatal durante a varredura do disco: {e}", exc_info=True)
-        app.after(0, lambda: messagebox.showerror(_("export_error_title"), _("export_error_message")))
-        return
-    
-    # --- ETAPA 2: EXECUTAR ANÁLISES EM MEMÓRIA ---
-    if not df_all_files.empty:
-        app.df_files = df_all_files[df_all_files['path'].apply(lambda p: os.path.dirname(p) == path)]
-        try:
-            folder_paths = [d.path for d in os.scandir(path) if d.is_dir()]
-            folder_data = []
-            for folder_path in folder_paths:
-                size = df_all_files[df_all_files['path'].str.startswith(folder_path)]['size'].sum()
-                if size > 0:
-                    try:
-                        stat = os.stat(folder_path)
-                        folder_data.append({
-                            'name': os.path.basename(folder_path), 'size': size,
-                            'mtime': stat.st_mtime, 'path': folder_path, 'ext': '.sem_extensao'
-                        })
-                    except (PermissionError, FileNotFoundError): continue
-            app.df_folders = pd.DataFrame(folder_data)
-        except (PermissionError, OSError) as e:
-            logging.warning(f"Não foi possível listar as subpastas de {path}: {e}")
-            app.df_folders = pd.DataFrame()
-    else:
-        app.df_files = pd.DataFrame()
-        app.df_folders = pd.DataFrame()
-
-    app.after(0, app.update_quick_analysis_view)
-
-    if analyses.get("duplicates"): run_duplicate_analysis(app, df_all_files)
-    if analyses.get("old_files"): run_old_files_analysis(app, df_all_files, params.get("days_old", 180))
-    if analyses.get("big_files"): run_big_files_analysis(app, df_all_files, params.get("top_n", 50))
-    compute_storage_summary(app, df_all_files)
-
-
-def run_duplicate_analysis(app: 'FinalDiskAnalyzerApp', df: pd.DataFrame):
-    if df.empty:
-        logging.warning("DataFrame vazio passado para run_duplicate_analysis. A ignorar.")
-        app.duplicate_groups = []
-        app.after(0, app.update_duplicates_view); return
-    logging.info("Iniciando análise de duplicados em memória.")
-    files_by_size = df[df['size'] > 1024].groupby('size')['path'].apply(list).to_dict()
-    app.duplicate_groups = []
-    potential_dups = {s: files for s, files in files_by_size.items() if len(files) > 1}
-    for _, files in potential_dups.items():
-        hashes: Dict[str, List[str]] = {}
-        for file in files:
-            h = calculate_quick_hash(file)
-            if h: hashes.setdefault(h, []).append(file)
-        for h, dup_files in hashes.items():
-            if len(dup_files) > 1: app.duplicate_groups.append(dup_files)
-    app.after(0, app.update_duplicates_view)
-
-def run_old_files_analysis(app: 'FinalDiskAnalyzerApp', df: pd.DataFrame, days: int):
-    if df.empty:
-        logging.warning("DataFrame vazio passado para run_old_files_analysis. A ignorar.")
-        app.old_files = []
-        app.after(0, app.update_old_files_view); return
-    logging.info(f"Iniciando análise de ficheiros com mais de {days} dias em memória.")
-    cutoff = time.time() - (days * 86400)
-    old_files_df = df[df['atime'] < cutoff]
-    app.old_files = old_files_df.to_dict('records')
-    app.after(0, app.update_old_files_view)
-
-def run_big_files_analysis(app: 'FinalDiskAnalyzerApp', df: pd.DataFrame, top_n: int):
-    if df.empty:
-        logging.warning("DataFrame vazio passado para run_big_files_analysis. A ignorar.")
-        app.big_files = []
-        app.after(0, app.update_big_files_view); return
-    logging.info(f"Iniciando análise dos {top_n} maiores ficheiros em memória.")
-    big_files_df = df.nlargest(top_n, 'size')
-    app.big_files = big_files_df.to_dict('records')
-    app.after(0, app.update_big_files_view)
-
-def compute_storage_summary(app: 'FinalDiskAnalyzerApp', df: pd.DataFrame):
-    logging.info("Calculando resumo em memória.")
-    if df.empty:
-        app.storage_summary = {}
-    else:
-        total_size = df['size'].sum()
-        count = len(df)
-        avg_size = total_size / count if count else 0
-        app.storage_summary = {
-            "total_files": count,
-            "total_size_gb": total_size / (1024**3),
-            "avg_size_mb": avg_size / (1024**2)
-        }
-    app.after(0, app.update_storage_summary_view)
+        logging.error(f"Erro na ação em massa '{action}': {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
+
+def run_apply_plan(app: 'FinalDiskAnalyzerApp', table: ScanTable, plan: RetentionPlan, action: str) -> None:
+    """Executa um plano de retenção num só lote e atualiza as vistas sem nova varredura."""
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    app.post(app.set_determinate_progress, 100)
+    same_table = app.view_location is not None and app.view_location[0] is table
+    try:
+        engine.apply_plan(table, plan, action, groups=app.duplicates if same_table and not app.duplicates.empty else None)
+    except Exception as e:
+        logging.error(f"Erro ao aplicar o plano de retenção: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
+
+def export_plan(app: 'FinalDiskAnalyzerApp', plan: RetentionPlan, path: str) -> None:
+    engine = Engine(job=app.current_job)
+    engine.subscribe(partial(publish_to_ui, app))
+    try:
+        engine.export_plan(plan, path)
+    except Exception as e:
+        logging.error(f"Erro ao exportar o plano de retenção para {path}: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
+
+def run_undo_batch(app: 'FinalDiskAnalyzerApp', batch_id: str) -> None:
+    """Repõe um lote da reciclagem e volta a ler a raiz (só as pastas alteradas, com a cache de varredura)."""
+    engine = Engine(job=app.current_job, session=app.scan_session)
+    engine.subscribe(partial(publish_to_ui, app))
+    try:
+        result = engine.undo_batch(batch_id)
+        if result.restored and os.path.isdir(result.root): engine.run(result.root, {}, {})
+    except Exception as e:
+        logging.error(f"Erro ao repor o lote {batch_id}: {e}", exc_info=True)
+        app.post(app.show_message, "error", "export_error_title", "export_error_message")
+
+
+def publish_to_ui(app: 'FinalDiskAnalyzerApp', event: Event):
+    """Subscritor dos eventos do motor do lado da janela (chamado na thread do trabalho)."""
+    kind, data = event
+    if kind == "scan_started":
+        app.post(app.set_determinate_progress, 100)
+    elif kind == "scan_progress":
+        app.post(app.update_scan_progress, data, coalesce="scan_progress")
+    elif kind == "scan_partial":
+        app.post(app.show_partial_scan, data, coalesce="partial_scan")
+    elif kind == "directory":
+        apply_directory_view(app, data)
+    elif kind == "duplicates":
+        app.duplicates = data.frame
+        app.post(app.update_duplicates_view)
+    elif kind == "old_files":
+        app.old_files = data.frame
+        app.post(app.update_old_files_view)
+    elif kind == "big_files":
+        app.big_files = data.frame
+        app.post(app.update_big_files_view)
+    elif kind == "snapshot_saved":
+        app.post(app.refresh_snapshot_list)
+    elif kind == "diff":
+        app.growth_diff = data
+        app.post(app.update_growth_view)
+    elif kind == "report_saved":
+        app.post(partial(app.show_message, "info", "export_success_title", "export_success_message", path=data.pdf_path))
+    elif kind == "export_progress":
+        app.post(app.update_export_progress, data, coalesce="export_progress")
+    elif kind == "export_saved":
+        if data and not (app.current_job and app.current_job.cancelled):
+            app.post(partial(app.show_message, "info", "export_success_title", "export_success_message", path="\n".join(data.values())))
+    elif kind == "archive_progress":
+        app.post(app.update_archive_progress, data, coalesce="archive_progress")
+    elif kind == "archive_done":
+        if data.deleted and not app.old_files.empty:
+            app.old_files = app.old_files[~app.old_files['path'].isin(data.deleted)].reset_index(drop=True)
+            app.post(app.populate_old_files_table)
+        if data.complete:
+            app.post(partial(app.show_message, "info", "compress_confirm_title", "archive_done_message", count=len(data.stats),
+                             deleted=len(data.deleted), path=data.archive, size_in=data.bytes_in / (1024**2), size_out=data.bytes_out / (1024**2)))
+            if data.failed:
+                app.post(partial(app.show_message, "warning", "compress_confirm_title", "archive_kept_message", count=len(data.failed)))
+    elif kind == "bulk_progress":
+        app.post(app.update_bulk_progress, data, coalesce="bulk_progress")
+    elif kind == "bulk_done":
+        apply_bulk_outcome(app, data)
+    elif kind == "undo_done":
+        app.post(partial(app.show_message, "info", "delete_done_title", "undo_done_message", count=len(data.restored)))
+        if data.failed:
+            app.post(partial(app.show_message, "warning", "delete_done_title", "undo_failed_message", count=len(data.failed)))
+    elif kind == "cancelled":
+        app.post(app.show_message, "info", "job_cancelled_title", "job_cancelled_message")
+
+
+def apply_directory_view(app: 'FinalDiskAnalyzerApp', view: DirectoryView):
+    app.view_location = (view.table, view.dir_id)
+    app.df_files, app.df_folders = view.files, view.folders
+    summary = view.summary
+    app.storage_summary = {
+        "total_files": summary.files,
+        "total_size_gb": summary.size / (1024**3),
+        "avg_size_mb": summary.average_size / (1024**2),
+    } if summary.files else {}
+    app.post(app.update_quick_analysis_view)
+    app.post(app.update_storage_summary_view)
+
+
+def apply_bulk_outcome(app: 'FinalDiskAnalyzerApp', outcome: BulkOutcome):
+    """Passa os resultados mostrados para os ids novos da tabela e tira os ficheiros tratados, sem voltar ao disco."""
+    batch, remap = outcome.batch, outcome.remap
+    if app.view_location is not None and app.view_location[0] is outcome.table:
+        if outcome.duplicates is not None: app.duplicates = outcome.duplicates
+        app.old_files, app.big_files = remap_rows(app.old_files, remap), remap_rows(app.big_files, remap)
+        apply_directory_view(app, Engine().directory(outcome.table, app.view_location[1]))
+        app.post(app.populate_duplicates_table)
+        app.post(app.populate_old_files_table)
+        app.post(app.populate_big_files_table)
+    message = "delete_done_message" if batch.action == "delete" else "trash_done_message"
+    if len(batch.linked): message = "retention_linked_message"
+    app.post(partial(app.show_message, "info", "delete_done_title", message, count=len(batch.paths),
+                     linked=len(batch.linked), size=batch.bytes / (1024**2)))
+    if batch.failed:
+        app.post(partial(app.show_message, "warning", "delete_done_title", "delete_failed_message", count=len(batch.failed)))
+
+
+def show_directory(app: 'FinalDiskAnalyzerApp', table: ScanTable, dir_id: int):
+    """
+    Mostra uma pasta qualquer de uma varredura já feita (a raiz ou uma subpasta) a partir da
+    tabela em memória e do índice hierárquico, sem voltar ao disco. Pode ser chamada da thread do Tk.
+    """
+    apply_directory_view(app, Engine().directory(table, dir_id))
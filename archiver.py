@@ -0,0 +1,522 @@
+# archiver.py
+"""
+Arquivamento de ficheiros antigos: comprime para .tar.gz, .tar.xz, .tar.zst (com o pacote opcional
+'zstandard') ou .zip, verifica cada membro do arquivo e só depois apaga os originais.
+
+Nos formatos tar, o fluxo tar é cortado em segmentos de até SEGMENT_BYTES e cada segmento é
+comprimido como um fluxo independente num pool de threads (zlib, lzma e zstd libertam o GIL).
+Os fluxos são escritos pela ordem original e ficam concatenados no ficheiro, o que o gzip, o xz
+e o zstd leem como um único arquivo. Os ficheiros pequenos partilham um segmento; um segmento
+que termina um ficheiro termina sempre numa fronteira de membro, o que permite retomar.
+
+Um diário (JSON Lines, ao lado do arquivo) regista cada membro escrito com o hash do conteúdo e
+a posição no arquivo em que termina. Um trabalho interrompido retoma cortando o arquivo no último
+membro registado. A verificação relê o arquivo descomprimido e compara o hash de cada membro (no
+ZIP, o CRC é também verificado pelo zipfile). Um original só é apagado se o membro estiver
+verificado e o ficheiro não tiver mudado (tamanho e data) desde que foi lido.
+"""
+import os
+import json
+import gzip
+import lzma
+import time
+import zlib
+import logging
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+import hashing
+import settings
+from jobs import Job
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SEGMENT_BYTES = 8 * 1024 * 1024
+READ_BYTES = 1024 * 1024
+JOURNAL_SUFFIX = ".journal"
+# Hash dos membros guardado no diário (não depende do 'hash_backend' escolhido para os duplicados)
+MEMBER_HASH = "blake2b"
+
+Progress = Callable[[Dict], None]
+
+
+# --- Compressores (um fluxo completo por chamada) ---
+
+def _gzip_stream(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def _xz_stream(data: bytes, level: int) -> bytes:
+    return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+
+# Um ZstdCompressor não pode ser partilhado entre threads
+_zstd = threading.local()
+
+def _zstd_stream(data: bytes, level: int) -> bytes:
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None or _zstd.level != level:
+        compressor, _zstd.level = zstandard.ZstdCompressor(level=level), level
+        _zstd.compressor = compressor
+    return compressor.compress(data)
+
+# formato -> (extensão, compressor de segmentos ou None para ZIP, nível por omissão)
+FORMATS: Dict[str, Tuple[str, Optional[Callable[[bytes, int], bytes]], int]] = {
+    "tar.gz": (".tar.gz", _gzip_stream, 6),
+    "tar.xz": (".tar.xz", _xz_stream, 6),
+    "zip": (".zip", None, 6),
+}
+if zstandard is not None:
+    FORMATS["tar.zst"] = (".tar.zst", _zstd_stream, 10)
+
+def available_formats() -> List[str]:
+    return list(FORMATS)
+
+def format_for_path(path: str) -> str:
+    name = path.lower()
+    for fmt, (ext, _, _) in FORMATS.items():
+        if name.endswith(ext): return fmt
+    if name.endswith((".tgz", ".tar.gz")): return "tar.gz"
+    raise ValueError(f"Formato de arquivo não suportado: {os.path.basename(path)}")
+
+def default_workers() -> int:
+    configured = settings.get_setting("archive_workers")
+    if isinstance(configured, int) and configured > 0: return configured
+    return min(8, os.cpu_count() or 1)
+
+def journal_path(archive: str) -> str:
+    return archive + JOURNAL_SUFFIX
+
+def has_journal(archive: str) -> bool:
+    """Há um arquivamento interrompido deste arquivo que pode ser retomado."""
+    return os.path.exists(journal_path(archive))
+
+def discard_journal(archive: str):
+    """Esquece um arquivamento interrompido (o arquivo parcial é reescrito no próximo arquivamento)."""
+    ArchiveJournal(journal_path(archive)).remove()
+
+def archive_names(paths: Sequence[str]) -> List[str]:
+    """Nomes dentro do arquivo: caminhos relativos à pasta comum, com '/'."""
+    try:
+        common = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+        names = [os.path.relpath(os.path.abspath(p), common) for p in paths]
+    except ValueError:
+        # Unidades diferentes (Windows): a letra da unidade passa a ser a primeira pasta
+        names = [os.path.splitdrive(os.path.abspath(p))[0].rstrip(":") + os.path.splitdrive(os.path.abspath(p))[1] for p in paths]
+    return [name.replace(os.sep, "/").lstrip("/") for name in names]
+
+
+class ArchiveResult(NamedTuple):
+    archive: str
+    format: str
+    stats: pd.DataFrame          # path, arcname, size, compressed, ratio, seconds, mb_per_s, verified, deleted
+    deleted: List[str]
+    failed: Dict[str, str]       # caminho -> motivo (não arquivado, não verificado ou não apagado)
+    seconds: float
+    complete: bool               # False se foi cancelado; o diário fica para retomar
+
+    @property
+    def bytes_in(self) -> int:
+        return int(self.stats['size'].sum()) if len(self.stats) else 0
+
+    @property
+    def bytes_out(self) -> int:
+        return os.path.getsize(self.archive) if os.path.exists(self.archive) else 0
+
+
+class ArchiveJournal:
+    """Diário em JSON Lines: um registo 'start' com a lista de ficheiros e um registo por passo concluído."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def append(self, record: Dict, sync: bool = False):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if sync: os.fsync(f.fileno())
+
+    def read(self) -> List[Dict]:
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try: records.append(json.loads(line))
+                except json.JSONDecodeError: break  # última linha cortada por uma interrupção
+        return records
+
+    def remove(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+
+class _State:
+    """Estado de um arquivamento, reconstruído a partir do diário quando se retoma."""
+    def __init__(self, fmt: str, level: int, files: List[Dict]):
+        self.fmt, self.level, self.files = fmt, level, files
+        self.members: Dict[str, Dict] = {}      # caminho -> registo 'member'
+        self.written = False
+        self.verified: Optional[Set[str]] = None
+        self.deleted: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+
+    @classmethod
+    def from_journal(cls, records: List[Dict], archive_size: int) -> '_State':
+        start = records[0]
+        state = cls(start["format"], start["level"], start["files"])
+        for record in records[1:]:
+            event = record["event"]
+            if event == "member": state.members[record["path"]] = record
+            elif event == "written": state.written = record["size"] == archive_size
+            elif event == "verified": state.verified = set(record["paths"])
+            elif event == "deleted": state.deleted.add(record["path"])
+        if not state.written:
+            state.verified = None
+            if state.fmt == "zip":
+                # Um ZIP sem o diretório central não se pode continuar: volta a ser escrito de raiz
+                state.members = {}
+            else:
+                # Só contam os membros que terminam dentro do que chegou ao disco
+                state.members = {path: m for path, m in state.members.items() if m["offset"] <= archive_size}
+        return state
+
+    @property
+    def resume_offset(self) -> int:
+        return max((m["offset"] for m in self.members.values()), default=0)
+
+
+def _tar_header(arcname: str, st: os.stat_result) -> bytes:
+    info = tarfile.TarInfo(arcname)
+    info.size, info.mtime, info.mode, info.type = st.st_size, int(st.st_mtime), st.st_mode & 0o7777, tarfile.REGTYPE
+    return info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8', errors='surrogateescape')
+
+def _timed(compress: Callable[[bytes, int], bytes], data: bytes, level: int) -> Tuple[bytes, float]:
+    start = time.perf_counter()
+    out = compress(data, level)
+    return out, time.perf_counter() - start
+
+
+class _TarWriter:
+    """
+    Monta o fluxo tar em segmentos e comprime-os em paralelo, escrevendo-os por ordem. Cada membro
+    fica registado no diário quando o segmento que o termina chega ao ficheiro.
+    """
+    def __init__(self, out, state: _State, journal: ArchiveJournal, workers: int, progress: Optional[Callable[[Dict], None]]):
+        self.out, self.state, self.journal, self.progress = out, state, journal, progress
+        self.compress = FORMATS[state.fmt][1]
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive")
+        self.max_inflight = workers * 2
+        self.pending = deque()
+        self.batch = bytearray()
+        self.shares: Dict[str, int] = {}     # bytes de cada membro no segmento em construção
+        self.completed: List[Dict] = []      # membros que terminam no segmento em construção
+        self.acc: Dict[str, List[float]] = {}  # caminho -> [bytes comprimidos, segundos], repartidos por quota
+
+    def _submit(self, data: bytes, shares: Dict[str, int], completed: List[Dict]):
+        self.pending.append((self.pool.submit(_timed, self.compress, data, self.state.level), shares, completed, len(data)))
+        while len(self.pending) > self.max_inflight: self._drain_one()
+
+    def _drain_one(self):
+        future, shares, completed, raw = self.pending.popleft()
+        data, seconds = future.result()
+        self.out.write(data)
+        for path, share in shares.items():
+            acc = self.acc.setdefault(path, [0.0, 0.0])
+            acc[0] += len(data) * share / raw; acc[1] += seconds * share / raw
+        if completed:
+            self.out.flush()
+            offset = self.out.tell()
+            for member in completed:
+                compressed, spent = self.acc.pop(member["path"], [0.0, 0.0])
+                member.update(offset=offset, compressed=int(round(compressed)), seconds=spent)
+                self.state.members[member["path"]] = member
+                self.journal.append(member)
+                if self.progress: self.progress(member)
+
+    def flush_batch(self, upto: Optional[int] = None):
+        """Envia o segmento em construção (ou só os primeiros 'upto' bytes, que acabam num membro completo)."""
+        if upto is None: upto = len(self.batch)
+        if upto == 0: return
+        self._submit(bytes(self.batch[:upto]), self.shares, self.completed)
+        del self.batch[:upto]
+        self.shares, self.completed = {}, []
+
+    def add_file(self, path: str, arcname: str, job: Optional[Job]) -> bool:
+        """Acrescenta um ficheiro ao fluxo; False se foi cancelado a meio (o membro não fica registado)."""
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            header = _tar_header(arcname, st)
+            padding = (512 - st.st_size % 512) % 512
+            if self.batch and len(self.batch) + len(header) + st.st_size + padding > SEGMENT_BYTES: self.flush_batch()
+            start = len(self.batch)
+            hasher = hashing.new_hasher(MEMBER_HASH)
+            self.batch += header
+            self.shares[path] = len(header)
+            remaining, changed = st.st_size, False
+            while remaining > 0:
+                if job is not None and not job.checkpoint():
+                    # Cancelado a meio: o membro incompleto sai do segmento (o que já foi enviado fica depois
+                    # do último membro registado e é cortado quando se retoma)
+                    del self.batch[start:]
+                    self.shares.pop(path, None)
+                    return False
+                try:
+                    chunk = f.read(min(READ_BYTES, remaining))
+                except OSError as e:
+                    logging.warning(f"Erro ao ler {path} durante o arquivamento: {e}")
+                    chunk = b""
+                if not chunk:
+                    # O ficheiro encolheu ou deixou de se ler: completa com zeros para manter o tar coerente;
+                    # o hash deixa de bater certo e o original nunca é apagado
+                    chunk, changed = b"\0" * remaining, True
+                else:
+                    hasher.update(chunk)
+                self.batch += chunk
+                self.shares[path] += len(chunk)
+                remaining -= len(chunk)
+                if len(self.batch) >= SEGMENT_BYTES and remaining > 0:
+                    # Segmento a meio do ficheiro: primeiro os membros já completos, num segmento que acaba neles
+                    if start:
+                        part = self.shares.pop(path)
+                        self.flush_batch(start)
+                        self.shares[path] = part
+                        start = 0
+                    self._submit(bytes(self.batch), {path: self.shares[path]}, [])
+                    self.batch.clear()
+                    self.shares[path] = 0
+        self.batch += b"\0" * padding
+        self.shares[path] += padding
+        member = {"event": "member", "path": path, "arcname": arcname, "size": st.st_size, "mtime": st.st_mtime,
+                  "hash": hasher.hexdigest(), "changed": changed}
+        self.completed.append(member)
+        return True
+
+    def finish(self, cancelled: bool):
+        """Escreve o que falta; o fim de arquivo do tar (dois blocos de zeros) só entra se não foi cancelado."""
+        try:
+            self.flush_batch()
+            if not cancelled: self._submit(b"\0" * 1024, {}, [])
+            while self.pending: self._drain_one()
+        finally:
+            self.pool.shutdown(wait=True)
+
+
+def _write_tar(target: str, state: _State, pending: List[Dict], journal: ArchiveJournal, workers: int,
+               job: Optional[Job], member_done: Callable[[Dict], None]) -> bool:
+    """Escreve (ou continua) o arquivo tar comprimido; False se foi cancelado."""
+    offset = state.resume_offset
+    cancelled = False
+    with open(target, 'r+b' if offset and os.path.exists(target) else 'wb') as out:
+        out.truncate(offset)
+        out.seek(offset)
+        writer = _TarWriter(out, state, journal, workers, member_done)
+        try:
+            for entry in pending:
+                if job is not None and not job.checkpoint():
+                    cancelled = True
+                    break
+                try:
+                    if not writer.add_file(entry["path"], entry["arcname"], job):
+                        cancelled = True
+                        break
+                except OSError as e:
+                    logging.warning(f"Não foi possível arquivar {entry['path']}: {e}")
+                    state.failed[entry["path"]] = str(e)
+        finally:
+            writer.finish(cancelled)
+        out.flush()
+        os.fsync(out.fileno())
+    return not cancelled
+
+
+def _write_zip(target: str, state: _State, pending: List[Dict], journal: ArchiveJournal,
+               job: Optional[Job], member_done: Callable[[Dict], None]) -> bool:
+    """Escreve o ZIP de raiz (o zipfile comprime numa só thread); False se foi cancelado."""
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for entry in pending:
+            if job is not None and not job.checkpoint(): return False
+            path, started = entry["path"], time.perf_counter()
+            hasher = hashing.new_hasher(MEMBER_HASH)
+            try:
+                with open(path, 'rb') as src:
+                    st = os.fstat(src.fileno())
+                    info = zipfile.ZipInfo.from_file(path, entry["arcname"])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    remaining = st.st_size
+                    with zf.open(info, 'w', force_zip64=True) as dst:
+                        while remaining > 0:
+                            if job is not None and not job.checkpoint(): return False
+                            chunk = src.read(min(READ_BYTES, remaining))
+                            if not chunk: break
+                            hasher.update(chunk)
+                            dst.write(chunk)
+                            remaining -= len(chunk)
+            except (OSError, UnicodeEncodeError) as e:
+                logging.warning(f"Não foi possível arquivar {path}: {e}")
+                state.failed[path] = str(e)
+                continue
+            member = {"event": "member", "path": path, "arcname": entry["arcname"], "size": st.st_size, "mtime": st.st_mtime,
+                      "hash": hasher.hexdigest(), "changed": remaining > 0, "offset": 0,
+                      "compressed": info.compress_size, "seconds": time.perf_counter() - started}
+            state.members[path] = member
+            journal.append(member)
+            member_done(member)
+    return True
+
+
+_READ_ERRORS = (tarfile.TarError, zipfile.BadZipFile, OSError, EOFError, lzma.LZMAError, zlib.error) + \
+    ((zstandard.ZstdError,) if zstandard is not None else ())
+
+def _tar_stream(raw, fmt: str):
+    if fmt == "tar.gz": return gzip.GzipFile(fileobj=raw, mode='rb')
+    if fmt == "tar.xz": return lzma.LZMAFile(raw)
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+def verify_archive(archive: str, fmt: str, expected: Dict[str, str], job: Optional[Job] = None,
+                   progress: Optional[Callable[[str], None]] = None) -> Optional[Set[str]]:
+    """
+    Relê o arquivo descomprimido e devolve os nomes dos membros cujo conteúdo tem o hash esperado
+    ('expected' é {arcname: hash}); None se foi cancelado. Um erro de leitura a meio deixa os
+    membros seguintes por verificar.
+    """
+    verified: Set[str] = set()
+    def check(name: str, reader):
+        hasher = hashing.new_hasher(MEMBER_HASH)
+        for chunk in iter(lambda: reader.read(READ_BYTES), b""):
+            if job is not None and not job.checkpoint(): return False
+            hasher.update(chunk)
+        if expected.get(name) == hasher.hexdigest(): verified.add(name)
+        else: logging.warning(f"O membro {name} de {archive} não corresponde ao original.")
+        if progress: progress(name)
+        return True
+    try:
+        if fmt == "zip":
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.filename not in expected: continue
+                    with zf.open(info) as reader:  # o zipfile também confirma o CRC no fim de cada membro
+                        if not check(info.filename, reader): return None
+        else:
+            with open(archive, 'rb') as raw, _tar_stream(raw, fmt) as stream, tarfile.open(fileobj=stream, mode='r|') as tar:
+                for member in tar:
+                    if not member.isfile() or member.name not in expected: continue
+                    if not check(member.name, tar.extractfile(member)): return None
+    except _READ_ERRORS as e:
+        logging.error(f"Erro ao verificar {archive}: {e}")
+    return verified
+
+
+def _delete_sources(state: _State, journal: ArchiveJournal, job: Optional[Job], member_done: Callable[[Dict], None]) -> bool:
+    """Apaga os originais verificados que não mudaram desde que foram lidos; False se foi cancelado."""
+    for path, member in state.members.items():
+        if path in state.deleted: continue
+        if job is not None and not job.checkpoint(): return False
+        if path not in state.verified:
+            state.failed[path] = "não verificado no arquivo"
+            continue
+        try:
+            st = os.stat(path)
+            if member.get("changed") or st.st_size != member["size"] or st.st_mtime != member["mtime"]:
+                state.failed[path] = "alterado depois de arquivado"
+                continue
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Não foi possível apagar {path}: {e}")
+            state.failed[path] = str(e)
+            continue
+        state.deleted.add(path)
+        journal.append({"event": "deleted", "path": path})
+        member_done(member)
+    return True
+
+
+def _stats(state: _State) -> pd.DataFrame:
+    """Uma linha por membro: tamanho, bytes comprimidos (repartidos pelos segmentos), rácio e débito."""
+    frame = pd.DataFrame(list(state.members.values()), columns=['path', 'arcname', 'size', 'compressed', 'seconds'])
+    size, seconds = frame['size'].astype('float64'), frame['seconds'].astype('float64')
+    frame['ratio'] = (frame['compressed'] / size.where(size > 0)).fillna(1.0)
+    frame['mb_per_s'] = (size / (1024**2) / seconds.where(seconds > 0)).fillna(0.0)
+    frame['verified'] = frame['path'].isin(state.verified or ())
+    frame['deleted'] = frame['path'].isin(state.deleted)
+    return frame[['path', 'arcname', 'size', 'compressed', 'ratio', 'seconds', 'mb_per_s', 'verified', 'deleted']]
+
+
+def _run(target: str, state: _State, journal: ArchiveJournal, workers: Optional[int], delete: bool,
+         job: Optional[Job], progress: Optional[Progress]) -> ArchiveResult:
+    started = time.perf_counter()
+    total = len(state.files)
+    counters = {"write": len(state.members), "verify": 0, "delete": len(state.deleted)}
+    def step(phase: str, path: str):
+        counters[phase] += 1
+        if progress: progress({"phase": phase, "done": counters[phase], "total": total, "path": path})
+
+    cancelled = False
+    if not state.written:
+        pending = [entry for entry in state.files if entry["path"] not in state.members]
+        done = lambda member: step("write", member["path"])
+        if state.fmt == "zip": cancelled = not _write_zip(target, state, pending, journal, job, done)
+        else: cancelled = not _write_tar(target, state, pending, journal, workers or default_workers(), job, done)
+        if not cancelled:
+            journal.append({"event": "written", "size": os.path.getsize(target)}, sync=True)
+            state.written = True
+    if not cancelled and state.verified is None:
+        arcnames = {m["arcname"]: path for path, m in state.members.items()}
+        verified = verify_archive(target, state.fmt, {m["arcname"]: m["hash"] for m in state.members.values()}, job,
+                                  lambda name: step("verify", arcnames[name]))
+        if verified is None: cancelled = True
+        else:
+            state.verified = {arcnames[name] for name in verified}
+            journal.append({"event": "verified", "paths": sorted(state.verified)}, sync=True)
+    if not cancelled and delete:
+        cancelled = not _delete_sources(state, journal, job, lambda member: step("delete", member["path"]))
+
+    if cancelled:
+        logging.info(f"Arquivamento de {target} interrompido; pode ser retomado a partir de {journal.path}.")
+    else:
+        for entry in state.files:
+            if entry["path"] not in state.members: state.failed.setdefault(entry["path"], "não arquivado")
+        journal.remove()
+        logging.info(f"Arquivo {target}: {len(state.members)} ficheiros arquivados, {len(state.deleted)} apagados, "
+                     f"{len(state.failed)} com problemas.")
+    return ArchiveResult(target, state.fmt, _stats(state), sorted(state.deleted), dict(state.failed),
+                         time.perf_counter() - started, not cancelled)
+
+
+def archive_files(paths: Sequence[str], target: str, fmt: Optional[str] = None, level: Optional[int] = None,
+                  workers: Optional[int] = None, delete: bool = True, job: Optional[Job] = None,
+                  progress: Optional[Progress] = None) -> ArchiveResult:
+    """
+    Arquiva 'paths' em 'target' (formato deduzido da extensão se não for indicado), verifica o arquivo
+    e, com 'delete', apaga os originais verificados. Se já houver um diário para 'target', o trabalho
+    anterior tem de ser retomado com resume_archive ou o diário apagado.
+    """
+    fmt = fmt or format_for_path(target)
+    if fmt not in FORMATS: raise ValueError(f"Formato de arquivo não suportado: {fmt}")
+    if has_journal(target):
+        raise FileExistsError(f"Já existe um arquivamento interrompido de {target}.")
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+    files = [{"path": path, "arcname": name} for path, name in zip(paths, archive_names(paths))] if paths else []
+    level = FORMATS[fmt][2] if level is None else level
+    journal = ArchiveJournal(journal_path(target))
+    journal.append({"event": "start", "format": fmt, "level": level, "hash": MEMBER_HASH, "files": files}, sync=True)
+    return _run(target, _State(fmt, level, files), journal, workers, delete, job, progress)
+
+
+def resume_archive(target: str, workers: Optional[int] = None, delete: bool = True, job: Optional[Job] = None,
+                   progress: Optional[Progress] = None) -> ArchiveResult:
+    """Continua um arquivamento interrompido a partir do diário de 'target'."""
+    journal = ArchiveJournal(journal_path(target))
+    records = journal.read()
+    if not records or records[0].get("event") != "start":
+        raise ValueError(f"Diário de arquivamento inválido: {journal.path}")
+    state = _State.from_journal(records, os.path.getsize(target) if os.path.exists(target) else 0)
+    if state.fmt not in FORMATS:
+        raise RuntimeError(f"O formato {state.fmt} precisa de um pacote que não está instalado.")
+    logging.info(f"A retomar o arquivamento de {target}: {len(state.members)} de {len(state.files)} ficheiros já arquivados.")
+    return _run(target, state, journal, workers, delete, job, progress)
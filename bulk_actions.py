@@ -0,0 +1,359 @@
+# bulk_actions.py
+"""
+Ações em massa sobre ficheiros de uma varredura: apagar definitivamente ou mover para a reciclagem
+do Analisador, de onde um lote inteiro pode ser reposto. Os ficheiros são indicados pelos ids das
+linhas da ScanTable (o índice dos DataFrames de resultados), nunca pelo texto mostrado na interface.
+
+Antes de mexer num ficheiro confirma-se que ainda é o da varredura (tamanho e data de modificação);
+um ficheiro alterado entretanto fica de fora. As operações correm por blocos num pool de threads
+(em discos de rede cada remoção é uma ida e volta ao servidor) e ficam registadas num diário em
+JSON Lines: cada ficheiro é anotado (com fsync) antes de ir para a reciclagem e o resultado de cada
+bloco é confirmado antes do seguinte, o que permite repor um lote mesmo depois de uma interrupção.
+
+Um ficheiro também pode ser substituído por uma ligação física para outra cópia igual (ver
+retention): a ligação é criada ao lado com um nome temporário e só toma o lugar do original
+(os.replace) depois de este ter sido apagado ou mudado para a reciclagem.
+
+A reciclagem fica ao lado do app_config.json; os ficheiros noutro volume ficam numa pasta
+settings.STAGING_DIR_NAME na raiz desse volume, para a mudança ser um rename e não uma cópia.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import settings
+from jobs import Job
+from scan_table import ScanTable
+
+ACTIONS = ("trash", "delete")
+BLOCK_SIZE = 512
+# Sufixo da ligação física temporária criada ao lado do ficheiro que vai substituir
+LINK_SUFFIX = "analisador-ligacao"
+DEFAULT_RETENTION_DAYS = 30
+
+Progress = Callable[[Dict], None]
+
+
+class BatchResult(NamedTuple):
+    batch_id: str
+    action: str
+    file_ids: np.ndarray        # ids (na tabela antes da remoção) dos ficheiros tratados
+    paths: List[str]
+    bytes: int
+    failed: Dict[str, str]      # caminho -> motivo
+    seconds: float
+    complete: bool              # False se o trabalho foi cancelado a meio
+    linked: np.ndarray = np.empty(0, dtype=np.int64)  # dos file_ids, os que passaram a ser ligações físicas
+
+
+class BatchInfo(NamedTuple):
+    batch_id: str
+    action: str
+    root: str
+    created: float
+    files: int
+    bytes: int
+    restorable: bool            # há ficheiros na reciclagem que podem ser repostos
+
+
+class UndoResult(NamedTuple):
+    batch_id: str
+    root: str                   # raiz da varredura em que o lote foi feito
+    restored: List[str]
+    failed: Dict[str, str]
+
+
+def trash_dir() -> str:
+    """Reciclagem e diários dos lotes, ao lado do app_config.json."""
+    return settings.data_dir(settings.TRASH_DIR_NAME)
+
+def journal_path(batch_id: str) -> str:
+    return os.path.join(trash_dir(), f"{batch_id}.jsonl")
+
+def in_recycle_bin(paths: Iterable[str]) -> np.ndarray:
+    """Máscara dos caminhos que estão na reciclagem do Analisador (a principal ou a de um volume)."""
+    paths = pd.Series(list(paths), dtype=object).map(os.path.normcase)
+    home = os.path.normcase(trash_dir()) + os.sep
+    staging = os.sep + os.path.normcase(settings.STAGING_DIR_NAME) + os.sep
+    return (paths.str.startswith(home) | paths.str.contains(staging, regex=False)).to_numpy(dtype=bool)
+
+def retention_days() -> int:
+    configured = settings.get_setting("trash_retention_days")
+    return configured if isinstance(configured, int) and configured > 0 else DEFAULT_RETENTION_DAYS
+
+
+def _append(batch_id: str, records: Iterable[Dict], sync: bool = False):
+    with open(journal_path(batch_id), 'a', encoding='utf-8') as f:
+        for record in records: f.write(json.dumps(record) + "\n")
+        f.flush()
+        if sync: os.fsync(f.fileno())
+
+def _read(batch_id: str) -> List[Dict]:
+    records = []
+    with open(journal_path(batch_id), encoding='utf-8') as f:
+        for line in f:
+            try: records.append(json.loads(line))
+            except json.JSONDecodeError: break  # última linha cortada por uma interrupção
+    return records
+
+
+class _Staging:
+    """Pasta do lote na reciclagem de cada volume, criada só quando é precisa."""
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self.home = os.path.join(trash_dir(), batch_id)
+        self.home_dev = os.stat(trash_dir()).st_dev
+        self._by_dev: Dict[int, str] = {self.home_dev: self.home}
+        self._journal_lock = threading.Lock()
+
+    def announce(self, record: Dict):
+        """Anota no diário (com fsync) um ficheiro prestes a ir para a reciclagem."""
+        with self._journal_lock:
+            _append(self.batch_id, [record], sync=True)
+
+    @staticmethod
+    def _mount_point(path: str, dev: int) -> str:
+        path = os.path.dirname(os.path.abspath(path))
+        while True:
+            parent = os.path.dirname(path)
+            if parent == path: return path
+            try:
+                if os.stat(parent).st_dev != dev: return path
+            except OSError:
+                return path
+            path = parent
+
+    def folder_for(self, path: str, dev: int) -> str:
+        folder = self._by_dev.get(dev)
+        if folder is None:
+            folder = os.path.join(self._mount_point(path, dev), settings.STAGING_DIR_NAME, self.batch_id)
+            try:
+                os.makedirs(folder, exist_ok=True)
+            except OSError as e:
+                # Sem escrita na raiz do volume: vai para a reciclagem principal, com cópia
+                logging.warning(f"Não foi possível criar {folder} ({e}); a reciclagem deste volume passa a ser uma cópia.")
+                folder = self.home
+            self._by_dev[dev] = folder
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+
+def _link_beside(path: str, target: str, st: os.stat_result) -> str:
+    """Cria ao lado de 'path' uma ligação física para 'target' (que tem de ser uma cópia no mesmo volume)."""
+    target_st = os.stat(target)
+    if target_st.st_dev != st.st_dev: raise OSError(f"{target} está noutro volume")
+    if target_st.st_size != st.st_size: raise OSError(f"{target} mudou de tamanho")
+    if (target_st.st_dev, target_st.st_ino) == (st.st_dev, st.st_ino): raise OSError(f"já é uma ligação para {target}")
+    temporary = f"{path}.{LINK_SUFFIX}"
+    if os.path.lexists(temporary): os.remove(temporary)
+    os.link(target, temporary)
+    return temporary
+
+def _apply(action: str, staging: Optional[_Staging], item: Tuple[int, str, int, float, str, Optional[str]]) -> Dict:
+    """Trata um ficheiro; devolve o registo do diário ('moved', 'deleted' ou 'failed')."""
+    file_id, path, size, mtime, staged_name, target = item
+    temporary = None
+    try:
+        st = os.stat(path)
+        if st.st_size != size or st.st_mtime != mtime:
+            return {"event": "failed", "id": file_id, "path": path, "reason": "alterado desde a varredura"}
+        if target is not None: temporary = _link_beside(path, target, st)
+        linked = {"target": target} if target is not None else {}
+        if action == "delete":
+            if temporary is not None: os.replace(temporary, path)
+            else: os.remove(path)
+            return {"event": "deleted", "id": file_id, "path": path, "size": size, **linked}
+        staged = os.path.join(staging.folder_for(path, st.st_dev), staged_name)
+        # Escrito antes do rename: uma interrupção a meio do bloco não deixa ficheiros perdidos na reciclagem
+        staging.announce({"event": "staging", "id": file_id, "path": path, "staged": staged, "size": size,
+                          "mtime": mtime, **linked})
+        try:
+            os.rename(path, staged)
+        except OSError:
+            shutil.move(path, staged)
+        if temporary is not None:
+            try:
+                os.replace(temporary, path)
+            except OSError:
+                shutil.move(staged, path)  # o original volta ao seu lugar; a ligação temporária é apagada abaixo
+                raise
+        return {"event": "moved", "id": file_id, "path": path, "staged": staged, "size": size, "mtime": mtime, **linked}
+    except OSError as e:
+        if temporary is not None and os.path.lexists(temporary):
+            try: os.remove(temporary)
+            except OSError: pass
+        return {"event": "failed", "id": file_id, "path": path, "reason": e.strerror or str(e)}
+
+
+def run_batch(table: ScanTable, file_ids: Iterable[int], action: str = "trash", job: Optional[Job] = None,
+              progress: Optional[Progress] = None, workers: int = 8,
+              expected_paths: Optional[Dict[int, str]] = None,
+              link_targets: Optional[Dict[int, str]] = None) -> BatchResult:
+    """
+    Apaga ('delete') ou move para a reciclagem ('trash') os ficheiros 'file_ids' da tabela.
+    Com 'expected_paths' ({id: caminho}, tirado do resultado em que o utilizador escolheu), um id
+    que nesta tabela corresponda a outro caminho fica de fora. Com 'link_targets' ({id: caminho}),
+    esses ficheiros ficam no lugar como ligações físicas para o caminho indicado. Os ficheiros
+    tratados são os de BatchResult.file_ids; a tabela não é alterada aqui (ver
+    ScanTable.remove_files e ScanTable.relink_files).
+    O progresso é {'done', 'total', 'bytes'}.
+    """
+    if action not in ACTIONS: raise ValueError(f"Ação desconhecida: {action}")
+    started = time.perf_counter()
+    ids = np.unique(np.asarray(list(file_ids), dtype=np.int64))
+    failed: Dict[str, str] = {}
+    for file_id in ids[(ids < 0) | (ids >= len(table))]:
+        failed[(expected_paths or {}).get(int(file_id), f"#{file_id}")] = "não pertence a esta varredura"
+    ids = ids[(ids >= 0) & (ids < len(table))]
+    rows = table.with_paths(table.frame.loc[ids])
+    if expected_paths is not None:
+        matches = rows['path'].to_numpy() == np.array([expected_paths.get(i) for i in ids.tolist()], dtype=object)
+        for path in rows['path'][~matches]: failed[path] = "não pertence a esta varredura"
+        ids, rows = ids[matches], rows[matches]
+    # Nunca tratar o que já está na reciclagem: um lote seguinte levaria as cópias guardadas
+    recycled = in_recycle_bin(rows['path'])
+    for path in rows['path'][recycled]: failed[path] = "na reciclagem do Analisador"
+    ids, rows = ids[~recycled], rows[~recycled]
+    items = list(zip(ids.tolist(), rows['path'].tolist(), rows['size'].tolist(), rows['mtime'].tolist(),
+                     (f"{i:08d}_{name}" for i, name in enumerate(rows['name'])),
+                     ((link_targets or {}).get(i) for i in ids.tolist())))
+    batch_id = time.strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}-{int(time.time() * 1000) % 1000:03d}"
+    os.makedirs(trash_dir(), exist_ok=True)
+    _append(batch_id, [{"event": "start", "batch_id": batch_id, "action": action, "root": table.root,
+                        "created": time.time(), "files": len(items)}], sync=True)
+    staging = _Staging(batch_id) if action == "trash" else None
+
+    done_ids, done_paths, linked_ids, total_bytes, cancelled = [], [], [], 0, False
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bulk") as pool:
+        for start in range(0, len(items), BLOCK_SIZE):
+            if job is not None and not job.checkpoint():
+                cancelled = True
+                break
+            records = list(pool.map(lambda item: _apply(action, staging, item), items[start:start + BLOCK_SIZE]))
+            _append(batch_id, records, sync=True)
+            for record in records:
+                if record["event"] == "failed":
+                    failed[record["path"]] = record["reason"]
+                    continue
+                done_ids.append(record["id"]); done_paths.append(record["path"]); total_bytes += record["size"]
+                if "target" in record: linked_ids.append(record["id"])
+            if progress: progress({"done": min(start + BLOCK_SIZE, len(items)), "total": len(items), "bytes": total_bytes})
+    _append(batch_id, [{"event": "done", "cancelled": cancelled}])
+    if action == "delete" or not done_ids:
+        # Sem nada para repor, o diário só serviria de registo
+        os.remove(journal_path(batch_id))
+    verb = "apagados" if action == "delete" else "movidos para a reciclagem"
+    links = f" ({len(linked_ids)} substituídos por ligações físicas)" if linked_ids else ""
+    logging.info(f"Lote {batch_id}: {len(done_ids)} ficheiros {verb}{links} ({total_bytes / (1024**2):,.1f} MB), "
+                 f"{len(failed)} falharam{' (cancelado)' if cancelled else ''}.")
+    return BatchResult(batch_id, action, np.asarray(done_ids, dtype=np.int64), done_paths, total_bytes, failed,
+                       time.perf_counter() - started, not cancelled, np.asarray(linked_ids, dtype=np.int64))
+
+
+def _is_link_to(path: str, target: str) -> bool:
+    try: return os.path.samefile(path, target)
+    except OSError: return False
+
+def _staged_files(records: List[Dict]) -> Dict[str, Dict]:
+    """
+    Ficheiros do lote que ainda estão na reciclagem: caminho original -> registo 'moved' (ou
+    'staging'). Um 'staging' sem 'moved' a seguir (interrupção, ou falha a meio da mudança) só
+    conta se o ficheiro chegou mesmo à reciclagem.
+    """
+    staged: Dict[str, Dict] = {}
+    for record in records:
+        if record["event"] in ("staging", "moved"): staged[record["path"]] = record
+        elif record["event"] in ("restored", "purged"): staged.pop(record["path"], None)
+    return {path: record for path, record in staged.items()
+            if record["event"] == "moved" or os.path.lexists(record["staged"])}
+
+def _remove_staging_folders(records: List[Dict]):
+    folders = {os.path.dirname(r["staged"]) for r in records if r["event"] in ("staging", "moved")}
+    for folder in folders:
+        try: os.rmdir(folder)
+        except OSError: pass
+
+def list_batches() -> List[BatchInfo]:
+    """Lotes com diário (os que ainda têm ficheiros na reciclagem), do mais recente para o mais antigo."""
+    directory = trash_dir()
+    if not os.path.isdir(directory): return []
+    batches = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".jsonl"): continue
+        batch_id = entry.name[:-len(".jsonl")]
+        try:
+            records = _read(batch_id)
+            start = records[0]
+        except (OSError, IndexError, KeyError) as e:
+            logging.warning(f"Diário de lote inválido em {entry.path}, a ignorar: {e}")
+            continue
+        staged = _staged_files(records)
+        batches.append(BatchInfo(batch_id, start["action"], start["root"], start["created"], len(staged),
+                                 sum(r["size"] for r in staged.values()), bool(staged)))
+    return sorted(batches, key=lambda info: info.created, reverse=True)
+
+def undo_batch(batch_id: str, job: Optional[Job] = None, progress: Optional[Progress] = None) -> UndoResult:
+    """
+    Repõe os ficheiros de um lote movido para a reciclagem. Um ficheiro cujo caminho original já
+    está ocupado fica na reciclagem; o lote só desaparece quando não sobrar nenhum. Uma ligação
+    física posta no lugar do original é retirada, se ainda for a mesma que o lote criou.
+    """
+    records = _read(batch_id)
+    staged = _staged_files(records)
+    restored, failed = [], {}
+    for done, (path, record) in enumerate(staged.items(), start=1):
+        if job is not None and not job.checkpoint(): break
+        try:
+            if "target" in record and _is_link_to(path, record["target"]): os.remove(path)
+            if os.path.lexists(path): raise FileExistsError(f"já existe {path}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try: os.rename(record["staged"], path)
+            except OSError: shutil.move(record["staged"], path)
+        except OSError as e:
+            failed[path] = e.strerror or str(e)
+            continue
+        restored.append(path)
+        _append(batch_id, [{"event": "restored", "path": path}])
+        if progress: progress({"done": done, "total": len(staged), "bytes": 0})
+    if len(restored) == len(staged):
+        _remove_staging_folders(records)
+        os.remove(journal_path(batch_id))
+    logging.info(f"Lote {batch_id}: {len(restored)} ficheiros repostos, {len(failed)} falharam.")
+    return UndoResult(batch_id, records[0]["root"], restored, failed)
+
+def purge_batch(batch_id: str) -> int:
+    """Apaga definitivamente o que o lote ainda tem na reciclagem; devolve os bytes libertados."""
+    records = _read(batch_id)
+    purged, freed = [], 0
+    staged = _staged_files(records)
+    for path, record in staged.items():
+        try:
+            os.remove(record["staged"])
+            freed += record["size"]
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Não foi possível apagar {record['staged']} da reciclagem: {e}")
+            continue
+        purged.append(path)
+    if len(purged) == len(staged):
+        _remove_staging_folders(records)
+        os.remove(journal_path(batch_id))
+    else:
+        _append(batch_id, [{"event": "purged", "path": path} for path in purged])
+    return freed
+
+def purge_expired(days: Optional[int] = None) -> int:
+    """Esvazia os lotes com mais de 'days' dias (por omissão, 'trash_retention_days' ou 30)."""
+    cutoff = time.time() - (days or retention_days()) * 86400
+    freed = sum(purge_batch(info.batch_id) for info in list_batches() if info.created < cutoff)
+    if freed: logging.info(f"Reciclagem: {freed / (1024**2):,.1f} MB de lotes antigos libertados.")
+    return freed
@@ -0,0 +1,196 @@
+# cli.py
+"""
+Modo de linha de comandos, sem interface gráfica (nada aqui importa o tkinter), para
+varreduras agendadas em servidores. Exemplo:
+
+    python main.py scan /data --duplicates --old-days 180 --top 100 --out relatorio.parquet
+
+Os resultados saem numa única tabela "longa" (uma linha por ficheiro e por resultado, com a
+coluna 'result' = big_file / old_file / duplicate) em Parquet, CSV ou JSON Lines, e o resumo
+da execução sai em JSON. Ctrl+C ou SIGTERM cancelam a varredura e gravam o resultado parcial.
+Códigos de saída: 0 concluído, 1 erro, 2 argumentos inválidos, 3 cancelado (resultado parcial).
+
+Com --keep, os grupos de duplicados passam por uma política de retenção (ver retention.py) e o
+plano (que cópia fica, o que é apagado ou ligado, bytes recuperáveis) pode ser gravado com --plan
+e executado num lote com --apply:
+
+    python main.py scan /data --keep under:/data/mestre --keep newest --link --plan plano.csv --apply trash
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+import bulk_actions
+import exporters
+import retention
+import scan_cache
+from engine import Engine, Event
+from jobs import Job
+from scan_table import ScanTable
+
+RESULT_COLUMNS = ['result', 'path', 'size', 'mtime', 'atime', 'group_id', 'reclaimable', 'hardlink']
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="analisador", description="Analisador de Disco Pro em modo de linha de comandos.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan = commands.add_parser("scan", help="Percorre uma pasta e exporta os resultados das análises.")
+    scan.add_argument("path", help="Pasta a analisar.")
+    scan.add_argument("--duplicates", action="store_true", help="Procura ficheiros duplicados (hash do conteúdo).")
+    scan.add_argument("--old-days", type=int, metavar="N", help="Ficheiros sem acesso há mais de N dias.")
+    scan.add_argument("--top", type=int, metavar="N", help="Os N maiores ficheiros.")
+    scan.add_argument("--out", metavar="FICHEIRO", help="Ficheiro de resultados (sem esta opção, JSON Lines no stdout).")
+    scan.add_argument("--format", choices=exporters.FORMATS, help="Formato de --out (por omissão, deduzido da extensão).")
+    scan.add_argument("--summary", metavar="FICHEIRO", help="Grava também o resumo JSON neste ficheiro.")
+    scan.add_argument("--workers", type=int, help="Threads da varredura (por omissão, 'scan_workers' ou automático).")
+    scan.add_argument("--hash-workers", type=int, help="Threads de leitura dos hashes.")
+    scan.add_argument("--hash-backend", help="Algoritmo de hash (blake2b, sha256, xxh3).")
+    scan.add_argument("--verify", action="store_true", help="Confirma os duplicados com SHA-256.")
+    scan.add_argument("--snapshot", action="store_true", help="Grava a varredura como instantâneo (para a aba Crescimento).")
+    scan.add_argument("--refresh", action="store_true", help="Ignora a varredura guardada em cache e relê tudo.")
+    scan.add_argument("--no-cache", action="store_true", help="Não lê nem grava a cache de varreduras.")
+    scan.add_argument("--keep", action="append", metavar="REGRA",
+                      help="Política de retenção dos duplicados (implica --duplicates): newest, oldest, shortest, "
+                           "under:PASTA;PASTA... ou regex:EXPR;EXPR... Repetida, as seguintes desempatam.")
+    scan.add_argument("--link", action="store_true", help="Com --keep, substitui as cópias por ligações físicas em vez de as apagar.")
+    scan.add_argument("--plan", metavar="FICHEIRO", help="Com --keep, grava o plano de retenção (formato deduzido da extensão).")
+    scan.add_argument("--apply", choices=bulk_actions.ACTIONS, help="Com --keep, executa o plano: 'trash' (reciclagem) ou 'delete'.")
+    scan.add_argument("--progress", action="store_true", help="Mostra o progresso da varredura no stderr.")
+    scan.add_argument("-q", "--quiet", action="store_true", help="Só avisos e erros no registo.")
+    return parser
+
+def collect_results(engine: Engine, table: ScanTable, args: argparse.Namespace) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Corre as análises pedidas sobre a tabela e junta-as numa única tabela com a coluna 'result'.
+    Devolve também os grupos de duplicados tal como saem do motor (indexados pelo id na tabela).
+    """
+    parts: List[pd.DataFrame] = []
+    found = pd.DataFrame()
+    if args.top is not None:
+        parts.append(engine.big_files(table, args.top).frame.assign(result="big_file"))
+    if args.old_days is not None:
+        parts.append(engine.old_files(table, args.old_days).frame.assign(result="old_file"))
+    if (args.duplicates or args.keep) and not engine.cancelled:
+        found = engine.find_duplicates(table, workers=args.hash_workers, backend=args.hash_backend,
+                                       verify=args.verify or None).frame
+        if not found.empty: parts.append(found.assign(result="duplicate"))
+    if not parts: return pd.DataFrame(columns=RESULT_COLUMNS), found
+    results = pd.concat(parts, ignore_index=True).reindex(columns=RESULT_COLUMNS)
+    # Tipos com nulos, para as linhas que não são duplicados não virarem floats
+    return results.astype({'group_id': 'Int64', 'reclaimable': 'Int64', 'hardlink': 'boolean'}), found
+
+def write_results(results: pd.DataFrame, path: Optional[str], fmt: str):
+    exporters.write_chunks(exporters.frame_chunks(results), path, fmt, RESULT_COLUMNS)
+
+def run_retention(engine: Engine, table: ScanTable, groups: pd.DataFrame, rules: List[retention.Rule],
+                  args: argparse.Namespace) -> dict:
+    """Avalia a política sobre todos os grupos, grava o plano e, com --apply, executa-o (só sobre uma varredura completa)."""
+    plan = engine.retention_plan(groups, rules, "hardlink" if args.link else "delete")
+    if args.plan: engine.export_plan(plan, args.plan)
+    summary = {"rules": [str(rule) for rule in plan.rules], "mode": plan.mode, "files": len(plan.actions()),
+               "reclaimable_bytes": plan.reclaimable_bytes, "plan": os.path.abspath(args.plan) if args.plan else None,
+               "applied": None}
+    if args.apply and not engine.cancelled and table.complete:
+        batch = engine.apply_plan(table, plan, args.apply).batch
+        summary["applied"] = {"batch_id": batch.batch_id, "action": batch.action, "files": len(batch.paths),
+                              "linked": len(batch.linked), "bytes": batch.bytes, "failed": len(batch.failed)}
+    elif args.apply:
+        logging.warning("Varredura incompleta: o plano de retenção não foi executado.")
+    return summary
+
+def run_scan(args: argparse.Namespace) -> int:
+    path = os.path.abspath(args.path)
+    if not os.path.isdir(path):
+        logging.error(f"A pasta {path} não existe ou não é uma pasta.")
+        return 2
+    fmt = exporters.format_for_path(args.out, args.format)
+    if fmt == "parquet" and not args.out:
+        logging.error("O formato Parquet precisa de --out.")
+        return 2
+    if fmt == "parquet" and not exporters.parquet_available():
+        logging.error("O formato Parquet precisa do pacote 'pyarrow'. Use .csv ou .jsonl.")
+        return 2
+    try:
+        rules = retention.parse_rules(args.keep or [])
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+    if (args.link or args.plan or args.apply) and not rules:
+        logging.error("--link, --plan e --apply precisam de pelo menos uma regra --keep.")
+        return 2
+    if args.plan and exporters.format_for_path(args.plan) == "parquet" and not exporters.parquet_available():
+        logging.error("O formato Parquet precisa do pacote 'pyarrow'. Use .csv ou .jsonl.")
+        return 2
+
+    job = Job()
+    def cancel(signum, frame):
+        logging.warning("Sinal recebido: a cancelar; os resultados parciais serão gravados.")
+        job.cancel()
+    signal.signal(signal.SIGINT, cancel)
+    if hasattr(signal, "SIGTERM"): signal.signal(signal.SIGTERM, cancel)
+
+    def show_progress(event: Event):
+        if event.kind != "scan_progress": return
+        event = event.data
+        sys.stderr.write(f"\r{event['files']:,} ficheiros · {event['bytes'] / (1024**3):,.2f} GB · "
+                         f"{event['files_per_sec']:,.0f} ficheiros/s" + ("\n" if event['done'] else ""))
+        sys.stderr.flush()
+
+    started_at, start = datetime.now(timezone.utc), time.monotonic()
+    engine = Engine(job=job)
+    if args.progress: engine.subscribe(show_progress)
+    table = engine.scan(path, refresh=args.refresh, workers=args.workers,
+                        use_cache=scan_cache.is_enabled() and not args.no_cache).table
+    # A tabela acabou de sair do disco (sem sessão, cada ficheiro teve um stat): não precisa de ser revalidada
+    snapshot = engine.save_snapshot(table, validate=False) if args.snapshot and table.complete else None
+    results, groups = collect_results(engine, table, args)
+    write_results(results, args.out, fmt)
+    plan_summary = run_retention(engine, table, groups, rules, args) if rules else None
+
+    totals = engine.summary(table)
+    found = results[results['result'] == "duplicate"]
+    summary = {
+        "host": socket.gethostname(),
+        "root": path,
+        "started_at": started_at.isoformat(),
+        "elapsed_seconds": round(time.monotonic() - start, 3),
+        "complete": table.complete and not job.cancelled,
+        "files": totals.files,
+        "directories": table.dir_count,
+        "total_bytes": totals.size,
+        "big_files": int((results['result'] == "big_file").sum()),
+        "old_files": int((results['result'] == "old_file").sum()),
+        "duplicate_groups": int(found['group_id'].nunique()),
+        "reclaimable_bytes": int(found.drop_duplicates('group_id')['reclaimable'].sum()) if len(found) else 0,
+        "output": os.path.abspath(args.out) if args.out else None,
+        "snapshot": snapshot.path if snapshot else None,
+        "retention": plan_summary,
+    }
+    summary_json = json.dumps(summary, ensure_ascii=False)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f: f.write(summary_json + "\n")
+    # Com --out, o stdout fica só para o resumo; sem --out, o stdout já leva os resultados
+    if args.out: print(summary_json)
+    else: logging.info(f"Resumo: {summary_json}")
+    return 0 if summary["complete"] else 3
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        return run_scan(args)
+    except Exception:
+        logging.critical("Erro fatal no modo de linha de comandos.", exc_info=True)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
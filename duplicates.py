@@ -0,0 +1,196 @@
+# duplicates.py
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import settings
+import hashing
+import hash_cache
+from hash_cache import HashCache
+from hashing import calculate_head_hash, calculate_quick_hash, calculate_full_hash
+from jobs import Job
+from scan_table import ScanTable, remap_rows
+
+# Bytes lidos pelas etapas parciais (ver hashing.calculate_head_hash e calculate_quick_hash)
+HEAD_BYTES = 4096
+SAMPLE_BYTES = 2 * hashing.CHUNK_SIZE
+
+# Cada etapa só recebe os candidatos que sobreviveram à anterior. O último valor é o
+# tamanho até ao qual o hash da etapa já cobre o ficheiro inteiro (não é preciso ir mais longe).
+STAGES: Tuple[Tuple[str, str, Callable[[str], Optional[str]], int], ...] = (
+    ("head", "cabeçalho 4 KiB", calculate_head_hash, HEAD_BYTES),
+    ("sample", "amostra início+fim", calculate_quick_hash, SAMPLE_BYTES),
+    ("full", "conteúdo completo", calculate_full_hash, -1),
+)
+
+def default_hash_workers() -> int:
+    """Threads de leitura/hash: 'hash_workers' no app_config.json ou um valor por omissão."""
+    configured = settings.get_setting("hash_workers")
+    if isinstance(configured, int) and configured > 0:
+        return configured
+    return min(16, (os.cpu_count() or 1) * 2)
+
+def _hash_candidates(pool: ThreadPoolExecutor, candidates: List[str], hash_func: Callable[[str], Optional[str]],
+                     cache: Optional[HashCache], stage: str, backend: str) -> Dict[str, Optional[str]]:
+    """Hash de cada candidato: primeiro da cache persistente, os restantes lidos em paralelo."""
+    if cache is None:
+        return dict(zip(candidates, pool.map(hash_func, candidates)))
+    keys = dict(zip(candidates, pool.map(hash_cache.file_key, candidates)))
+    cached = cache.lookup_many(stage, backend, {key for key in keys.values() if key})
+    digests: Dict[str, Optional[str]] = {path: cached.get(key) for path, key in keys.items() if key in cached}
+    missing = [path for path in candidates if path not in digests]
+    computed = dict(zip(missing, pool.map(hash_func, missing)))
+    cache.store_many(stage, backend, [(keys[path], digest) for path, digest in computed.items() if digest and keys[path]])
+    digests.update(computed)
+    if cached: logging.info(f"Cache de hashes ({stage}): {len(digests) - len(missing)} de {len(candidates)} reutilizados.")
+    return digests
+
+def _refine(groups: List[Tuple[int, List[str]]], digests: Dict[str, Optional[str]]) -> List[Tuple[int, List[str]]]:
+    """Parte cada grupo pelos hashes iguais e descarta os que ficam com um só ficheiro."""
+    refined = []
+    for size, paths in groups:
+        buckets: Dict[str, List[str]] = {}
+        for path in paths:
+            digest = digests[path]
+            if digest: buckets.setdefault(digest, []).append(path)
+        refined.extend((size, bucket) for bucket in buckets.values() if len(bucket) > 1)
+    return refined
+
+def find_duplicate_groups(paths_by_size: Dict[int, List[str]], workers: Optional[int] = None,
+                          backend: Optional[str] = None, verify: Optional[bool] = None,
+                          job: Optional[Job] = None) -> List[List[str]]:
+    """
+    Pipeline de deteção de duplicados: tamanho -> hash dos primeiros 4 KiB -> hash de
+    amostra (início+fim) -> hash do conteúdo completo. Cada etapa corre num pool de threads
+    (a leitura e o hashlib libertam o GIL) e só sobre os candidatos da etapa anterior.
+    Os grupos de ficheiros pequenos terminam assim que um hash cobre o ficheiro todo.
+    'backend' escolhe o algoritmo (ver hashing.HASH_BACKENDS); com 'verify' (ou "hash_verify"
+    no app_config.json) a confirmação final usa SHA-256.
+    Se 'job' for cancelado, devolve só os grupos já confirmados até esse momento.
+    """
+    backend = backend or hashing.default_backend()
+    if verify is None: verify = bool(settings.get_setting("hash_verify", False))
+    final_backend = hashing.VERIFY_BACKEND if verify else backend
+    pending = [(size, paths) for size, paths in paths_by_size.items() if len(paths) > 1]
+    confirmed: List[Tuple[int, List[str]]] = []
+    cache = hash_cache.open_cache()
+    try:
+        with ThreadPoolExecutor(max_workers=workers or default_hash_workers(), thread_name_prefix="hash") as pool:
+            for stage, stage_name, hash_func, covers_up_to in STAGES:
+                if not pending or (job is not None and not job.checkpoint()): break
+                # Se a verificação estiver ativa, nenhum grupo termina antes da etapa final em SHA-256
+                if verify and covers_up_to >= 0: covers_up_to = 0
+                stage_backend = final_backend if covers_up_to < 0 else backend
+                candidates = [path for _, paths in pending for path in paths]
+                digests = _hash_candidates(pool, candidates, partial(hash_func, backend=stage_backend, job=job),
+                                           cache, stage, stage_backend)
+                if job is not None and job.cancelled:
+                    logging.info(f"Duplicados: cancelado na etapa '{stage_name}'; {len(confirmed)} grupos confirmados.")
+                    pending = []
+                    break
+                pending = _refine(pending, digests)
+                logging.info(f"Duplicados, etapa '{stage_name}': {len(candidates)} candidatos -> {len(pending)} grupos.")
+                if covers_up_to >= 0:
+                    confirmed.extend(g for g in pending if g[0] <= covers_up_to)
+                    pending = [g for g in pending if g[0] > covers_up_to]
+    finally:
+        if cache is not None: cache.close()
+    confirmed.extend(pending)
+    confirmed.sort(key=lambda group: group[0])
+    return [paths for _, paths in confirmed]
+
+def find_duplicates(candidates: pd.DataFrame, workers: Optional[int] = None, backend: Optional[str] = None,
+                    verify: Optional[bool] = None, job: Optional[Job] = None) -> pd.DataFrame:
+    """
+    Deteção de duplicados sobre linhas de uma ScanTable (com 'path', 'size', 'dev', 'ino', 'nlink').
+    Ligações físicas para o mesmo inode são o mesmo ficheiro: só um caminho por inode passa pelo
+    pipeline de hashes e um grupo só é duplicado se tiver pelo menos dois inodes distintos.
+    Devolve uma linha por caminho com 'group_id', 'hardlink' (partilha o inode com outra linha do
+    grupo) e 'reclaimable': os bytes que o grupo liberta mantendo uma única cópia. Um inode com
+    ligações fora da varredura (nlink maior que os caminhos vistos) não liberta espaço ao ser apagado.
+    """
+    columns = list(candidates.columns) + ['group_id', 'hardlink', 'reclaimable']
+    if candidates.empty:
+        return pd.DataFrame(columns=columns)
+    candidates = candidates.assign(volume=volume_keys(candidates), inode_key=inode_keys(candidates))
+    representatives = candidates[~candidates.duplicated(['volume', 'inode_key'])]
+    representatives = representatives[representatives.duplicated('size', keep=False)]
+    skipped = len(candidates) - len(representatives)
+    if skipped: logging.info(f"Duplicados: {skipped} caminhos ignorados (ligações físicas ou tamanho único).")
+    paths_by_size = representatives.groupby('size')['path'].apply(list).to_dict()
+    groups = find_duplicate_groups(paths_by_size, workers=workers, backend=backend, verify=verify, job=job)
+    if not groups:
+        return pd.DataFrame(columns=columns)
+
+    group_of = {path: group_id for group_id, paths in enumerate(groups) for path in paths}
+    representatives = representatives.assign(group_id=representatives['path'].map(group_of))
+    representatives = representatives.dropna(subset=['group_id'])
+    result = candidates.reset_index().merge(representatives[['volume', 'inode_key', 'group_id']], on=['volume', 'inode_key'])
+    result['group_id'] = result['group_id'].astype(np.int64)
+    result = result.set_index(candidates.index.name or 'index').rename_axis(candidates.index.name)
+
+    return annotate_groups(result.drop(columns=['volume', 'inode_key']))
+
+def volume_keys(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Volume de cada linha: o 'dev' da varredura ou, onde ficou a 0 (o stat do DirEntry no Windows
+    não o traz), um código negativo da unidade do caminho. Dois ficheiros só podem ser o mesmo
+    inode, ou ligados um ao outro, se tiverem o mesmo volume.
+    """
+    dev = frame['dev'].to_numpy().astype(np.int64)
+    unknown = dev == 0
+    if unknown.any():
+        drives = frame['path'][unknown].map(lambda path: os.path.normcase(os.path.splitdrive(path)[0]))
+        dev[unknown] = -(pd.factorize(drives)[0] + 1)
+    return dev
+
+def inode_keys(frame: pd.DataFrame) -> np.ndarray:
+    """Identidade do inode por linha; sem inode conhecido (0), cada linha é um ficheiro independente."""
+    ino = frame['ino'].to_numpy().astype(np.int64)
+    return np.where(ino == 0, -np.arange(1, len(frame) + 1), ino)
+
+def annotate_groups(result: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recalcula 'hardlink' e 'reclaimable' de um resultado com 'group_id' e descarta os grupos que
+    já só têm um inode. Espaço recuperável por grupo: guarda-se um inode (de preferência um que
+    não se liberta) e contam-se os restantes que ficam sem ligações fora da varredura.
+    """
+    result = result.assign(volume=volume_keys(result), inode_key=inode_keys(result))
+    inodes = result.drop_duplicates(['group_id', 'volume', 'inode_key'])
+    inode_count = inodes.groupby('group_id').size()
+    result = result[result['group_id'].map(inode_count).to_numpy() > 1]
+    inodes = inodes[inodes['group_id'].map(inode_count).to_numpy() > 1]
+    links_seen = result.groupby(['group_id', 'volume', 'inode_key'])['path'].transform('size')
+    result = result.assign(hardlink=links_seen > 1)
+    freeable = (inodes['nlink'] <= links_seen.loc[inodes.index]).groupby(inodes['group_id']).sum()
+    inode_count = inode_count[inode_count > 1]
+    group_size = inodes.groupby('group_id')['size'].first()
+    reclaimable = group_size * (freeable - (freeable == inode_count).astype(np.int64))
+    result['reclaimable'] = result['group_id'].map(reclaimable).astype(np.int64)
+    return result.drop(columns=['volume', 'inode_key']).sort_values(['group_id', 'path'])
+
+def prune_removed(result: pd.DataFrame, remap: np.ndarray, table: Optional[ScanTable] = None) -> pd.DataFrame:
+    """
+    Atualiza os grupos depois de ScanTable.remove_files (e relink_files), sem voltar a ler ficheiros:
+    tira as linhas removidas, passa para os ids novos (com dev, ino e nlink atuais da tabela, se
+    indicada) e recalcula o espaço recuperável. Os grupos que ficam com uma só cópia deixam de ser duplicados.
+    """
+    if result is None or result.empty: return result
+    result = remap_rows(result, remap)
+    if table is not None and len(result):
+        ids = result.index.to_numpy()
+        result = result.assign(dev=table.dev.view()[ids], ino=table.ino.view()[ids], nlink=table.nlink.view()[ids])
+    return annotate_groups(result) if len(result) else result
+
+def emptied_groups(result: pd.DataFrame, file_ids) -> List[int]:
+    """Grupos em que remover 'file_ids' não deixaria nenhum caminho (e portanto nenhuma cópia)."""
+    if result is None or result.empty: return []
+    chosen = result.index.isin(np.asarray(list(file_ids), dtype=np.int64))
+    group_ids = result['group_id'].to_numpy()
+    left = pd.Series(~chosen).groupby(group_ids).sum()
+    return sorted(int(g) for g in np.unique(group_ids[chosen]) if left[g] == 0)
@@ -0,0 +1,439 @@
+# engine.py
+"""
+Motor de análise sem interface: percorre o disco, corre as análises em memória e devolve
+resultados tipados. Não conhece a aplicação Tk; quem quiser acompanhar o trabalho (a janela,
+a linha de comandos, um servidor) subscreve os eventos com Engine.subscribe.
+
+Eventos publicados (Event.kind -> Event.data):
+    scan_started   caminho da raiz
+    scan_progress  dicionário de progresso do scanner (ficheiros, bytes, ritmo, ETA, ...)
+    scan_partial   DataFrame das subpastas da raiz já encontradas (cerca de uma vez por segundo)
+    scan_done      ScanResult
+    directory      DirectoryView
+    duplicates     DuplicateGroups
+    old_files      FileSelection
+    big_files      FileSelection
+    snapshot_saved snapshots.SnapshotInfo
+    diff           snapshots.SnapshotDiff
+    report_saved   report.ReportResult
+    export_progress dicionário {'dataset', 'rows', 'total'} de exporters.export_datasets
+    export_saved   dicionário {conjunto de dados: ficheiro} dos ficheiros exportados
+    archive_progress dicionário {'phase', 'done', 'total', 'path'} de archiver (fases 'write', 'verify', 'delete')
+    archive_done   archiver.ArchiveResult
+    bulk_progress  dicionário {'done', 'total', 'bytes'} de bulk_actions.run_batch
+    bulk_done      BulkOutcome (a tabela já sem os ficheiros tratados)
+    undo_done      bulk_actions.UndoResult
+    retention_plan retention.RetentionPlan
+    cancelled      None (o trabalho foi cancelado; os resultados são parciais)
+Os eventos são entregues na thread que faz o trabalho: um subscritor com interface deve
+reencaminhá-los para a sua própria thread (por exemplo com app.post).
+"""
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import archiver
+import bulk_actions
+import duplicates
+import exporters
+import report
+import retention
+import scan_cache
+import scanner
+import snapshots
+import utils
+from jobs import Job
+from scan_table import ScanTable
+
+
+class Event(NamedTuple):
+    kind: str
+    data: object
+
+
+class StorageSummary(NamedTuple):
+    files: int
+    size: int       # bytes, cada inode com ligações físicas contado uma vez
+
+    @property
+    def average_size(self) -> float:
+        return self.size / self.files if self.files else 0.0
+
+
+class ScanResult(NamedTuple):
+    table: ScanTable
+    fresh: bool     # False quando a tabela veio da sessão, sem voltar ao disco
+
+    @property
+    def complete(self) -> bool:
+        return self.table.complete
+
+
+class DirectoryView(NamedTuple):
+    table: ScanTable
+    dir_id: int
+    files: pd.DataFrame     # ficheiros diretos da pasta, com 'path'
+    folders: pd.DataFrame   # subpastas com o tamanho recursivo
+    summary: StorageSummary
+
+
+class DuplicateGroups(NamedTuple):
+    frame: pd.DataFrame     # uma linha por caminho (ver duplicates.find_duplicates)
+    complete: bool          # False se o trabalho foi cancelado antes de confirmar todos os grupos
+
+    @property
+    def group_count(self) -> int:
+        return int(self.frame['group_id'].nunique()) if len(self.frame) else 0
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        if not len(self.frame): return 0
+        return int(self.frame.drop_duplicates('group_id')['reclaimable'].sum())
+
+    def groups(self) -> List[List[str]]:
+        return self.frame.groupby('group_id', sort=True)['path'].apply(list).tolist() if len(self.frame) else []
+
+
+class FileSelection(NamedTuple):
+    kind: str               # 'old_files' ou 'big_files'
+    frame: pd.DataFrame
+    parameter: int          # dias sem acesso ou número de ficheiros pedidos
+
+
+class BulkOutcome(NamedTuple):
+    batch: bulk_actions.BatchResult
+    table: ScanTable
+    remap: np.ndarray                   # id antigo -> id novo na tabela (ver ScanTable.remove_files)
+    duplicates: Optional[pd.DataFrame]  # grupos atualizados, se foram passados
+
+
+class AnalysisReport(NamedTuple):
+    scan: ScanResult
+    summary: StorageSummary
+    duplicates: Optional[DuplicateGroups]
+    old_files: Optional[FileSelection]
+    big_files: Optional[FileSelection]
+    cancelled: bool
+
+
+# --- Seleções em memória sobre uma ScanTable ---
+
+def duplicate_candidates(table: ScanTable, min_size: int = 1024) -> pd.DataFrame:
+    """Ficheiros acima de 'min_size' com tamanho repetido; só esses precisam do caminho completo."""
+    df = table.frame
+    candidates = df[df['size'] > min_size]
+    return table.with_paths(candidates[candidates.duplicated('size', keep=False)])
+
+def select_old_files(table: ScanTable, days: int, now: Optional[float] = None) -> pd.DataFrame:
+    """Ficheiros sem acesso há mais de 'days' dias, do mais antigo para o mais recente."""
+    df = table.frame
+    cutoff = (now if now is not None else time.time()) - (days * 86400)
+    return table.with_paths(df[df['atime'] < cutoff]).sort_values('atime', kind='stable')
+
+def select_big_files(table: ScanTable, top_n: int) -> pd.DataFrame:
+    return table.with_paths(table.frame.nlargest(top_n, 'size'))
+
+
+class Engine:
+    """
+    Uma instância por trabalho: 'job' (opcional) permite pausar e cancelar a varredura e os
+    hashes, e 'session' (opcional, scan_cache.SessionCache) reutiliza varreduras já feitas.
+    Todos os métodos devolvem o resultado e publicam-no também como evento.
+    """
+    def __init__(self, job: Optional[Job] = None, session: Optional[scan_cache.SessionCache] = None,
+                 partial_interval: float = 1.0):
+        self.job = job
+        self.session = session
+        self.partial_interval = partial_interval
+        self._subscribers: List[Callable[[Event], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job is not None and self.job.cancelled
+
+    # --- Eventos ---
+    def subscribe(self, callback: Callable[[Event], None]) -> Callable[[Event], None]:
+        with self._lock: self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Event], None]):
+        with self._lock:
+            if callback in self._subscribers: self._subscribers.remove(callback)
+
+    def emit(self, kind: str, data: object = None):
+        with self._lock: subscribers = list(self._subscribers)
+        event = Event(kind, data)
+        for callback in subscribers:
+            # Um subscritor com erro não pode interromper o trabalho nem os outros subscritores
+            try: callback(event)
+            except Exception: logging.error(f"Erro num subscritor do evento '{kind}'", exc_info=True)
+
+    def _scan_progress(self, table: ScanTable) -> Callable[[Dict], None]:
+        """Reencaminha o progresso do scanner e, a cada 'partial_interval' segundos, as maiores pastas já encontradas."""
+        last_partial = [time.monotonic()]
+
+        def publish(event: Dict):
+            self.emit("scan_progress", event)
+            now = time.monotonic()
+            if event["done"] or now - last_partial[0] < self.partial_interval: return
+            last_partial[0] = now
+            folders = table.dir_index.subfolders_frame(0)
+            self.emit("scan_partial", folders[folders['size'] > 0].reset_index(drop=True))
+
+        return publish
+
+    # --- Varredura ---
+    def scan(self, path: str, refresh: bool = False, workers: Optional[int] = None,
+             use_cache: Optional[bool] = None) -> ScanResult:
+        """
+        Tabela da raiz 'path': a da sessão, se houver uma completa, ou uma varredura nova (incremental
+        sobre a cache em disco, salvo 'refresh'). Uma varredura cancelada fica com table.complete False.
+        """
+        table = None if refresh or self.session is None else self.session.get(path)
+        # Uma varredura cancelada fica na sessão para consulta, mas as análises precisam da árvore completa
+        if table is not None and table.complete:
+            logging.info(f"A reutilizar a varredura da sessão de {path} ({len(table)} ficheiros).")
+            result = ScanResult(table, fresh=False)
+            self.emit("scan_done", result)
+            return result
+
+        logging.info(f"Iniciando varredura paralela em: {path}")
+        self.emit("scan_started", path)
+        use_cache = scan_cache.is_enabled() if use_cache is None else use_cache
+        # Se existir uma varredura anterior desta raiz em cache, só as pastas alteradas são relidas
+        previous = scan_cache.load(path) if use_cache and not refresh else None
+        table = ScanTable(path)
+        scanner.scan_tree(path, workers=workers, previous=previous, progress=self._scan_progress(table),
+                          table=table, job=self.job)
+        # Uma varredura parcial não vai para a cache em disco: a próxima incremental perderia as pastas em falta
+        if use_cache and table.complete: scan_cache.save(table)
+        logging.info(f"Varredura concluída. {len(table)} ficheiros em {table.dir_count} pastas.")
+        if self.session is not None: self.session.put(path, table)
+        result = ScanResult(table, fresh=True)
+        self.emit("scan_done", result)
+        return result
+
+    # --- Consultas e análises em memória ---
+    def summary(self, table: ScanTable, dir_id: int = 0) -> StorageSummary:
+        # Uma varredura cancelada antes de listar a raiz não tem pastas
+        if dir_id >= table.dir_count: return StorageSummary(0, 0)
+        totals = table.dir_index.totals(dir_id)
+        return StorageSummary(int(totals["files"]), int(totals["size"]))
+
+    def directory(self, table: ScanTable, dir_id: int = 0) -> DirectoryView:
+        """Ficheiros diretos, subpastas com o tamanho recursivo e resumo de uma pasta, sem voltar ao disco."""
+        if len(table):
+            files = table.with_paths(table.frame.iloc[table.directory_files(dir_id)])
+            folders = table.dir_index.subfolders_frame(dir_id)
+            folders = folders[folders['size'] > 0].reset_index(drop=True)
+        else:
+            files, folders = pd.DataFrame(), pd.DataFrame()
+        view = DirectoryView(table, dir_id, files, folders, self.summary(table, dir_id))
+        self.emit("directory", view)
+        return view
+
+    def find_duplicates(self, table: ScanTable, workers: Optional[int] = None, backend: Optional[str] = None,
+                        verify: Optional[bool] = None, min_size: int = 1024) -> DuplicateGroups:
+        if not len(table):
+            logging.warning("Tabela vazia passada para a análise de duplicados. A ignorar.")
+            result = DuplicateGroups(pd.DataFrame(), complete=True)
+        else:
+            logging.info("Iniciando análise de duplicados em memória.")
+            frame = duplicates.find_duplicates(duplicate_candidates(table, min_size), workers=workers,
+                                               backend=backend, verify=verify, job=self.job)
+            result = DuplicateGroups(frame, complete=not self.cancelled)
+        self.emit("duplicates", result)
+        return result
+
+    def old_files(self, table: ScanTable, days: int, now: Optional[float] = None) -> FileSelection:
+        if not len(table):
+            logging.warning("Tabela vazia passada para a análise de ficheiros antigos. A ignorar.")
+            frame = pd.DataFrame()
+        else:
+            logging.info(f"Iniciando análise de ficheiros com mais de {days} dias em memória.")
+            frame = select_old_files(table, days, now)
+        result = FileSelection("old_files", frame, days)
+        self.emit("old_files", result)
+        return result
+
+    def big_files(self, table: ScanTable, top_n: int) -> FileSelection:
+        if not len(table):
+            logging.warning("Tabela vazia passada para a análise dos maiores ficheiros. A ignorar.")
+            frame = pd.DataFrame()
+        else:
+            logging.info(f"Iniciando análise dos {top_n} maiores ficheiros em memória.")
+            frame = select_big_files(table, top_n)
+        result = FileSelection("big_files", frame, top_n)
+        self.emit("big_files", result)
+        return result
+
+    # --- Instantâneos ---
+    def validated(self, table: ScanTable) -> ScanTable:
+        """
+        A árvore de 'table' relida do disco agora: incremental sobre ela (só as pastas alteradas são
+        listadas, mas cada ficheiro recebe um stat), para os instantâneos verem os ficheiros que
+        cresceram no sítio desde a varredura mostrada. Publica só 'scan_progress'; a sessão não muda.
+        """
+        fresh = ScanTable(table.root)
+        scanner.scan_tree(table.root, previous=table, progress=lambda event: self.emit("scan_progress", event),
+                          table=fresh, job=self.job, validate_files=True)
+        return fresh
+
+    def save_snapshot(self, table: ScanTable, validate: bool = True) -> Optional[snapshots.SnapshotInfo]:
+        """Grava um instantâneo da raiz de 'table' (revalidada no disco, salvo 'validate' False); None se for cancelado."""
+        if validate: table = self.validated(table)
+        if self.cancelled:
+            self.emit("cancelled")
+            return None
+        info = snapshots.save_snapshot(table)
+        self.emit("snapshot_saved", info)
+        return info
+
+    def diff(self, old: snapshots.SnapshotInfo, table: ScanTable, validate: bool = True) -> Optional[snapshots.SnapshotDiff]:
+        """O que mudou entre o instantâneo 'old' e a raiz de 'table' tal como está agora no disco (ver validated)."""
+        if validate: table = self.validated(table)
+        if self.cancelled:
+            self.emit("cancelled")
+            return None
+        logging.info(f"A comparar {table.root} com o instantâneo {old.path}.")
+        result = snapshots.diff_tables(snapshots.load_snapshot(old.path), table, old_taken_at=old.taken_at)
+        self.emit("diff", result)
+        return result
+
+    # --- Relatório ---
+    def export_report(self, table: ScanTable, output_path: str, dir_id: int = 0, duplicates: Optional[pd.DataFrame] = None,
+                      chart_image_path: Optional[str] = None, top_n: int = report.DEFAULT_TOP_N,
+                      max_pages: Optional[int] = None, attachment: bool = True) -> report.ReportResult:
+        """
+        Relatório PDF da pasta 'dir_id' a partir das secções agregadas, com no máximo 'max_pages'
+        páginas; com 'attachment', a listagem completa vai para um ficheiro colunar ao lado do PDF.
+        """
+        sections = report.build_sections(table, dir_id, utils.default_category_map(), duplicates, top_n)
+        attachment_path = None
+        if attachment:
+            attachment_path = report.attachment_path_for(output_path)
+            rows = report.write_attachment(table, attachment_path, dir_id, should_continue=self.job_checkpoint)
+            if rows is None: attachment_path = None
+            else: logging.info(f"Anexo do relatório com {rows} ficheiros gravado em {attachment_path}.")
+        result = report.write_pdf(sections, output_path, chart_image_path, attachment_path, max_pages)
+        logging.info(f"Relatório gravado em {output_path} ({result.pages} páginas).")
+        self.emit("report_saved", result)
+        return result
+
+    # --- Exportação de dados ---
+    def export_data(self, table: ScanTable, base_path: str, fmt: Optional[str] = None, dir_id: int = 0,
+                    duplicates: Optional[pd.DataFrame] = None, old_files: Optional[pd.DataFrame] = None,
+                    big_files: Optional[pd.DataFrame] = None) -> Dict[str, str]:
+        """
+        Exporta a varredura e os resultados por blocos (ver exporters.export_datasets), publicando
+        'export_progress' ({'dataset', 'rows', 'total'}) e, no fim, 'export_saved' ({conjunto: ficheiro}).
+        """
+        def progress(dataset: str, rows: int, total: int):
+            self.emit("export_progress", {"dataset": dataset, "rows": rows, "total": total})
+        written = exporters.export_datasets(table, base_path, fmt, dir_id, duplicates, old_files, big_files,
+                                            progress=progress, should_continue=self.job_checkpoint)
+        self.emit("export_saved", written)
+        if self.cancelled: self.emit("cancelled")
+        return written
+
+    # --- Arquivamento ---
+    def archive(self, paths: List[str], target: str, fmt: Optional[str] = None, delete: bool = True,
+                resume: bool = False, workers: Optional[int] = None) -> archiver.ArchiveResult:
+        """
+        Comprime 'paths' para 'target', verifica o arquivo e apaga os originais verificados (ver
+        archiver.py). Com 'resume', continua o trabalho interrompido registado no diário de 'target'.
+        """
+        def progress(event: Dict):
+            self.emit("archive_progress", event)
+        if resume: result = archiver.resume_archive(target, workers, delete, self.job, progress)
+        else: result = archiver.archive_files(paths, target, fmt, workers=workers, delete=delete, job=self.job, progress=progress)
+        self.emit("archive_done", result)
+        if self.cancelled: self.emit("cancelled")
+        return result
+
+    # --- Ações em massa ---
+    def bulk_action(self, table: ScanTable, rows: pd.DataFrame, action: str = "trash",
+                    groups: Optional[pd.DataFrame] = None, links: Optional[pd.DataFrame] = None) -> BulkOutcome:
+        """
+        Apaga ou move para a reciclagem os ficheiros de 'rows' (linhas de um resultado, indexadas pelo
+        id na tabela e com 'path') e atualiza a tabela e os grupos de duplicados 'groups' em memória,
+        sem nova varredura. As linhas de 'links' (mesmo índice, com 'keep_id' e 'keep_path') ficam no
+        lugar como ligações físicas para a cópia guardada. Os lotes da reciclagem mais antigos que o
+        prazo de retenção são esvaziados.
+        """
+        def progress(event: Dict):
+            self.emit("bulk_progress", event)
+        if action == "trash": bulk_actions.purge_expired()
+        link_targets = dict(zip(links.index.tolist(), links['keep_path'])) if links is not None else None
+        batch = bulk_actions.run_batch(table, rows.index, action, job=self.job, progress=progress,
+                                       expected_paths=dict(zip(rows.index.tolist(), rows['path'])),
+                                       link_targets=link_targets)
+        if len(batch.linked):
+            table.relink_files(batch.linked, links.loc[batch.linked, 'keep_id'].to_numpy(), unlinked=action == "delete")
+        remap = table.remove_files(np.setdiff1d(batch.file_ids, batch.linked), unlinked=action == "delete")
+        pruned = duplicates.prune_removed(groups, remap, table) if groups is not None else None
+        outcome = BulkOutcome(batch, table, remap, pruned)
+        self.emit("bulk_done", outcome)
+        if self.cancelled: self.emit("cancelled")
+        return outcome
+
+    # --- Políticas de retenção ---
+    def retention_plan(self, groups: pd.DataFrame, rules: List[retention.Rule], mode: str = "delete") -> retention.RetentionPlan:
+        """Avalia as regras sobre todos os grupos de duplicados de uma vez (ver retention.build_plan)."""
+        started = time.perf_counter()
+        plan = retention.build_plan(groups, rules, mode)
+        logging.info(f"Plano de retenção ({retention.describe(plan.rules)}, {mode}): {len(plan.actions())} ficheiros, "
+                     f"{plan.reclaimable_bytes / (1024**2):,.1f} MB recuperáveis, em {time.perf_counter() - started:.2f} s.")
+        self.emit("retention_plan", plan)
+        return plan
+
+    def export_plan(self, plan: retention.RetentionPlan, path: str, fmt: Optional[str] = None) -> Dict[str, str]:
+        """Grava o plano (uma linha por caminho, ver exporters.PLAN_COLUMNS) e publica 'export_saved' ({'plan': ficheiro})."""
+        rows = exporters.write_chunks(exporters.frame_chunks(exporters.plan_frame(plan.frame)), path, fmt,
+                                      exporters.PLAN_COLUMNS, should_continue=self.job_checkpoint)
+        written = {"plan": path} if rows is not None else {}
+        self.emit("export_saved", written)
+        if self.cancelled: self.emit("cancelled")
+        return written
+
+    def apply_plan(self, table: ScanTable, plan: retention.RetentionPlan, action: str = "trash",
+                   groups: Optional[pd.DataFrame] = None) -> BulkOutcome:
+        """Executa o plano num só lote: as cópias a tratar são apagadas ('delete'/'trash') ou, num plano 'hardlink', ligadas à guardada."""
+        rows = plan.actions()
+        links = rows[rows['action'] == "hardlink"] if plan.mode == "hardlink" else None
+        return self.bulk_action(table, rows, action, groups, links)
+
+    def undo_batch(self, batch_id: str) -> bulk_actions.UndoResult:
+        """Repõe um lote da reciclagem; a varredura da raiz na sessão deixa de valer (os ficheiros voltaram)."""
+        result = bulk_actions.undo_batch(batch_id, job=self.job,
+                                         progress=lambda event: self.emit("bulk_progress", event))
+        if result.restored and self.session is not None: self.session.invalidate(result.root)
+        self.emit("undo_done", result)
+        return result
+
+    def job_checkpoint(self) -> bool:
+        """Espera enquanto o trabalho estiver em pausa; False se foi cancelado."""
+        return self.job is None or self.job.checkpoint()
+
+    def run(self, path: str, analyses: Dict[str, bool], params: Dict) -> AnalysisReport:
+        """
+        Percorre o disco UMA VEZ (ou reutiliza a sessão) e corre as análises pedidas em 'analyses'
+        ('duplicates', 'old_files', 'big_files') com os parâmetros de 'params' ('refresh',
+        'scan_workers', 'hash_workers', 'hash_backend', 'hash_verify', 'days_old', 'top_n').
+        Se o trabalho for cancelado, as análises que faltam não chegam a correr.
+        """
+        scan = self.scan(path, refresh=bool(params.get("refresh")), workers=params.get("scan_workers"))
+        # A vista geral só é refeita quando há dados novos ou quando é pedida só a varredura
+        if scan.fresh or not any(analyses.values()): self.directory(scan.table, 0)
+        run = {} if self.cancelled else analyses
+        found = self.find_duplicates(scan.table, workers=params.get("hash_workers"), backend=params.get("hash_backend"),
+                                     verify=params.get("hash_verify")) if run.get("duplicates") else None
+        old = self.old_files(scan.table, params.get("days_old", 180)) if run.get("old_files") else None
+        big = self.big_files(scan.table, params.get("top_n", 50)) if run.get("big_files") else None
+        if self.cancelled: self.emit("cancelled")
+        return AnalysisReport(scan, self.summary(scan.table), found, old, big, self.cancelled)
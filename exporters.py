@@ -0,0 +1,215 @@
+# exporters.py
+"""
+Exportação dos resultados para Parquet (pyarrow), CSV e JSON Lines, por blocos: cada conjunto de
+dados é produzido em DataFrames de 'chunk_rows' linhas (os caminhos só são montados para o bloco
+em escrita) e acrescentado ao ficheiro, por isso a memória usada não depende do tamanho da
+varredura e não há o limite de linhas do Excel. Os ficheiros são escritos com um nome temporário
+e só substituem o destino quando ficam completos.
+"""
+import os
+import io
+import sys
+import gzip
+import logging
+import importlib.util
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scan_table import ScanTable
+
+FORMATS = ("parquet", "csv", "jsonl")
+CHUNK_ROWS = 200_000
+
+# Esquemas normalizados de cada conjunto de dados (uma linha por ficheiro/pasta)
+FILE_COLUMNS = ['path', 'name', 'size', 'mtime', 'atime', 'ext']
+FOLDER_COLUMNS = ['path', 'depth', 'files', 'size', 'newest_mtime']
+DUPLICATE_COLUMNS = ['group_id', 'path', 'size', 'hardlink', 'reclaimable']
+PLAN_COLUMNS = ['group_id', 'action', 'path', 'size', 'keep_path', 'reclaimable']
+
+# Progresso: (conjunto de dados, linhas escritas, linhas no total)
+Progress = Callable[[str, int, int], None]
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def format_for_path(path: Optional[str], requested: Optional[str] = None) -> str:
+    """Formato pedido ou deduzido da extensão ('.csv.gz' é CSV comprimido); por omissão, JSON Lines."""
+    if requested: return requested
+    name = (path or "").lower()
+    if name.endswith(".gz"): name = name[:-3]
+    ext = os.path.splitext(name)[1]
+    return {".parquet": "parquet", ".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl"}.get(ext, "jsonl")
+
+
+class ChunkWriter:
+    """
+    Escritor incremental de um ficheiro (ou do stdout, com path None, para CSV e JSON Lines).
+    O Parquet é escrito como um grupo de linhas por bloco, com o esquema do primeiro bloco.
+    """
+    def __init__(self, path: Optional[str], fmt: Optional[str] = None, columns: Optional[List[str]] = None):
+        self.path, self.fmt, self.columns = path, format_for_path(path, fmt), columns
+        if self.fmt == "parquet" and not path: raise ValueError("O formato Parquet precisa de um ficheiro de destino.")
+        if self.fmt == "parquet" and not parquet_available():
+            raise RuntimeError("O formato Parquet precisa do pacote 'pyarrow'.")
+        self.rows = 0
+        self._tmp_path = f"{path}.tmp" if path else None
+        self._handle = None
+        self._parquet = None
+        self._closed = False
+
+    def __enter__(self): return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(discard=exc_type is not None)
+
+    def _open_text(self):
+        if self.path is None: return sys.stdout
+        if self.path.lower().endswith(".gz"): return io.TextIOWrapper(gzip.open(self._tmp_path, 'wb'), encoding='utf-8', newline='')
+        return open(self._tmp_path, 'w', encoding='utf-8', newline='')
+
+    def write(self, chunk: pd.DataFrame):
+        if not len(chunk): return
+        if self.columns is not None: chunk = chunk.reindex(columns=self.columns)
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet is None:
+                batch = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._parquet = pq.ParquetWriter(self._tmp_path, batch.schema, compression='zstd')
+            else:
+                batch = pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(batch)
+        else:
+            if self._handle is None: self._handle = self._open_text()
+            if self.fmt == "csv":
+                chunk.to_csv(self._handle, header=self.rows == 0, index=False)
+            else:
+                text = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+                self._handle.write(text if text.endswith("\n") else text + "\n")
+        self.rows += len(chunk)
+
+    def close(self, discard: bool = False):
+        """Fecha o ficheiro; sem erros, o temporário passa a ser o destino, senão é apagado."""
+        if self._closed: return
+        self._closed = True
+        if self.fmt == "parquet":
+            if self._parquet is None and not discard:
+                empty = pd.DataFrame(columns=self.columns or [])
+                empty.to_parquet(self._tmp_path, index=False)
+            elif self._parquet is not None:
+                self._parquet.close()
+        else:
+            if self._handle is None and not discard:
+                self._handle = self._open_text()
+                if self.fmt == "csv" and self.columns: self._handle.write(",".join(self.columns) + "\n")
+            if self._handle is not None and self._handle is not sys.stdout: self._handle.close()
+            elif self._handle is sys.stdout: sys.stdout.flush()
+        self._handle = self._parquet = None
+        if self._tmp_path is None: return
+        if discard:
+            if os.path.exists(self._tmp_path): os.remove(self._tmp_path)
+        else:
+            os.replace(self._tmp_path, self.path)
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], path: Optional[str], fmt: Optional[str] = None,
+                 columns: Optional[List[str]] = None, progress: Optional[Callable[[int], None]] = None,
+                 should_continue: Optional[Callable[[], bool]] = None) -> Optional[int]:
+    """
+    Escreve todos os blocos num ficheiro; devolve o número de linhas, ou None se 'should_continue'
+    pedir para parar (nesse caso o ficheiro incompleto é descartado e o destino fica como estava).
+    """
+    with ChunkWriter(path, fmt, columns) as writer:
+        for chunk in chunks:
+            if should_continue is not None and not should_continue():
+                writer.close(discard=True)
+                return None
+            writer.write(chunk)
+            if progress is not None: progress(writer.rows)
+    return writer.rows
+
+
+# --- Conjuntos de dados ---
+
+def frame_chunks(dataframe: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(dataframe), chunk_rows):
+        yield dataframe.iloc[start:start + chunk_rows]
+
+def file_rows(table: ScanTable, dir_id: int = 0) -> np.ndarray:
+    """Linhas dos ficheiros da pasta 'dir_id' e de todas as subpastas."""
+    if not len(table): return np.zeros(0, dtype=np.int64)
+    if dir_id == 0: return np.arange(len(table))
+    return np.flatnonzero(table.dir_index.subtree_mask(dir_id)[table.file_dir.view()])
+
+def file_chunks(table: ScanTable, dir_id: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Listagem completa de ficheiros por blocos, com o caminho montado só para cada bloco."""
+    positions, frame = file_rows(table, dir_id), table.frame
+    for start in range(0, len(positions), chunk_rows):
+        chunk = table.with_paths(frame.iloc[positions[start:start + chunk_rows]])
+        yield chunk.assign(ext=chunk['ext'].astype(str))[FILE_COLUMNS]
+
+def folder_frame(table: ScanTable, dir_id: int = 0) -> pd.DataFrame:
+    """Uma linha por pasta com os totais recursivos (o índice já conta cada inode uma só vez)."""
+    index = table.dir_index
+    ids = np.flatnonzero(index.subtree_mask(dir_id)) if table.dir_count else np.zeros(0, dtype=np.int64)
+    return pd.DataFrame({
+        'path': pd.Series([index.dir_paths[i] for i in ids], dtype=object),
+        'depth': table.dir_depth.view()[ids],
+        'files': index.file_count[ids],
+        'size': index.total_size[ids],
+        'newest_mtime': index.newest_mtime[ids],
+    })
+
+def duplicate_frame(duplicates: pd.DataFrame) -> pd.DataFrame:
+    """Esquema normalizado dos duplicados: uma linha por caminho, agrupada por 'group_id'."""
+    if duplicates is None or duplicates.empty: return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    return duplicates.reindex(columns=DUPLICATE_COLUMNS).reset_index(drop=True)
+
+def plan_frame(plan: pd.DataFrame) -> pd.DataFrame:
+    """Esquema normalizado de um plano de retenção (ver retention.build_plan): uma linha por caminho."""
+    if plan is None or plan.empty: return pd.DataFrame(columns=PLAN_COLUMNS)
+    return plan.reindex(columns=PLAN_COLUMNS).reset_index(drop=True)
+
+def dataset_path(base_path: str, dataset: str, fmt: str) -> str:
+    """'/x/export.parquet' + 'duplicates' -> '/x/export_duplicates.parquet' (mantém '.csv.gz')."""
+    base = base_path[:-3] if base_path.lower().endswith(".gz") else base_path
+    base = os.path.splitext(base)[0]
+    ext = {"parquet": ".parquet", "csv": ".csv", "jsonl": ".jsonl"}[fmt]
+    return f"{base}_{dataset}{ext}" + (".gz" if base_path.lower().endswith(".gz") and fmt != "parquet" else "")
+
+def export_datasets(table: ScanTable, base_path: str, fmt: Optional[str] = None, dir_id: int = 0,
+                    duplicates: Optional[pd.DataFrame] = None, old_files: Optional[pd.DataFrame] = None,
+                    big_files: Optional[pd.DataFrame] = None, progress: Optional[Progress] = None,
+                    should_continue: Optional[Callable[[], bool]] = None,
+                    chunk_rows: int = CHUNK_ROWS) -> Dict[str, str]:
+    """
+    Exporta a varredura ('files' e 'folders') e os resultados das análises que existirem
+    ('duplicates', 'old_files', 'big_files'), um ficheiro por conjunto ao lado de 'base_path'.
+    Devolve {conjunto: ficheiro} dos que ficaram completos.
+    """
+    fmt = format_for_path(base_path, fmt)
+    folders = folder_frame(table, dir_id)
+    datasets = [("files", lambda: file_chunks(table, dir_id, chunk_rows), FILE_COLUMNS, len(file_rows(table, dir_id))),
+                ("folders", lambda: frame_chunks(folders, chunk_rows), FOLDER_COLUMNS, len(folders))]
+    if duplicates is not None and not duplicates.empty:
+        normalized = duplicate_frame(duplicates)
+        datasets.append(("duplicates", lambda: frame_chunks(normalized, chunk_rows), DUPLICATE_COLUMNS, len(normalized)))
+    for name, frame in (("old_files", old_files), ("big_files", big_files)):
+        if frame is not None and not frame.empty:
+            rows = frame.assign(ext=frame['ext'].astype(str)) if 'ext' in frame.columns else frame
+            datasets.append((name, lambda rows=rows: frame_chunks(rows, chunk_rows), [c for c in FILE_COLUMNS if c in rows.columns], len(rows)))
+
+    written: Dict[str, str] = {}
+    for name, chunks, columns, total in datasets:
+        path = dataset_path(base_path, name, fmt)
+        report = (lambda rows, name=name, total=total: progress(name, rows, total)) if progress else None
+        rows = write_chunks(chunks(), path, fmt, columns, report, should_continue)
+        if rows is None:
+            logging.info(f"Exportação cancelada em '{name}'.")
+            break
+        logging.info(f"Exportados {rows} registos de '{name}' para {path}.")
+        written[name] = path
+    return written
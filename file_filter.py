@@ -0,0 +1,126 @@
+# file_filter.py
+import os
+import logging
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Um texto com separador de pastas pode atravessar a fronteira pasta/nome e precisa do caminho completo
+_SEPARATORS = tuple({os.sep, os.altsep or os.sep, "/"})
+
+def _contains(values: np.ndarray, text: str, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """Máscara de 'text in v' para cada valor (ou só para as posições True de 'candidates')."""
+    hits = np.zeros(len(values), dtype=bool)
+    positions = np.flatnonzero(candidates) if candidates is not None else np.arange(len(values))
+    hits[positions] = np.fromiter((text in values[i] for i in positions), dtype=bool, count=len(positions))
+    return hits
+
+
+class FilterIndex:
+    """
+    Índices pré-calculados sobre um DataFrame de ficheiros/pastas (colunas 'path', 'name', 'size', 'ext')
+    para filtrar sem voltar a percorrer o texto de todas as linhas:
+    - texto: caminhos em minúsculas codificados em dicionário (pasta-mãe + nome). Cada pesquisa só
+      testa as pastas e os nomes distintos, e uma pesquisa que estende a anterior (mais uma letra)
+      só volta a testar os que já correspondiam;
+    - tamanho: índice ordenado, pesquisado por bisseção (searchsorted);
+    - extensão: códigos categóricos, filtrados com uma tabela de consulta.
+    Não é seguro para uso simultâneo: as pesquisas devem vir sempre da mesma thread.
+    """
+    def __init__(self, dataframe: pd.DataFrame):
+        self.frame = dataframe
+        count = len(dataframe)
+        names = dataframe['name'].astype(str).str.lower().to_numpy() if count else np.array([], dtype=object)
+        paths = dataframe['path'].astype(str).str.lower().to_numpy() if count else np.array([], dtype=object)
+        self._paths = paths
+        parents = np.array([path[:len(path) - len(name)] if path.endswith(name) else path
+                            for path, name in zip(paths, names)], dtype=object)
+        self._name_codes, self._names = pd.factorize(names)
+        self._parent_codes, self._parents = pd.factorize(parents)
+        self._names, self._parents = np.asarray(self._names, dtype=object), np.asarray(self._parents, dtype=object)
+
+        sizes = dataframe['size'].to_numpy(dtype=np.float64) if count else np.array([], dtype=np.float64)
+        self._size_order = np.argsort(sizes, kind='stable')
+        self._sorted_sizes = sizes[self._size_order]
+
+        exts = dataframe['ext'].astype(str).str.lower() if 'ext' in dataframe.columns and count else pd.Series([], dtype=object)
+        self._ext_codes, self._exts = pd.factorize(exts)
+        self._last_text, self._last_name_hits, self._last_parent_hits = "", None, None
+
+    def __len__(self): return len(self.frame)
+
+    def text_mask(self, text: str) -> np.ndarray:
+        text = text.lower()
+        if not text: return np.ones(len(self), dtype=bool)
+        narrowing = self._last_text and self._last_text in text
+        name_hits = _contains(self._names, text, self._last_name_hits if narrowing else None)
+        parent_hits = _contains(self._parents, text, self._last_parent_hits if narrowing else None)
+        self._last_text, self._last_name_hits, self._last_parent_hits = text, name_hits, parent_hits
+        mask = name_hits[self._name_codes] | parent_hits[self._parent_codes]
+        if any(sep in text for sep in _SEPARATORS):
+            mask |= _contains(self._paths, text, ~mask)
+        return mask
+
+    def size_mask(self, min_size: float = 0, max_size: float = float('inf')) -> np.ndarray:
+        low = np.searchsorted(self._sorted_sizes, min_size, side='left') if min_size > 0 else 0
+        high = np.searchsorted(self._sorted_sizes, max_size, side='right') if max_size != float('inf') else len(self)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self._size_order[low:high]] = True
+        return mask
+
+    def ext_mask(self, exts: Iterable[str]) -> np.ndarray:
+        allowed = np.isin(np.asarray(self._exts, dtype=object), [ext.lower() for ext in exts])
+        return allowed[self._ext_codes] if len(self) else np.zeros(0, dtype=bool)
+
+    def filter(self, text: str = "", min_size: float = 0, max_size: float = float('inf'),
+               exts: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Linhas que cumprem todos os critérios (os mesmos de apply_filters: texto no caminho, tamanho entre limites, extensão)."""
+        if not len(self): return self.frame
+        mask = np.ones(len(self), dtype=bool)
+        if min_size > 0 or max_size != float('inf'): mask &= self.size_mask(min_size, max_size)
+        if exts: mask &= self.ext_mask(exts)
+        if text: mask &= self.text_mask(text)
+        return self.frame[mask]
+
+
+class BackgroundFilter:
+    """
+    Corre os filtros numa thread própria, sempre a mais recente: um pedido novo substitui o que
+    ainda estiver à espera, e os resultados de pedidos ultrapassados são descartados.
+    O índice de cada DataFrame é construído uma vez, na mesma thread, no primeiro filtro.
+    """
+    def __init__(self, on_result):
+        self._on_result = on_result
+        self._cond = threading.Condition()
+        self._request = None
+        self._generation = 0
+        self._index: Optional[FilterIndex] = None
+        self._thread = threading.Thread(target=self._run, name="list-filter", daemon=True)
+        self._thread.start()
+
+    def submit(self, dataframe: pd.DataFrame, **criteria) -> int:
+        with self._cond:
+            self._generation += 1
+            self._request = (self._generation, dataframe, criteria)
+            self._cond.notify()
+            return self._generation
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None: self._cond.wait()
+                generation, dataframe, criteria = self._request
+                self._request = None
+            try:
+                if self._index is None or self._index.frame is not dataframe:
+                    self._index = FilterIndex(dataframe)
+                result = self._index.filter(**criteria)
+            except Exception:
+                logging.error("Erro ao filtrar a lista de ficheiros", exc_info=True)
+                continue
+            if self.is_current(generation): self._on_result(generation, result)
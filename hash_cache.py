@@ -0,0 +1,106 @@
+# hash_cache.py
+import os
+import time
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import settings
+
+CACHE_FILE_NAME = "hash_cache.db"
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# (st_dev, st_ino, st_size, st_mtime_ns): se algum mudar, o conteúdo pode ter mudado
+FileKey = Tuple[int, int, int, int]
+
+def is_enabled() -> bool:
+    return bool(settings.get_setting("hash_cache", True))
+
+def cache_path() -> str:
+    """Base de dados da cache, ao lado do app_config.json."""
+    return os.path.join(os.path.dirname(os.path.abspath(settings.CONFIG_FILE)), CACHE_FILE_NAME)
+
+def _signed(value: int) -> int:
+    # O SQLite só guarda inteiros de 64 bits com sinal; st_ino/st_dev podem usar o bit mais alto
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def file_key(path: str) -> Optional[FileKey]:
+    """Chave de cache de um ficheiro, ou None se não for possível identificá-lo de forma estável."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not st.st_ino:  # sistemas de ficheiros sem inode estável
+        return None
+    return (_signed(st.st_dev), _signed(st.st_ino), st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """
+    Cache persistente de hashes de conteúdo, partilhada entre sessões (SQLite em modo WAL).
+    Cada entrada é identificada pela chave do ficheiro, pela etapa (head/sample/full) e pelo
+    algoritmo. Quando passa de 'max_entries', as entradas usadas há mais tempo são removidas.
+    """
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.get_setting("hash_cache_max_entries", DEFAULT_MAX_ENTRIES)
+        self._conn = sqlite3.connect(path or cache_path(), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                stage TEXT, backend TEXT, digest TEXT NOT NULL, last_used INTEGER NOT NULL,
+                PRIMARY KEY (dev, ino, size, mtime_ns, stage, backend)
+            ) WITHOUT ROWID""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)")
+
+    def __enter__(self) -> 'HashCache':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def lookup_many(self, stage: str, backend: str, keys: Iterable[FileKey]) -> Dict[FileKey, str]:
+        found: Dict[FileKey, str] = {}
+        query = "SELECT digest FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND stage=? AND backend=?"
+        for key in keys:
+            row = self._conn.execute(query, (*key, stage, backend)).fetchone()
+            if row: found[key] = row[0]
+        if found:
+            now = int(time.time())
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE hashes SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND stage=? AND backend=?",
+                    [(now, *key, stage, backend) for key in found])
+        return found
+
+    def store_many(self, stage: str, backend: str, items: List[Tuple[FileKey, str]]):
+        if not items: return
+        now = int(time.time())
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(*key, stage, backend, digest, now) for key, digest in items])
+        self._evict()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()
+        if count <= self.max_entries: return
+        # Remove um pouco mais do que o excesso para não repetir a limpeza a cada lote
+        excess = count - int(self.max_entries * 0.9)
+        with self._conn:
+            self._conn.execute("DELETE FROM hashes WHERE (dev, ino, size, mtime_ns, stage, backend) IN "
+                               "(SELECT dev, ino, size, mtime_ns, stage, backend FROM hashes ORDER BY last_used LIMIT ?)", (excess,))
+        logging.info(f"Cache de hashes: {excess} entradas antigas removidas.")
+
+
+def open_cache() -> Optional[HashCache]:
+    """Abre a cache partilhada se estiver ativa; um erro na base de dados só desativa a cache."""
+    if not is_enabled(): return None
+    try:
+        return HashCache()
+    except sqlite3.Error as e:
+        logging.warning(f"Cache de hashes indisponível ({cache_path()}): {e}")
+        return None
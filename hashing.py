@@ -0,0 +1,113 @@
+# hashing.py
+import os
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import settings
+from jobs import Job, JobCancelled
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Algoritmos disponíveis. O blake2b com resumo de 16 bytes é rápido e vem sempre com o Python;
+# o xxh3 (pacote opcional 'xxhash') é ainda mais rápido; o sha256 é o modo "verificar".
+HASH_BACKENDS: Dict[str, Callable] = {
+    "blake2b": lambda: hashlib.blake2b(digest_size=16),
+    "sha256": hashlib.sha256,
+}
+if xxhash is not None:
+    HASH_BACKENDS["xxh3"] = xxhash.xxh3_128
+
+VERIFY_BACKEND = "sha256"
+
+def default_backend() -> str:
+    """'hash_backend' do app_config.json, senão xxh3 se estiver instalado, senão blake2b."""
+    configured = settings.get_setting("hash_backend")
+    if configured in HASH_BACKENDS:
+        return configured
+    if configured:
+        logging.warning(f"Algoritmo de hash '{configured}' indisponível. A usar o padrão.")
+    return "xxh3" if "xxh3" in HASH_BACKENDS else "blake2b"
+
+def new_hasher(backend: Optional[str] = None):
+    return HASH_BACKENDS[backend or default_backend()]()
+
+# Um buffer de leitura por thread, reutilizado com readinto() em vez de criar um bytes por bloco
+_buffers = threading.local()
+
+def _read_buffer() -> memoryview:
+    view = getattr(_buffers, "view", None)
+    if view is None:
+        view = _buffers.view = memoryview(bytearray(CHUNK_SIZE))
+    return view
+
+def _update_from(h, f, length: int, job: Optional[Job] = None):
+    """Lê até 'length' bytes do ficheiro para o buffer da thread e atualiza o hash."""
+    view = _read_buffer()
+    while length > 0:
+        if job is not None: job.raise_if_cancelled()
+        count = f.readinto(view[:min(length, CHUNK_SIZE)])
+        if not count: break
+        h.update(view[:count])
+        length -= count
+
+def calculate_head_hash(path: str, length: int = 4096, backend: Optional[str] = None,
+                        job: Optional[Job] = None) -> Optional[str]:
+    """Hash apenas dos primeiros 'length' bytes: o filtro mais barato depois do tamanho."""
+    try:
+        h = new_hasher(backend)
+        with open(path, 'rb', buffering=0) as f:
+            _update_from(h, f, length, job)
+        return h.hexdigest()
+    except JobCancelled:
+        return None
+    except Exception as e:
+        logging.warning(f"Não foi possível calcular o hash de {path}: {e}")
+        return None
+
+def calculate_quick_hash(path: str, backend: Optional[str] = None, job: Optional[Job] = None) -> Optional[str]:
+    """Hash de amostra: o primeiro e o último MiB (ou o ficheiro inteiro se tiver menos de 2 MiB)."""
+    try:
+        h = new_hasher(backend)
+        file_size = os.path.getsize(path)
+        with open(path, 'rb', buffering=0) as f:
+            if file_size < CHUNK_SIZE * 2:
+                _update_from(h, f, file_size, job)
+            else:
+                _update_from(h, f, CHUNK_SIZE, job)
+                f.seek(-CHUNK_SIZE, os.SEEK_END)
+                _update_from(h, f, CHUNK_SIZE, job)
+        h.update(str(file_size).encode())
+        return h.hexdigest()
+    except JobCancelled:
+        return None
+    except Exception as e:
+        logging.warning(f"Não foi possível calcular o hash de {path}: {e}")
+        return None
+
+def calculate_full_hash(path: str, backend: Optional[str] = None, job: Optional[Job] = None) -> Optional[str]:
+    """
+    Hash de todo o conteúdo, lido em blocos; é o único que confirma um duplicado.
+    Com 'job', a leitura pára entre blocos em pausa e um cancelamento devolve None.
+    """
+    try:
+        h = new_hasher(backend)
+        with open(path, 'rb', buffering=0) as f:
+            view = _read_buffer()
+            while True:
+                if job is not None: job.raise_if_cancelled()
+                count = f.readinto(view)
+                if not count: break
+                h.update(view[:count])
+        return h.hexdigest()
+    except JobCancelled:
+        return None
+    except Exception as e:
+        logging.warning(f"Não foi possível calcular o hash de {path}: {e}")
+        return None
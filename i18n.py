@@ -44,11 +44,11 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "col_size_mb": "Tamanho (GB)",
         "col_mdate": "Data de Modificação",
         "col_fullpath": "Caminho Completo",
-        "col_file_group": "Ficheiro / Grupo",
+        "col_group": "Grupo",
         "col_last_access": "Último Acesso",
         "delete_selected": "Apagar Selecionados",
         "export_results": "Exportar Resultados",
-        "compress_selected": "Comprimir Selecionados para .zip",
+        "compress_selected": "Arquivar Selecionados...",
         "open_location": "Abrir Localização",
         "open_file": "Abrir Ficheiro",
         "open_folder": "Abrir Pasta",
@@ -59,7 +59,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "delete_confirm_title": "Confirmar",
         "delete_confirm_message": "Apagar permanentemente {count} ficheiros?",
         "delete_warning_title": "Aviso",
-        "delete_warning_message": "Selecione os ficheiros individuais (não os grupos) a apagar.",
+        "delete_warning_message": "Selecione os ficheiros a apagar.",
         "delete_done_title": "Concluído",
         "delete_done_message": "{count} ficheiros apagados.",
         "export_success_title": "Sucesso",
@@ -95,6 +95,77 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "category_system": "Sistema/Exec.",
         "start_scan": "Iniciar Varredura",
         "folder_selected": "Pasta selecionada. Clique em 'Iniciar Varredura' para começar.",
+        "refresh_scan": "Atualizar",
+        "group_files_reclaimable": "Grupo {group_num} ({count} ficheiros, {reclaimable} MB recuperáveis)",
+        "hardlink": "ligação física",
+        "scan_progress": "{files:,} ficheiros · {size_gb:,.2f} GB · {rate:,.0f} ficheiros/s · ETA {eta} · {folder}",
+        "cancel_job": "Cancelar",
+        "pause_job": "Pausar",
+        "resume_job": "Retomar",
+        "job_cancelled_title": "Operação Cancelada",
+        "job_cancelled_message": "A operação foi cancelada. Os resultados mostrados são parciais.",
+        "loading": "A carregar…",
+        "growth_tab": "Crescimento",
+        "save_snapshot": "Guardar instantâneo",
+        "compare_with": "Comparar com:",
+        "compare_snapshot": "Comparar",
+        "growth_folders": "Pastas (variação do tamanho total)",
+        "growth_files": "Ficheiros novos, apagados ou alterados",
+        "col_size_before": "Antes (GB)",
+        "col_size_after": "Agora (GB)",
+        "col_size_delta": "Variação (GB)",
+        "col_change": "Alteração",
+        "growth_status_new": "novo",
+        "growth_status_deleted": "apagado",
+        "growth_status_grown": "cresceu",
+        "growth_status_shrunk": "diminuiu",
+        "growth_status_changed": "alterada",
+        "growth_summary": "Desde {date}: {new} novos, {deleted} apagados, {grown} cresceram, {shrunk} diminuíram · variação total {delta:+,.2f} GB",
+        "snapshot_needs_scan": "Faça primeiro uma varredura completa da pasta.",
+        "report_reclaimable": "Espaço recuperável nos duplicados: {size:,.2f} GB",
+        "report_attachment": "Listagem completa dos ficheiros em anexo: {path}",
+        "report_categories": "Totais por categoria",
+        "report_category": "Categoria",
+        "report_files": "Ficheiros",
+        "report_largest_folders": "Maiores pastas",
+        "report_largest_files": "Maiores ficheiros",
+        "report_copies": "Cópias",
+        "report_reclaimable_col": "Recuperável (GB)",
+        "export_data": "Exportar dados (Parquet/CSV/JSONL)",
+        "export_progress": "A exportar {dataset}: {rows:,} de {total:,} registos",
+        "archive_done_message": "{count} ficheiros arquivados e verificados em {path} ({size_in:,.1f} MB → {size_out:,.1f} MB). {deleted} originais apagados.",
+        "archive_kept_message": "{count} ficheiros não foram apagados (não arquivados, não verificados ou alterados entretanto). Veja o registo para mais detalhes.",
+        "archive_error_message": "Não foi possível concluir o arquivamento. Veja o registo para mais detalhes.",
+        "archive_progress": "{phase}: {done:,} de {total:,} ficheiros",
+        "archive_phase_write": "A comprimir",
+        "archive_phase_verify": "A verificar",
+        "archive_phase_delete": "A apagar originais",
+        "archive_resume_title": "Arquivamento Interrompido",
+        "archive_resume_message": "Há um arquivamento interrompido deste ficheiro. Retomá-lo?\n(Não: começar de novo com a seleção atual.)",
+        "undo_delete": "Desfazer Eliminação",
+        "trash_confirm_message": "Mover {count} ficheiros ({size:,.1f} MB) para a reciclagem do Analisador?\nPode repô-los com «Desfazer Eliminação».",
+        "trash_done_message": "{count} ficheiros ({size:,.1f} MB) movidos para a reciclagem.",
+        "delete_failed_message": "{count} ficheiros ficaram como estavam (alterados desde a varredura ou sem permissão). Veja o registo para mais detalhes.",
+        "delete_all_copies_message": "A seleção leva todas as cópias de {count} grupo(s). Deixe pelo menos uma cópia em cada grupo.",
+        "bulk_progress": "A tratar ficheiros: {done:,} de {total:,}",
+        "undo_confirm_message": "Repor {count} ficheiros ({size:,.1f} MB) eliminados em {date}?",
+        "undo_done_message": "{count} ficheiros repostos.",
+        "undo_failed_message": "{count} ficheiros não foram repostos (o caminho original já está ocupado). Continuam na reciclagem.",
+        "undo_nothing_message": "Não há eliminações para desfazer.",
+        "retention_keep": "Manter:",
+        "retention_rule_newest": "a mais recente",
+        "retention_rule_oldest": "a mais antiga",
+        "retention_rule_shortest": "o caminho mais curto",
+        "retention_rule_under": "dentro das pastas",
+        "retention_rule_regex": "caminho que corresponde a",
+        "retention_hardlink": "Ligar em vez de apagar",
+        "retention_apply": "Aplicar Política...",
+        "retention_export": "Exportar Plano...",
+        "retention_nothing_message": "A política não deixa nada para tratar nos grupos de duplicados mostrados.",
+        "retention_confirm_message": "Política: manter {rule}\n\n{count} ficheiros em {groups} grupos serão tratados ({linked} substituídos por ligações físicas).\nEspaço recuperável: {size:,.1f} MB.\n\nContinuar?",
+        "retention_permanent_warning": "Os ficheiros serão apagados definitivamente.",
+        "retention_linked_message": "{count} ficheiros tratados, {linked} deles substituídos por ligações físicas ({size:,.1f} MB).",
+        "export_no_data_message": "Não há dados para exportar.",
 
     },
     "en_US": {
@@ -137,11 +208,11 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "col_size_mb": "Size (GB)",
         "col_mdate": "Modification Date",
         "col_fullpath": "Full Path",
-        "col_file_group": "File / Group",
+        "col_group": "Group",
         "col_last_access": "Last Access",
         "delete_selected": "Delete Selected",
         "export_results": "Export Results",
-        "compress_selected": "Compress Selected to .zip",
+        "compress_selected": "Archive Selected...",
         "open_location": "Open Location",
         "open_file": "Open File",
         "open_folder": "Open Folder",
@@ -152,7 +223,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "delete_confirm_title": "Confirm",
         "delete_confirm_message": "Permanently delete {count} files?",
         "delete_warning_title": "Warning",
-        "delete_warning_message": "Select the individual files to delete, not the groups.",
+        "delete_warning_message": "Select the files to delete.",
         "delete_done_title": "Done",
         "delete_done_message": "{count} files deleted.",
         "export_success_title": "Success",
@@ -188,6 +259,77 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "category_system": "System/Exec.",
         "start_scan": "Start Scan",
         "folder_selected": "Folder selected. Click 'Start Scan' to begin.",
+        "refresh_scan": "Refresh",
+        "group_files_reclaimable": "Group {group_num} ({count} files, {reclaimable} MB reclaimable)",
+        "hardlink": "hardlink",
+        "scan_progress": "{files:,} files · {size_gb:,.2f} GB · {rate:,.0f} files/s · ETA {eta} · {folder}",
+        "cancel_job": "Cancel",
+        "pause_job": "Pause",
+        "resume_job": "Resume",
+        "job_cancelled_title": "Operation Cancelled",
+        "job_cancelled_message": "The operation was cancelled. The results shown are partial.",
+        "loading": "Loading…",
+        "growth_tab": "Growth",
+        "save_snapshot": "Save snapshot",
+        "compare_with": "Compare with:",
+        "compare_snapshot": "Compare",
+        "growth_folders": "Folders (change in total size)",
+        "growth_files": "New, deleted or changed files",
+        "col_size_before": "Before (GB)",
+        "col_size_after": "Now (GB)",
+        "col_size_delta": "Change (GB)",
+        "col_change": "Change",
+        "growth_status_new": "new",
+        "growth_status_deleted": "deleted",
+        "growth_status_grown": "grew",
+        "growth_status_shrunk": "shrank",
+        "growth_status_changed": "changed",
+        "growth_summary": "Since {date}: {new} new, {deleted} deleted, {grown} grew, {shrunk} shrank · total change {delta:+,.2f} GB",
+        "snapshot_needs_scan": "Run a complete scan of the folder first.",
+        "report_reclaimable": "Reclaimable space in duplicates: {size:,.2f} GB",
+        "report_attachment": "Full file listing attached: {path}",
+        "report_categories": "Totals by category",
+        "report_category": "Category",
+        "report_files": "Files",
+        "report_largest_folders": "Largest folders",
+        "report_largest_files": "Largest files",
+        "report_copies": "Copies",
+        "report_reclaimable_col": "Reclaimable (GB)",
+        "export_data": "Export data (Parquet/CSV/JSONL)",
+        "export_progress": "Exporting {dataset}: {rows:,} of {total:,} records",
+        "archive_done_message": "{count} files archived and verified in {path} ({size_in:,.1f} MB → {size_out:,.1f} MB). {deleted} originals deleted.",
+        "archive_kept_message": "{count} files were not deleted (not archived, not verified or changed meanwhile). See the log for details.",
+        "archive_error_message": "The archive could not be completed. See the log for details.",
+        "archive_progress": "{phase}: {done:,} of {total:,} files",
+        "archive_phase_write": "Compressing",
+        "archive_phase_verify": "Verifying",
+        "archive_phase_delete": "Deleting originals",
+        "archive_resume_title": "Interrupted Archive",
+        "archive_resume_message": "There is an interrupted archive of this file. Resume it?\n(No: start over with the current selection.)",
+        "undo_delete": "Undo Delete",
+        "trash_confirm_message": "Move {count} files ({size:,.1f} MB) to the Analyzer's recycle bin?\nYou can restore them with \"Undo Delete\".",
+        "trash_done_message": "{count} files ({size:,.1f} MB) moved to the recycle bin.",
+        "delete_failed_message": "{count} files were left as they were (changed since the scan or no permission). See the log for details.",
+        "delete_all_copies_message": "The selection takes every copy of {count} group(s). Leave at least one copy in each group.",
+        "bulk_progress": "Processing files: {done:,} of {total:,}",
+        "undo_confirm_message": "Restore {count} files ({size:,.1f} MB) deleted on {date}?",
+        "undo_done_message": "{count} files restored.",
+        "undo_failed_message": "{count} files were not restored (the original path is taken). They remain in the recycle bin.",
+        "undo_nothing_message": "There are no deletions to undo.",
+        "retention_keep": "Keep:",
+        "retention_rule_newest": "the newest",
+        "retention_rule_oldest": "the oldest",
+        "retention_rule_shortest": "the shortest path",
+        "retention_rule_under": "inside folders",
+        "retention_rule_regex": "path matching",
+        "retention_hardlink": "Link instead of delete",
+        "retention_apply": "Apply Policy...",
+        "retention_export": "Export Plan...",
+        "retention_nothing_message": "The policy leaves nothing to handle in the duplicate groups shown.",
+        "retention_confirm_message": "Policy: keep {rule}\n\n{count} files in {groups} groups will be handled ({linked} replaced by hard links).\nReclaimable space: {size:,.1f} MB.\n\nContinue?",
+        "retention_permanent_warning": "The files will be permanently deleted.",
+        "retention_linked_message": "{count} files handled, {linked} of them replaced by hard links ({size:,.1f} MB).",
+        "export_no_data_message": "There is no data to export.",
     },
     "es_AR": {
         "big_files_tab": "Archivos Grandes",
@@ -229,11 +371,11 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "col_size_mb": "Tamaño (GB)",
         "col_mdate": "Fecha de Modificación",
         "col_fullpath": "Ruta Completa",
-        "col_file_group": "Archivo / Grupo",
+        "col_group": "Grupo",
         "col_last_access": "Último Acceso",
         "delete_selected": "Eliminar Seleccionados",
         "export_results": "Exportar Resultados",
-        "compress_selected": "Comprimir Seleccionados a .zip",
+        "compress_selected": "Archivar Seleccionados...",
         "open_location": "Abrir Ubicación",
         "open_file": "Abrir Archivo",
         "open_folder": "Abrir Carpeta",
@@ -244,7 +386,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "delete_confirm_title": "Confirmar",
         "delete_confirm_message": "¿Eliminar permanentemente {count} archivos?",
         "delete_warning_title": "Aviso",
-        "delete_warning_message": "Seleccione los archivos individuales a eliminar, no los grupos.",
+        "delete_warning_message": "Seleccione los archivos a eliminar.",
         "delete_done_title": "Hecho",
         "delete_done_message": "{count} archivos eliminados.",
         "export_success_title": "Éxito",
@@ -280,6 +422,77 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "category_system": "Sistema/Ejec.",
          "start_scan": "Iniciar Escaneo",
         "folder_selected": "Carpeta seleccionada. Haga clic en 'Iniciar Escaneo' para comenzar.",
+        "refresh_scan": "Actualizar",
+        "group_files_reclaimable": "Grupo {group_num} ({count} archivos, {reclaimable} MB recuperables)",
+        "hardlink": "enlace duro",
+        "scan_progress": "{files:,} archivos · {size_gb:,.2f} GB · {rate:,.0f} archivos/s · ETA {eta} · {folder}",
+        "cancel_job": "Cancelar",
+        "pause_job": "Pausar",
+        "resume_job": "Reanudar",
+        "job_cancelled_title": "Operación Cancelada",
+        "job_cancelled_message": "La operación fue cancelada. Los resultados mostrados son parciales.",
+        "loading": "Cargando…",
+        "growth_tab": "Crecimiento",
+        "save_snapshot": "Guardar instantánea",
+        "compare_with": "Comparar con:",
+        "compare_snapshot": "Comparar",
+        "growth_folders": "Carpetas (variación del tamaño total)",
+        "growth_files": "Archivos nuevos, borrados o modificados",
+        "col_size_before": "Antes (GB)",
+        "col_size_after": "Ahora (GB)",
+        "col_size_delta": "Variación (GB)",
+        "col_change": "Cambio",
+        "growth_status_new": "nuevo",
+        "growth_status_deleted": "borrado",
+        "growth_status_grown": "creció",
+        "growth_status_shrunk": "disminuyó",
+        "growth_status_changed": "modificada",
+        "growth_summary": "Desde {date}: {new} nuevos, {deleted} borrados, {grown} crecieron, {shrunk} disminuyeron · variación total {delta:+,.2f} GB",
+        "snapshot_needs_scan": "Primero haga un escaneo completo de la carpeta.",
+        "report_reclaimable": "Espacio recuperable en duplicados: {size:,.2f} GB",
+        "report_attachment": "Listado completo de archivos adjunto: {path}",
+        "report_categories": "Totales por categoría",
+        "report_category": "Categoría",
+        "report_files": "Archivos",
+        "report_largest_folders": "Carpetas más grandes",
+        "report_largest_files": "Archivos más grandes",
+        "report_copies": "Copias",
+        "report_reclaimable_col": "Recuperable (GB)",
+        "export_data": "Exportar datos (Parquet/CSV/JSONL)",
+        "export_progress": "Exportando {dataset}: {rows:,} de {total:,} registros",
+        "archive_done_message": "{count} archivos archivados y verificados en {path} ({size_in:,.1f} MB → {size_out:,.1f} MB). {deleted} originales eliminados.",
+        "archive_kept_message": "{count} archivos no fueron eliminados (no archivados, no verificados o modificados mientras tanto). Vea el registro para más detalles.",
+        "archive_error_message": "No se pudo completar el archivado. Vea el registro para más detalles.",
+        "archive_progress": "{phase}: {done:,} de {total:,} archivos",
+        "archive_phase_write": "Comprimiendo",
+        "archive_phase_verify": "Verificando",
+        "archive_phase_delete": "Eliminando originales",
+        "archive_resume_title": "Archivado Interrumpido",
+        "archive_resume_message": "Hay un archivado interrumpido de este archivo. ¿Reanudarlo?\n(No: empezar de nuevo con la selección actual.)",
+        "undo_delete": "Deshacer Eliminación",
+        "trash_confirm_message": "¿Mover {count} archivos ({size:,.1f} MB) a la papelera del Analizador?\nPuede restaurarlos con «Deshacer Eliminación».",
+        "trash_done_message": "{count} archivos ({size:,.1f} MB) movidos a la papelera.",
+        "delete_failed_message": "{count} archivos quedaron como estaban (modificados desde el escaneo o sin permiso). Vea el registro para más detalles.",
+        "delete_all_copies_message": "La selección incluye todas las copias de {count} grupo(s). Deje al menos una copia en cada grupo.",
+        "bulk_progress": "Procesando archivos: {done:,} de {total:,}",
+        "undo_confirm_message": "¿Restaurar {count} archivos ({size:,.1f} MB) eliminados el {date}?",
+        "undo_done_message": "{count} archivos restaurados.",
+        "undo_failed_message": "{count} archivos no fueron restaurados (la ruta original ya está ocupada). Siguen en la papelera.",
+        "undo_nothing_message": "No hay eliminaciones para deshacer.",
+        "retention_keep": "Conservar:",
+        "retention_rule_newest": "la más reciente",
+        "retention_rule_oldest": "la más antigua",
+        "retention_rule_shortest": "la ruta más corta",
+        "retention_rule_under": "dentro de las carpetas",
+        "retention_rule_regex": "ruta que coincide con",
+        "retention_hardlink": "Enlazar en vez de eliminar",
+        "retention_apply": "Aplicar Política...",
+        "retention_export": "Exportar Plan...",
+        "retention_nothing_message": "La política no deja nada para procesar en los grupos de duplicados mostrados.",
+        "retention_confirm_message": "Política: conservar {rule}\n\nSe procesarán {count} archivos en {groups} grupos ({linked} reemplazados por enlaces duros).\nEspacio recuperable: {size:,.1f} MB.\n\n¿Continuar?",
+        "retention_permanent_warning": "Los archivos se eliminarán definitivamente.",
+        "retention_linked_message": "{count} archivos procesados, {linked} de ellos reemplazados por enlaces duros ({size:,.1f} MB).",
+        "export_no_data_message": "No hay datos para exportar.",
 
     }
 }
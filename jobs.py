@@ -0,0 +1,43 @@
+# jobs.py
+import threading
+
+
+class JobCancelled(Exception):
+    """Lançada por Job.raise_if_cancelled quando o utilizador cancela o trabalho."""
+
+
+class Job:
+    """
+    Controlo cooperativo de um trabalho em segundo plano (varredura, hashes, ...).
+    O código do trabalho chama checkpoint() entre lotes: a chamada bloqueia enquanto
+    o trabalho estiver em pausa e devolve False quando foi cancelado.
+    """
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # acorda quem estiver parado em pausa
+
+    def pause(self):
+        if not self.cancelled: self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def checkpoint(self) -> bool:
+        self._running.wait()
+        return not self._cancelled.is_set()
+
+    def raise_if_cancelled(self):
+        if not self.checkpoint(): raise JobCancelled()
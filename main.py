@@ -1,8 +1,13 @@
 # main.py
-from ui import FinalDiskAnalyzerApp
+import sys
 import logging
 
 if __name__ == "__main__":
+    # Com argumentos (por exemplo "scan /data ..."), corre o modo de linha de comandos sem carregar o Tk
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main())
+    from ui import FinalDiskAnalyzerApp
     try:
         app = FinalDiskAnalyzerApp()
         app.mainloop()
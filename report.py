@@ -0,0 +1,230 @@
+# report.py
+"""
+Relatório PDF de uma varredura. O PDF só leva secções já agregadas a partir da ScanTable (resumo,
+totais por categoria, maiores pastas, maiores ficheiros, espaço recuperável nos duplicados), cada
+uma limitada a 'top_n' linhas, e nunca passa de 'max_pages' páginas. A listagem completa de
+ficheiros vai para um anexo colunar (Parquet, ou CSV comprimido sem pyarrow) escrito por blocos
+com exporters.py, por isso nem o PDF nem o anexo obrigam a ter todas as linhas formatadas em memória.
+"""
+import os
+import sys
+import time
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+import exporters
+import i18n
+import settings
+from scan_table import ScanTable, unique_inode_mask
+
+_ = i18n.get_text
+
+DEFAULT_MAX_PAGES = 20
+DEFAULT_TOP_N = 50
+
+
+class ReportSections(NamedTuple):
+    root: str
+    files: int
+    size: int
+    categories: pd.DataFrame    # category, files, size
+    folders: pd.DataFrame       # path, files, size (maiores pastas em qualquer profundidade)
+    top_files: pd.DataFrame     # name, path, size, mtime
+    duplicate_groups: pd.DataFrame   # group_id, count, size, reclaimable, path (primeiro caminho)
+    reclaimable: int
+
+
+class ReportResult(NamedTuple):
+    pdf_path: str
+    attachment_path: Optional[str]
+    pages: int
+    truncated: bool             # alguma secção ficou de fora por causa do limite de páginas
+
+
+def default_max_pages() -> int:
+    configured = settings.get_setting("report_max_pages")
+    return configured if isinstance(configured, int) and configured > 0 else DEFAULT_MAX_PAGES
+
+
+# --- Secções agregadas ---
+
+def build_sections(table: ScanTable, dir_id: int = 0, category_map: Optional[Dict[str, list]] = None,
+                   duplicates: Optional[pd.DataFrame] = None, top_n: int = DEFAULT_TOP_N) -> ReportSections:
+    """Agregados da pasta 'dir_id' e de todas as subpastas, calculados de forma vetorizada sobre as colunas."""
+    index = table.dir_index
+    dirs = index.subtree_mask(dir_id) if table.dir_count else np.zeros(0, dtype=bool)
+    rows = dirs[table.file_dir.view()] if len(table) else np.zeros(0, dtype=bool)
+    frame = table.frame[rows]
+    counted = np.where(unique_inode_mask(frame), frame['size'].to_numpy(), 0)
+
+    # Categorias: soma por extensão (poucas) e só depois a extensão é traduzida para a categoria
+    by_ext = pd.DataFrame({'ext': frame['ext'], 'size': counted}).groupby('ext', observed=True)['size'].agg(['count', 'sum'])
+    category_of = {ext: category for category, exts in (category_map or {}).items() for ext in exts}
+    categories = (by_ext.assign(category=[category_of.get(str(ext).lower(), _("category_other")) for ext in by_ext.index])
+                  .groupby('category')[['count', 'sum']].sum()
+                  .rename(columns={'count': 'files', 'sum': 'size'})
+                  .sort_values('size', ascending=False).reset_index())
+
+    # Maiores pastas em qualquer profundidade (sem a própria raiz do relatório)
+    candidates = np.flatnonzero(dirs)
+    candidates = candidates[candidates != dir_id]
+    if len(candidates) > top_n:
+        candidates = candidates[np.argpartition(-index.total_size[candidates], top_n - 1)[:top_n]]
+    candidates = candidates[np.argsort(-index.total_size[candidates], kind='stable')]
+    folders = pd.DataFrame({'path': [index.dir_paths[i] for i in candidates],
+                            'files': index.file_count[candidates], 'size': index.total_size[candidates]})
+
+    top_files = table.with_paths(frame.nlargest(top_n, 'size'))[['name', 'path', 'size', 'mtime']] if len(frame) else \
+        pd.DataFrame(columns=['name', 'path', 'size', 'mtime'])
+
+    groups, reclaimable = pd.DataFrame(columns=['group_id', 'count', 'size', 'reclaimable', 'path']), 0
+    if duplicates is not None and len(duplicates):
+        per_group = duplicates.groupby('group_id', sort=False).agg(count=('path', 'size'), size=('size', 'first'),
+                                                                   reclaimable=('reclaimable', 'first'), path=('path', 'first'))
+        reclaimable = int(per_group['reclaimable'].sum())
+        groups = per_group.nlargest(top_n, 'reclaimable').reset_index()
+
+    totals = index.totals(dir_id) if table.dir_count else {"files": 0, "size": 0}
+    return ReportSections(table.dir_paths[dir_id] if table.dir_count else table.root, int(totals["files"]), int(totals["size"]),
+                          categories, folders, top_files, groups, reclaimable)
+
+
+# --- Anexo com a listagem completa ---
+
+def attachment_path_for(pdf_path: str) -> str:
+    base = os.path.splitext(pdf_path)[0]
+    return base + ("_ficheiros.parquet" if exporters.parquet_available() else "_ficheiros.csv.gz")
+
+def write_attachment(table: ScanTable, path: str, dir_id: int = 0, should_continue=None) -> Optional[int]:
+    """Escreve a listagem completa por blocos (Parquet com pyarrow, senão CSV comprimido); devolve o número de linhas."""
+    return exporters.write_chunks(exporters.file_chunks(table, dir_id), path, columns=exporters.FILE_COLUMNS,
+                                  should_continue=should_continue)
+
+
+# --- PDF ---
+
+def _font_path(name: str) -> str:
+    return os.path.join(getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__))), name)
+
+
+class _PdfWriter:
+    """Escreve secções em tabela, mudando de página à mão para respeitar o limite de páginas."""
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self.truncated = False
+        self.pdf = FPDF()
+        self.pdf.set_auto_page_break(False)
+        try:
+            self.pdf.add_font('Arial', '', _font_path('arial.ttf'))
+            self.pdf.add_font('Arial', 'B', _font_path('arialbd.ttf'))
+            self.family, self.unicode = 'Arial', True
+        except (OSError, RuntimeError):
+            logging.warning("Fontes Arial não encontradas. A usar a fonte Helvetica.")
+            self.family, self.unicode = 'Helvetica', False
+        self.pdf.add_page()
+
+    def text(self, value) -> str:
+        value = str(value)
+        return value if self.unicode else value.encode('latin-1', 'replace').decode('latin-1')
+
+    def fit(self, value, width: float, keep_end: bool = False) -> str:
+        """Corta o texto para caber na célula; nos caminhos fica o fim, que é a parte que distingue."""
+        value, ellipsis = self.text(value), "…" if self.unicode else "..."
+        if self.pdf.get_string_width(value) <= width - 2: return value
+        while value and self.pdf.get_string_width(ellipsis + value if keep_end else value + ellipsis) > width - 2:
+            value = value[1:] if keep_end else value[:-1]
+        return ellipsis + value if keep_end else value + ellipsis
+
+    def room_for(self, height: float) -> bool:
+        """Garante espaço para 'height' mm, abrindo uma página nova se o orçamento o permitir."""
+        pdf = self.pdf
+        if pdf.get_y() + height <= pdf.h - pdf.b_margin: return True
+        if pdf.page_no() >= self.max_pages:
+            self.truncated = True
+            return False
+        pdf.add_page()
+        return True
+
+    def heading(self, title: str, size: int = 12) -> bool:
+        if not self.room_for(20): return False
+        self.pdf.set_font(self.family, 'B', size)
+        self.pdf.cell(0, 10, self.text(title), new_x="LMARGIN", new_y="NEXT")
+        return True
+
+    def line(self, value: str, size: int = 10):
+        if not self.room_for(7): return
+        self.pdf.set_font(self.family, '', size)
+        self.pdf.cell(0, 7, self.text(value), new_x="LMARGIN", new_y="NEXT")
+
+    def table(self, headers: Sequence[str], widths: Sequence[float], rows: Iterable[Sequence], aligns: Sequence[str],
+              path_columns: Sequence[int] = ()) -> int:
+        """Linhas da tabela até acabarem ou até se esgotar o orçamento; o cabeçalho repete-se em cada página."""
+        pdf, height, written = self.pdf, 6, 0
+        def header():
+            pdf.set_font(self.family, 'B', 8)
+            for title, width in zip(headers, widths): pdf.cell(width, height, self.fit(title, width), border=1)
+            pdf.ln(); pdf.set_font(self.family, '', 8)
+        if not self.room_for(2 * height): return 0
+        header()
+        for row in rows:
+            page = pdf.page_no()
+            if not self.room_for(height): break
+            if pdf.page_no() != page: header()
+            for i, (value, width, align) in enumerate(zip(row, widths, aligns)):
+                pdf.cell(width, height, self.fit(value, width, keep_end=i in path_columns), border=1, align=align)
+            pdf.ln()
+            written += 1
+        pdf.ln(4)
+        return written
+
+
+def _gb(size) -> str:
+    return f"{size / (1024**3):,.3f}"
+
+def write_pdf(sections: ReportSections, output_path: str, chart_image_path: Optional[str] = None,
+              attachment_path: Optional[str] = None, max_pages: Optional[int] = None) -> ReportResult:
+    writer = _PdfWriter(max_pages or default_max_pages())
+    pdf = writer.pdf
+    pdf.set_font(writer.family, 'B', 16)
+    pdf.cell(0, 10, writer.text(_("report_title")), align='C', new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font(writer.family, '', 9)
+    pdf.cell(0, 6, writer.fit(f"{sections.root} · {time.strftime('%Y-%m-%d %H:%M')}", pdf.epw), align='C', new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    writer.heading(_("summary_tab"))
+    writer.line(f"{_('total_files')} {sections.files:,}")
+    writer.line(f"{_('total_size_gb')} {sections.size / (1024**3):,.2f} GB")
+    writer.line(f"{_('avg_size_mb')} {(sections.size / sections.files if sections.files else 0) / (1024**2):,.2f} MB")
+    if sections.reclaimable: writer.line(_("report_reclaimable").format(size=sections.reclaimable / (1024**3)))
+    if attachment_path: writer.line(_("report_attachment").format(path=os.path.basename(attachment_path)), size=8)
+    pdf.ln(4)
+
+    if chart_image_path and os.path.exists(chart_image_path) and writer.room_for(110):
+        pdf.image(chart_image_path, x=10, w=pdf.epw, h=100)
+        pdf.ln(4)
+
+    total = sections.size or 1
+    if len(sections.categories) and writer.heading(_("report_categories")):
+        writer.table([_("report_category"), _("report_files"), "GB", "%"], [70, 35, 35, 25],
+                     ((c.category, f"{c.files:,}", _gb(c.size), f"{100 * c.size / total:.1f}") for c in sections.categories.itertuples()),
+                     ['L', 'R', 'R', 'R'])
+    if len(sections.folders) and writer.heading(_("report_largest_folders")):
+        writer.table([_("col_fullpath"), _("report_files"), "GB"], [130, 30, 30],
+                     ((f.path, f"{f.files:,}", _gb(f.size)) for f in sections.folders.itertuples()),
+                     ['L', 'R', 'R'], path_columns=(0,))
+    if len(sections.top_files) and writer.heading(_("report_largest_files")):
+        writer.table([_("col_name"), "GB", _("col_mdate"), _("col_fullpath")], [50, 22, 28, 90],
+                     ((f.name, _gb(f.size), time.strftime('%Y-%m-%d', time.localtime(f.mtime)), f.path) for f in sections.top_files.itertuples()),
+                     ['L', 'R', 'C', 'L'], path_columns=(3,))
+    if len(sections.duplicate_groups) and writer.heading(_("duplicates_tab")):
+        writer.table([_("report_copies"), "GB", _("report_reclaimable_col"), _("col_fullpath")], [20, 25, 30, 115],
+                     ((f"{g.count:,}", _gb(g.size), _gb(g.reclaimable), g.path) for g in sections.duplicate_groups.itertuples()),
+                     ['R', 'R', 'R', 'L'], path_columns=(3,))
+    if writer.truncated:
+        logging.info(f"Relatório limitado a {writer.max_pages} páginas; a listagem completa está no anexo.")
+    pdf.output(output_path)
+    return ReportResult(output_path, attachment_path, pdf.page_no(), writer.truncated)
@@ -0,0 +1,85 @@
+# scan_cache.py
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import settings
+from scan_table import ScanTable
+
+def is_enabled() -> bool:
+    """A cache persistente pode ser desligada com "scan_cache": false no app_config.json."""
+    return bool(settings.get_setting("scan_cache", True))
+
+def cache_dir() -> str:
+    """Pasta da cache, ao lado do app_config.json."""
+    return settings.data_dir(settings.CACHE_DIR_NAME)
+
+def cache_path(root: str) -> str:
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(cache_dir(), f"{key}.npz")
+
+def load(root: str) -> Optional[ScanTable]:
+    """Devolve a última varredura gravada desta raiz, ou None se não existir ou estiver corrompida."""
+    path = cache_path(root)
+    if not os.path.exists(path): return None
+    try:
+        table = ScanTable.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Cache de varredura inválida em {path}, a ignorar: {e}")
+        return None
+    return table if table.root == root else None
+
+def save(table: ScanTable):
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        table.save(cache_path(table.root))
+        logging.info(f"Varredura de {table.root} gravada na cache ({len(table)} ficheiros).")
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar a cache de varredura de {table.root}: {e}")
+
+def invalidate(root: str):
+    try:
+        os.remove(cache_path(root))
+    except FileNotFoundError:
+        pass
+
+
+class SessionCache:
+    """
+    Varreduras em memória da sessão atual, por raiz, para que as várias análises
+    (duplicados, antigos, grandes) reutilizem a mesma tabela sem voltar a percorrer o disco.
+    Guarda no máximo 'max_roots' raízes, descartando a usada há mais tempo.
+    """
+    def __init__(self, max_roots: int = 3):
+        self.max_roots = max_roots
+        self._tables: 'OrderedDict[str, ScanTable]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: str) -> Optional[ScanTable]:
+        with self._lock:
+            table = self._tables.get(root)
+            if table is not None: self._tables.move_to_end(root)
+            return table
+
+    def locate(self, path: str) -> Optional[Tuple[ScanTable, int]]:
+        """Varredura da sessão que contém a pasta 'path' (a própria raiz ou uma subpasta) e o id da pasta."""
+        with self._lock:
+            tables = list(reversed(self._tables.values()))
+        for table in tables:
+            dir_id = table.dir_index.lookup(path)
+            if dir_id is not None: return table, dir_id
+        return None
+
+    def put(self, root: str, table: ScanTable):
+        with self._lock:
+            self._tables[root] = table
+            self._tables.move_to_end(root)
+            while len(self._tables) > self.max_roots:
+                self._tables.popitem(last=False)
+
+    def invalidate(self, root: str):
+        with self._lock:
+            self._tables.pop(root, None)
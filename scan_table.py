@@ -0,0 +1,370 @@
+# scan_table.py
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NO_EXTENSION = '.sem_extensao'
+# Versão do formato gravado por ScanTable.save (incrementar se as colunas mudarem)
+TABLE_FORMAT_VERSION = 2
+
+def _pack_strings(values: Sequence[str]) -> np.ndarray:
+    """Junta strings num único bloco UTF-8 separado por NUL (que não pode aparecer em nomes de ficheiros)."""
+    return np.frombuffer('\0'.join(values).encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+
+def _unpack_strings(blob: np.ndarray, count: int) -> List[str]:
+    if count == 0: return []
+    return blob.tobytes().decode('utf-8', 'surrogatepass').split('\0')
+
+def unique_inode_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    Linhas que contam para totais de espaço: cada inode com várias ligações físicas
+    (mesmo dev+ino, nlink > 1) só conta na primeira linha em que aparece.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    linked = (df['nlink'].to_numpy() > 1) & (df['ino'].to_numpy() != 0)
+    if linked.any():
+        mask[linked] = ~df.loc[linked, ['dev', 'ino']].duplicated().to_numpy()
+    return mask
+
+
+def remap_rows(df: pd.DataFrame, remap: np.ndarray) -> pd.DataFrame:
+    """Resultado indexado por id de ficheiro depois de ScanTable.remove_files: sem as linhas removidas e com os ids novos."""
+    if df.empty: return df
+    ids = remap[df.index.to_numpy(dtype=np.int64)]
+    kept = df[ids >= 0]
+    return kept.set_axis(pd.Index(ids[ids >= 0], name=df.index.name), axis=0)
+
+
+class GrowableColumn:
+    """Vetor NumPy com crescimento geométrico: acrescentar lotes custa O(1) amortizado."""
+    def __init__(self, dtype, capacity: int = 4096):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, values: Sequence):
+        count = len(values)
+        if count == 0: return
+        needed = self._size + count
+        if needed > len(self._data):
+            grown = np.empty(max(needed, len(self._data) * 2), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    def append(self, value):
+        self.extend([value])
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> 'GrowableColumn':
+        column = cls(values.dtype, capacity=max(1, len(values)))
+        column.extend(values)
+        return column
+
+    def view(self) -> np.ndarray:
+        """Vista (sem cópia) sobre os elementos já escritos."""
+        return self._data[:self._size]
+
+
+class ScanTable:
+    """
+    Resultado colunar de uma varredura. Em vez de um dicionário por ficheiro, guarda
+    colunas NumPy (tamanho, datas, id da pasta, código da extensão) e separa o caminho
+    em id de diretório + nome, pelo que cada pasta só é guardada uma vez.
+    O diretório raiz tem sempre o id 0 e cada pasta é registada depois da pasta-mãe.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.RLock()
+        self._frame: Optional[pd.DataFrame] = None
+        self._index: Optional['DirIndex'] = None
+        self._version = 0
+        # False quando a varredura foi cancelada a meio (resultado parcial)
+        self.complete = True
+        # --- Diretórios ---
+        self.dir_paths: List[str] = []
+        self.dir_parent = GrowableColumn(np.int32)
+        self.dir_mtime = GrowableColumn(np.float64)
+        self.dir_ctime = GrowableColumn(np.float64)
+        self.dir_depth = GrowableColumn(np.int32)
+        self.dir_file_start = GrowableColumn(np.int64)
+        self.dir_file_count = GrowableColumn(np.int64)
+        # --- Ficheiros (os ficheiros de cada pasta ficam contíguos) ---
+        self.file_dir = GrowableColumn(np.int32)
+        self.name = GrowableColumn(object)
+        self.size = GrowableColumn(np.int64)
+        self.mtime = GrowableColumn(np.float64)
+        self.atime = GrowableColumn(np.float64)
+        self.ext_code = GrowableColumn(np.int32)
+        # Identidade do inode, para reconhecer ligações físicas (0 = desconhecido)
+        self.dev = GrowableColumn(np.uint64)
+        self.ino = GrowableColumn(np.uint64)
+        self.nlink = GrowableColumn(np.uint32)
+        self.ext_categories: List[str] = []
+        self._ext_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    @property
+    def dir_count(self) -> int:
+        return len(self.dir_paths)
+
+    def add_directory(self, path: str, parent_id: int, mtime: float, ctime: float, names: List[str],
+                      sizes: List[int], mtimes: List[float], atimes: List[float], exts: List[str],
+                      devs: Sequence[int], inos: Sequence[int], nlinks: Sequence[int]) -> int:
+        """Regista uma pasta e os seus ficheiros diretos num único lote; devolve o id da pasta."""
+        with self._lock:
+            codes = []
+            for ext in exts:
+                code = self._ext_codes.get(ext)
+                if code is None:
+                    code = self._ext_codes[ext] = len(self.ext_categories)
+                    self.ext_categories.append(ext)
+                codes.append(code)
+            dir_id = len(self.dir_paths)
+            self.dir_paths.append(path)
+            self.dir_parent.append(parent_id)
+            self.dir_mtime.append(mtime)
+            self.dir_ctime.append(ctime)
+            self.dir_depth.append(self.dir_depth.view()[parent_id] + 1 if parent_id >= 0 else 0)
+            self.dir_file_start.append(len(self.size))
+            self.dir_file_count.append(len(names))
+            self.file_dir.extend([dir_id] * len(names))
+            self.name.extend(names)
+            self.size.extend(sizes)
+            self.mtime.extend(mtimes)
+            self.atime.extend(atimes)
+            self.ext_code.extend(codes)
+            self.dev.extend(devs)
+            self.ino.extend(inos)
+            self.nlink.extend(nlinks)
+            self._frame = None
+            self._version += 1
+            return dir_id
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """DataFrame construído sobre as colunas, sem copiar os dados (o índice é o id do ficheiro)."""
+        if self._frame is None:
+            with self._lock:
+                self._frame = pd.DataFrame({
+                    "dir_id": self.file_dir.view(),
+                    "name": pd.Series(self.name.view(), dtype=object, copy=False),
+                    "size": self.size.view(),
+                    "mtime": self.mtime.view(),
+                    "atime": self.atime.view(),
+                    "ext": pd.Categorical.from_codes(self.ext_code.view(), categories=self.ext_categories),
+                    "dev": self.dev.view(),
+                    "ino": self.ino.view(),
+                    "nlink": self.nlink.view(),
+                }, copy=False)
+        return self._frame
+
+    def directory_files(self, dir_id: int) -> slice:
+        """Intervalo de linhas com os ficheiros diretos de uma pasta."""
+        start = int(self.dir_file_start.view()[dir_id])
+        return slice(start, start + int(self.dir_file_count.view()[dir_id]))
+
+    def remove_files(self, file_ids: Sequence[int], unlinked: bool = True) -> np.ndarray:
+        """
+        Tira da tabela ficheiros que já não estão no disco (apagados ou movidos), sem voltar a percorrer
+        as pastas. As linhas restantes são compactadas e mudam de id: devolve o mapa id antigo -> id novo
+        (-1 para as removidas), a aplicar aos resultados com remap_rows. Com 'unlinked', as outras
+        ligações físicas de um inode removido ficam com menos uma ligação (nlink).
+        """
+        with self._lock:
+            count = len(self.size)
+            keep = np.ones(count, dtype=bool)
+            keep[np.asarray(file_ids, dtype=np.int64)] = False
+            remap = np.full(count, -1, dtype=np.int64)
+            remap[keep] = np.arange(int(keep.sum()))
+            if unlinked: self._drop_links(~keep)
+            for name in self._FILE_COLUMNS + ('name',):
+                setattr(self, name, GrowableColumn.from_array(getattr(self, name).view()[keep]))
+            # Os ficheiros de cada pasta continuam contíguos e pela ordem das pastas
+            counts = np.bincount(self.file_dir.view(), minlength=self.dir_count).astype(np.int64)
+            self.dir_file_count = GrowableColumn.from_array(counts)
+            self.dir_file_start = GrowableColumn.from_array(np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64))
+            self._frame = None
+            self._version += 1
+        return remap
+
+    def relink_files(self, file_ids: Sequence[int], target_ids: Sequence[int], unlinked: bool = True):
+        """
+        Regista que cada ficheiro de 'file_ids' passou a ser uma ligação física do ficheiro na mesma
+        posição de 'target_ids' (ids não mudam). Com 'unlinked', o inode antigo perdeu essa ligação.
+        """
+        ids = np.asarray(file_ids, dtype=np.int64)
+        targets = np.asarray(target_ids, dtype=np.int64)
+        if not len(ids): return
+        with self._lock:
+            if unlinked:
+                gone = np.zeros(len(self.size), dtype=bool)
+                gone[ids] = True
+                self._drop_links(gone)
+            dev, ino, nlink = self.dev.view(), self.ino.view(), self.nlink.view()
+            known = targets[ino[targets] != 0]
+            added = pd.DataFrame({'dev': dev[known], 'ino': ino[known]}).value_counts()
+            rows = np.flatnonzero(np.isin(ino, ino[known]))
+            nlink[rows] += added.reindex(pd.MultiIndex.from_arrays([dev[rows], ino[rows]]), fill_value=0).to_numpy().astype(np.uint32)
+            dev[ids], ino[ids], nlink[ids] = dev[targets], ino[targets], nlink[targets]
+            self._frame = None
+            self._version += 1
+
+    def _drop_links(self, gone: np.ndarray):
+        """Tira às ligações físicas que ficam as ligações marcadas em 'gone' do mesmo inode (sob o lock)."""
+        nlink = self.nlink.view()
+        linked = np.flatnonzero((nlink > 1) & (self.ino.view() != 0))
+        if len(linked) and gone[linked].any():
+            links = pd.DataFrame({'dev': self.dev.view()[linked], 'ino': self.ino.view()[linked], 'gone': gone[linked]})
+            nlink[linked] -= links.groupby(['dev', 'ino'])['gone'].transform('sum').to_numpy().astype(np.uint32)
+
+    _DIR_COLUMNS = ('dir_parent', 'dir_mtime', 'dir_ctime', 'dir_depth', 'dir_file_start', 'dir_file_count')
+    _FILE_COLUMNS = ('file_dir', 'size', 'mtime', 'atime', 'ext_code', 'dev', 'ino', 'nlink')
+
+    def save(self, path: str, compressed: bool = False, extra_meta: Optional[Dict] = None):
+        """Grava a tabela num ficheiro .npz (colunas binárias + nomes em blocos UTF-8); 'extra_meta' vai para os metadados."""
+        with self._lock:
+            arrays = {name: getattr(self, name).view() for name in self._DIR_COLUMNS + self._FILE_COLUMNS}
+            arrays['dir_paths'] = _pack_strings(self.dir_paths)
+            arrays['names'] = _pack_strings(self.name.view())
+            arrays['ext_categories'] = _pack_strings(self.ext_categories)
+            meta = {"version": TABLE_FORMAT_VERSION, "root": self.root,
+                    "dirs": self.dir_count, "files": len(self.size), "exts": len(self.ext_categories), **(extra_meta or {})}
+            arrays['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            (np.savez_compressed if compressed else np.savez)(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_meta(path: str) -> Dict:
+        """Só os metadados de um ficheiro gravado com save(), sem ler as colunas."""
+        with np.load(path, allow_pickle=False) as data:
+            return json.loads(data['meta'].tobytes().decode('utf-8'))
+
+    @classmethod
+    def load(cls, path: str) -> 'ScanTable':
+        """Lê uma tabela gravada com save(); lança ValueError se o formato for de outra versão."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta.get("version") != TABLE_FORMAT_VERSION:
+                raise ValueError(f"Formato de tabela não suportado: {meta.get('version')}")
+            table = cls(meta["root"])
+            for name in cls._DIR_COLUMNS + cls._FILE_COLUMNS:
+                setattr(table, name, GrowableColumn.from_array(data[name]))
+            table.dir_paths = _unpack_strings(data['dir_paths'], meta["dirs"])
+            table.name = GrowableColumn.from_array(np.array(_unpack_strings(data['names'], meta["files"]), dtype=object))
+            table.ext_categories = _unpack_strings(data['ext_categories'], meta["exts"])
+            table._ext_codes = {ext: i for i, ext in enumerate(table.ext_categories)}
+        return table
+
+    @property
+    def dir_index(self) -> 'DirIndex':
+        """Índice hierárquico de tamanhos, calculado uma vez e reutilizado até a tabela mudar."""
+        index = self._index
+        if index is None or index.version != self._version:
+            # Durante a varredura o índice é um retrato parcial; fica em cache só até à próxima pasta
+            index = self._index = DirIndex(self)
+        return index
+
+    def _dir_prefixes(self) -> np.ndarray:
+        return np.array([p if p.endswith(os.sep) else p + os.sep for p in self.dir_paths], dtype=object)
+
+    def with_paths(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Acrescenta a coluna 'path' a um subconjunto do DataFrame, montando só os caminhos necessários."""
+        if df.empty:
+            return df.assign(path=pd.Series(dtype=object))
+        paths = self._dir_prefixes()[df['dir_id'].to_numpy()] + df['name'].to_numpy(dtype=object)
+        return df.assign(path=paths)
+
+
+class DirIndex:
+    """
+    Totais recursivos (tamanho, nº de ficheiros, mtime mais recente) de todas as pastas
+    de uma ScanTable, somados numa única passagem de baixo para cima, nível a nível.
+    Depois de construído, os totais de qualquer pasta, a qualquer profundidade, são O(1).
+    """
+    def __init__(self, table: ScanTable):
+        self.table = table
+        # As vistas são tiradas sob o lock: durante a varredura isto é um retrato coerente
+        # das linhas já escritas (que nunca mudam), mesmo com os trabalhadores a acrescentar mais.
+        with table._lock:
+            self.version = table._version
+            self.dir_count = count = table.dir_count
+            self.dir_paths = table.dir_paths[:count]
+            file_dir = table.file_dir.view()
+            parent = table.dir_parent.view()
+            depth = table.dir_depth.view()
+            self.dir_mtime = table.dir_mtime.view()
+            frame = table.frame
+        # Totais diretos de cada pasta (apenas os ficheiros que estão nela); um inode com várias
+        # ligações físicas só conta o tamanho uma vez, na primeira pasta em que aparece
+        sizes = np.where(unique_inode_mask(frame), frame['size'].to_numpy(), 0)
+        self.total_size = np.bincount(file_dir, weights=sizes, minlength=count).astype(np.int64)
+        self.file_count = np.bincount(file_dir, minlength=count).astype(np.int64)
+        self.newest_mtime = np.zeros(count, dtype=np.float64)
+        np.maximum.at(self.newest_mtime, file_dir, frame['mtime'].to_numpy())
+        # Cada pasta tem sempre um id maior que a mãe: acumular do nível mais fundo para a raiz
+        for level in range(int(depth.max()) if count else 0, 0, -1):
+            rows = np.flatnonzero(depth == level)
+            parents = parent[rows]
+            np.add.at(self.total_size, parents, self.total_size[rows])
+            np.add.at(self.file_count, parents, self.file_count[rows])
+            np.maximum.at(self.newest_mtime, parents, self.newest_mtime[rows])
+        self._ids: Optional[Dict[str, int]] = None
+        self._child_order: Optional[np.ndarray] = None
+        self._child_bounds: Optional[np.ndarray] = None
+
+    def lookup(self, path: str) -> Optional[int]:
+        """Id da pasta com este caminho, ou None se não pertencer à varredura."""
+        if self._ids is None:
+            self._ids = {p: i for i, p in enumerate(self.dir_paths)}
+        dir_id = self._ids.get(path)
+        return dir_id if dir_id is not None else self._ids.get(os.path.normpath(path))
+
+    def totals(self, dir_id: int) -> Dict[str, float]:
+        return {"size": int(self.total_size[dir_id]), "files": int(self.file_count[dir_id]),
+                "newest_mtime": float(self.newest_mtime[dir_id])}
+
+    def children(self, dir_id: int) -> np.ndarray:
+        """Ids das subpastas imediatas (pastas agrupadas pela mãe com um único argsort)."""
+        if self._child_order is None:
+            parent = self.table.dir_parent.view()[:self.dir_count]
+            self._child_order = np.argsort(parent, kind='stable')
+            self._child_bounds = np.searchsorted(parent[self._child_order], np.arange(self.dir_count + 1))
+        return self._child_order[self._child_bounds[dir_id]:self._child_bounds[dir_id + 1]]
+
+    def subtree_mask(self, dir_id: int) -> np.ndarray:
+        """Máscara das pastas dentro de 'dir_id' (incluindo a própria), propagada nível a nível a partir da mãe."""
+        mask = np.zeros(self.dir_count, dtype=bool)
+        if dir_id == 0:
+            mask[:] = True
+            return mask
+        mask[dir_id] = True
+        parent = self.table.dir_parent.view()[:self.dir_count]
+        depth = self.table.dir_depth.view()[:self.dir_count]
+        for level in range(int(depth[dir_id]) + 1, int(depth.max()) + 1):
+            rows = np.flatnonzero(depth == level)
+            mask[rows] = mask[parent[rows]]
+        return mask
+
+    def subfolders_frame(self, dir_id: int) -> pd.DataFrame:
+        """Subpastas imediatas de uma pasta, no formato usado pela lista e pelo gráfico."""
+        ids = self.children(dir_id)
+        paths = [self.dir_paths[i] for i in ids]
+        return pd.DataFrame({
+            'name': [os.path.basename(p) for p in paths],
+            'size': self.total_size[ids],
+            'mtime': self.dir_mtime[ids],
+            'path': paths,
+            'ext': NO_EXTENSION,
+        })
@@ -0,0 +1,302 @@
+# scanner.py
+import os
+import stat
+import time
+import shutil
+import threading
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import settings
+from jobs import Job
+from scan_table import ScanTable, NO_EXTENSION
+
+def default_worker_count() -> int:
+    """Número de trabalhadores da varredura: 'scan_workers' no app_config.json ou um valor por omissão."""
+    configured = settings.get_setting("scan_workers")
+    if isinstance(configured, int) and configured > 0:
+        return configured
+    # A varredura é dominada por I/O (NFS, discos de rede), por isso usamos mais threads que CPUs.
+    return min(32, (os.cpu_count() or 1) * 4)
+
+def file_extension(name: str) -> str:
+    return os.path.splitext(name)[1].lower() or NO_EXTENSION
+
+
+class WorkStealingPool:
+    """
+    Pool de threads com roubo de trabalho: cada trabalhador consome a sua própria fila
+    pelo topo (LIFO, boa localidade) e, quando fica sem trabalho, rouba tarefas do fundo
+    da fila de outro trabalhador. O handler devolve as novas tarefas geradas por cada tarefa.
+    """
+    def __init__(self, handler: Callable[[object], Optional[Iterable]], workers: int):
+        self._handler = handler
+        self._workers = max(1, workers)
+        self._queues: List[Deque] = [deque() for _ in range(self._workers)]
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    def _push(self, index: int, tasks: Iterable):
+        tasks = list(tasks)
+        if not tasks: return
+        with self._cond:
+            # O contador sobe antes de a tarefa ficar visível, para nunca chegar a zero com trabalho na fila.
+            self._pending += len(tasks)
+            self._queues[index].extend(tasks)
+            self._cond.notify(len(tasks))
+
+    def _take(self, index: int):
+        try:
+            return self._queues[index].pop()
+        except IndexError:
+            pass
+        for offset in range(1, self._workers):
+            try:
+                return self._queues[(index + offset) % self._workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _worker(self, index: int):
+        while True:
+            task = self._take(index)
+            if task is None:
+                with self._cond:
+                    if self._pending == 0:
+                        return
+                    self._cond.wait(0.05)
+                continue
+            try:
+                children = self._handler(task)
+                if children: self._push(index, children)
+            except Exception:
+                logging.error(f"Erro inesperado ao processar {task!r}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._pending -= 1
+                    if self._pending == 0: self._cond.notify_all()
+
+    def run(self, initial_tasks: Iterable):
+        self._push(0, initial_tasks)
+        threads = [threading.Thread(target=self._worker, args=(i,), name=f"scan-worker-{i}", daemon=True)
+                   for i in range(self._workers)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+
+class ScanProgress:
+    """
+    Contadores partilhados pelos trabalhadores da varredura. Em vez de um evento por pasta,
+    emite no máximo um evento agregado a cada 'interval' segundos: ficheiros, bytes, pastas,
+    ficheiros/s, pasta atual e uma estimativa do tempo restante (ETA) face a 'expected_bytes'.
+    """
+    def __init__(self, callback: Optional[Callable[[Dict], None]], expected_bytes: int, interval: float = 0.5):
+        self._callback = callback
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._start = self._last_emit = time.monotonic()
+        self.expected_bytes = expected_bytes
+        self.files = self.bytes = self.listed = self.reused = 0
+        self.current_dir = ""
+
+    def record(self, dirpath: str, files: int, size: int, reused: bool = False):
+        event = None
+        with self._lock:
+            self.files += files
+            self.bytes += size
+            if reused: self.reused += 1
+            else: self.listed += 1
+            self.current_dir = dirpath
+            now = time.monotonic()
+            if self._callback and now - self._last_emit >= self._interval:
+                self._last_emit = now
+                event = self._event(now)
+        # O callback corre fora do lock para não travar os outros trabalhadores
+        if event: self._callback(event)
+
+    def finish(self):
+        if self._callback:
+            with self._lock:
+                event = self._event(time.monotonic(), done=True)
+            self._callback(event)
+
+    def _event(self, now: float, done: bool = False) -> Dict:
+        elapsed = max(now - self._start, 1e-6)
+        fraction = 1.0 if done else min(self.bytes / self.expected_bytes, 0.99) if self.expected_bytes else 0.0
+        eta = elapsed * (1 - fraction) / fraction if 0 < fraction < 1 else None
+        return {"files": self.files, "bytes": self.bytes, "dirs": self.listed + self.reused,
+                "current_dir": self.current_dir, "files_per_sec": self.files / elapsed,
+                "elapsed": elapsed, "fraction": fraction, "eta_seconds": eta, "done": done}
+
+
+def expected_scan_bytes(path: str, previous: Optional[ScanTable] = None) -> int:
+    """
+    Volume esperado para o cálculo do ETA: o total da varredura anterior, se houver; senão o
+    espaço ocupado no volume (shutil.disk_usage), que é um limite superior para uma subpasta.
+    """
+    if previous is not None and len(previous):
+        return int(previous.dir_index.total_size[0])
+    try:
+        return shutil.disk_usage(path).used
+    except OSError:
+        return 0
+
+def scan_tree(path: str, workers: Optional[int] = None, previous: Optional[ScanTable] = None,
+              progress: Optional[Callable[[Dict], None]] = None, progress_interval: float = 0.5,
+              table: Optional[ScanTable] = None, job: Optional[Job] = None,
+              validate_files: bool = False) -> ScanTable:
+    """
+    Percorre 'path' com os.scandir em paralelo e escreve diretamente numa ScanTable colunar
+    (um lote por pasta), com os mesmos dados do antigo ciclo os.walk + os.stat.
+    O stat de cada entrada vem de DirEntry.stat(), que fica em cache na própria entrada
+    (e no Windows nem sequer custa uma chamada ao sistema).
+    As ligações simbólicas para pastas não são seguidas, como no os.walk por omissão, e as pastas
+    de dados do Analisador (reciclagem, cache, instantâneos; ver settings.data_dirs) ficam de fora.
+
+    Com 'previous' (uma varredura anterior da mesma raiz) a varredura é incremental: as pastas
+    cujo mtime/ctime não mudou são copiadas da tabela anterior sem voltar a ser listadas, e só as
+    suas subpastas recebem um stat. Alterações no conteúdo de um ficheiro que não mexem na pasta
+    (reescrita no mesmo sítio) só são detetadas numa varredura completa ou com 'validate_files',
+    em que cada ficheiro copiado recebe um stat para o tamanho e as datas.
+
+    'progress' recebe eventos agregados (ver ScanProgress) a partir das threads da varredura;
+    quem passar a sua própria 'table' (vazia) pode ler resultados parciais enquanto ela enche.
+    Com 'job', a varredura pára entre pastas enquanto estiver em pausa e, se for cancelada,
+    devolve o que já leu com table.complete = False.
+    """
+    table = table if table is not None else ScanTable(path)
+    previous_ids = {p: i for i, p in enumerate(previous.dir_paths)} if previous is not None else {}
+    stats = ScanProgress(progress, expected_scan_bytes(path, previous) if progress else 0, progress_interval)
+    skipped = settings.data_dirs()
+
+    def is_skipped(dirpath: str) -> bool:
+        return os.path.normcase(os.path.abspath(dirpath)) in skipped
+
+    def reuse(task: Tuple[str, int, float, float]) -> Optional[List[Tuple[str, int, float, float]]]:
+        dirpath, parent_id, dir_mtime, dir_ctime = task
+        old_id = previous_ids.get(dirpath)
+        if old_id is None or previous.dir_mtime.view()[old_id] != dir_mtime or previous.dir_ctime.view()[old_id] != dir_ctime:
+            return None
+        rows = previous.directory_files(old_id)
+        names, exts = previous.name.view()[rows], [previous.ext_categories[code] for code in previous.ext_code.view()[rows]]
+        sizes, mtimes, atimes = previous.size.view()[rows], previous.mtime.view()[rows], previous.atime.view()[rows]
+        devs, inos, nlinks = previous.dev.view()[rows], previous.ino.view()[rows], previous.nlink.view()[rows]
+        if validate_files:
+            # Só o conteúdo de cada ficheiro é relido; dev/ino/nlink ficam os da listagem que os registou
+            kept = np.ones(len(names), dtype=bool)
+            sizes, mtimes, atimes = sizes.copy(), mtimes.copy(), atimes.copy()
+            for position, name in enumerate(names):
+                try:
+                    file_stat = os.stat(os.path.join(dirpath, name))
+                except OSError as e:
+                    logging.warning(f"Ignorando ficheiro {os.path.join(dirpath, name)}: {e}")
+                    kept[position] = False
+                    continue
+                sizes[position], mtimes[position], atimes[position] = file_stat.st_size, file_stat.st_mtime, file_stat.st_atime
+            if not kept.all():
+                names, exts = names[kept], [ext for ext, keep in zip(exts, kept) if keep]
+                sizes, mtimes, atimes = sizes[kept], mtimes[kept], atimes[kept]
+                devs, inos, nlinks = devs[kept], inos[kept], nlinks[kept]
+        dir_id = table.add_directory(dirpath, parent_id, dir_mtime, dir_ctime, names, sizes, mtimes, atimes, exts,
+                                     devs, inos, nlinks)
+        stats.record(dirpath, len(sizes), int(sizes.sum()), reused=True)
+        subdirs = []
+        for child_id in previous.dir_index.children(old_id):
+            child_path = previous.dir_paths[child_id]
+            if is_skipped(child_path): continue
+            try:
+                child_stat = os.stat(child_path, follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(child_stat.st_mode):
+                subdirs.append((child_path, dir_id, child_stat.st_mtime, child_stat.st_ctime))
+        return subdirs
+
+    def visit(task: Tuple[str, int, float, float]) -> List[Tuple[str, int, float, float]]:
+        if job is not None and not job.checkpoint():
+            return []
+        if previous_ids:
+            reused = reuse(task)
+            if reused is not None:
+                return reused
+        dirpath, parent_id, dir_mtime, dir_ctime = task
+        names, sizes, mtimes, atimes, exts, subdirs = [], [], [], [], [], []
+        devs, inos, nlinks = [], [], []
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            # A reciclagem do Analisador na raiz de um volume não conta como conteúdo
+                            if entry.name == settings.STAGING_DIR_NAME and os.path.ismount(dirpath): continue
+                            if is_skipped(entry.path): continue
+                            if not entry.is_symlink():
+                                dir_stat = entry.stat()
+                                subdirs.append((entry.path, dir_stat.st_mtime, dir_stat.st_ctime))
+                            continue
+                        file_stat = entry.stat()
+                    except OSError as e:
+                        logging.warning(f"Ignorando ficheiro {entry.path}: {e}")
+                        continue
+                    names.append(entry.name)
+                    sizes.append(file_stat.st_size)
+                    mtimes.append(file_stat.st_mtime)
+                    atimes.append(file_stat.st_atime)
+                    exts.append(file_extension(entry.name))
+                    # No Windows o stat do DirEntry não traz dev/nlink (ficam a 0 = desconhecido)
+                    devs.append(file_stat.st_dev)
+                    inos.append(file_stat.st_ino or entry.inode())
+                    nlinks.append(file_stat.st_nlink)
+        except OSError as e:
+            logging.warning(f"Erro ao aceder a {dirpath}: {e.strerror}")
+        dir_id = table.add_directory(dirpath, parent_id, dir_mtime, dir_ctime, names, sizes, mtimes, atimes, exts,
+                                     devs, inos, nlinks)
+        stats.record(dirpath, len(names), sum(sizes))
+        return [(subdir, dir_id, mtime, ctime) for subdir, mtime, ctime in subdirs]
+
+    workers = workers or default_worker_count()
+    logging.info(f"Varredura {'incremental' if previous_ids else 'paralela'} de {path} com {workers} trabalhadores.")
+    root_stat = os.stat(path)
+    WorkStealingPool(visit, workers).run([(path, -1, root_stat.st_mtime, root_stat.st_ctime)])
+    stats.finish()
+    if job is not None and job.cancelled:
+        table.complete = False
+        logging.info(f"Varredura de {path} cancelada: resultado parcial com {len(table)} ficheiros.")
+    logging.info(f"Pastas listadas: {stats.listed}; reutilizadas da varredura anterior: {stats.reused}.")
+    return table
+
+
+def directory_size(path: str, max_entries: int = 200_000,
+                   should_continue: Optional[Callable[[], bool]] = None) -> Tuple[int, bool]:
+    """
+    Tamanho recursivo de uma pasta à maneira do 'du', para quando não há varredura em memória.
+    Pára ao fim de 'max_entries' entradas (ou quando should_continue() devolve False) e, nesse
+    caso, devolve o total parcial com complete = False: é um limite inferior do tamanho real.
+    Ligações físicas são contadas uma única vez e ligações simbólicas não são seguidas.
+    """
+    total, entries, stack, seen = 0, 0, [path], set()
+    while stack:
+        if entries >= max_entries or (should_continue is not None and not should_continue()):
+            return total, False
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    entries += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_nlink > 1:
+                        if (st.st_dev, st.st_ino) in seen: continue
+                        seen.add((st.st_dev, st.st_ino))
+                    total += st.st_size
+        except OSError:
+            continue
+    return total, True
+
@@ -0,0 +1,31 @@
+# settings.py
+import json
+import os
+from typing import Any, FrozenSet
+
+# O mesmo ficheiro usado por themes.py e i18n.py
+CONFIG_FILE = "app_config.json"
+# Pasta da reciclagem do Analisador na raiz de cada volume (ver bulk_actions; o scanner não entra nela)
+STAGING_DIR_NAME = ".analisador_lixo"
+# Pastas de dados do Analisador ao lado do app_config.json (reciclagem, cache e instantâneos)
+TRASH_DIR_NAME = "lixo"
+CACHE_DIR_NAME = "scan_cache"
+SNAPSHOT_DIR_NAME = "snapshots"
+
+def data_dir(name: str) -> str:
+    """Pasta de dados 'name' ao lado do app_config.json."""
+    return os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), name)
+
+def data_dirs() -> FrozenSet[str]:
+    """As pastas de dados do Analisador (normcase), que o scanner não percorre."""
+    return frozenset(os.path.normcase(data_dir(name)) for name in (TRASH_DIR_NAME, CACHE_DIR_NAME, SNAPSHOT_DIR_NAME))
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """Lê uma chave do ficheiro de configuração JSON, devolvendo o valor padrão se não existir."""
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f).get(key, default)
+    except (IOError, json.JSONDecodeError):
+        pass
+    return default
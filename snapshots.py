@@ -0,0 +1,176 @@
+# snapshots.py
+"""
+Instantâneos de varreduras e diferenças entre dois instantâneos ("o que cresceu desde a semana
+passada"). Um instantâneo é a ScanTable gravada em .npz comprimido (colunar), com a data e o
+total nos metadados. A diferença é calculada sobre ids de caminho: um hash de 64 bits do caminho
+relativo à raiz, obtido combinando o hash de cada pasta (calculado uma vez por pasta) com o hash
+do nome, sem montar as strings completas. Ficheiros e pastas dos dois lados são emparelhados
+por esses ids de forma vetorizada.
+"""
+import os
+import time
+import hashlib
+import logging
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import settings
+from scan_table import ScanTable
+
+# Multiplicador ímpar (razão áurea em 64 bits) para misturar o hash da pasta com o do nome
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class SnapshotInfo(NamedTuple):
+    path: str
+    root: str
+    taken_at: float
+    files: int
+    total_bytes: int
+
+
+class SnapshotDiff(NamedTuple):
+    files: pd.DataFrame         # status ('new', 'deleted', 'grown', 'shrunk'), path, size_old, size_new, delta, mtime
+    directories: pd.DataFrame   # status ('new', 'deleted', 'changed'), path, size_old, size_new, delta
+    old_taken_at: Optional[float]
+    new_taken_at: Optional[float]
+
+    @property
+    def total_delta(self) -> int:
+        """Variação do tamanho total da raiz, em bytes."""
+        dirs = self.directories
+        root = dirs[dirs['path_id'] == _ROOT_ID] if len(dirs) else dirs
+        return int(root['delta'].iloc[0]) if len(root) else 0
+
+    def count(self, status: str) -> int:
+        return int((self.files['status'] == status).sum())
+
+
+def snapshot_dir() -> str:
+    """Pasta dos instantâneos, ao lado do app_config.json."""
+    return settings.data_dir(settings.SNAPSHOT_DIR_NAME)
+
+def _root_key(root: str) -> str:
+    return hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+def save_snapshot(table: ScanTable, directory: Optional[str] = None, taken_at: Optional[float] = None) -> SnapshotInfo:
+    """Grava a varredura como instantâneo; uma varredura parcial daria diferenças falsas e é recusada."""
+    if not table.complete:
+        raise ValueError("Não é possível gravar um instantâneo de uma varredura incompleta.")
+    directory = directory or snapshot_dir()
+    taken_at = time.time() if taken_at is None else taken_at
+    os.makedirs(directory, exist_ok=True)
+    total = int(table.dir_index.total_size[0]) if table.dir_count else 0
+    path = os.path.join(directory, f"{_root_key(table.root)}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(taken_at))}.npz")
+    table.save(path, compressed=True, extra_meta={"taken_at": taken_at, "total_bytes": total})
+    logging.info(f"Instantâneo de {table.root} gravado em {path} ({len(table)} ficheiros).")
+    return SnapshotInfo(path, table.root, taken_at, len(table), total)
+
+def list_snapshots(root: Optional[str] = None, directory: Optional[str] = None) -> List[SnapshotInfo]:
+    """Instantâneos gravados (só os de 'root', se indicada), do mais recente para o mais antigo."""
+    directory = directory or snapshot_dir()
+    if not os.path.isdir(directory): return []
+    prefix = _root_key(root) + "-" if root else ""
+    found = []
+    for entry in os.scandir(directory):
+        if not (entry.name.endswith(".npz") and entry.name.startswith(prefix)): continue
+        try:
+            meta = ScanTable.read_meta(entry.path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Instantâneo inválido em {entry.path}, a ignorar: {e}")
+            continue
+        if root and meta.get("root") != root: continue
+        found.append(SnapshotInfo(entry.path, meta["root"], float(meta.get("taken_at", entry.stat().st_mtime)),
+                                  int(meta["files"]), int(meta.get("total_bytes", 0))))
+    return sorted(found, key=lambda info: info.taken_at, reverse=True)
+
+def load_snapshot(path: str) -> ScanTable:
+    return ScanTable.load(path)
+
+def delete_snapshot(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# --- Ids de caminho ---
+
+def _hash_strings(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+_ROOT_ID = int(_hash_strings([""])[0])
+
+def dir_path_ids(table: ScanTable) -> np.ndarray:
+    """Hash de 64 bits do caminho de cada pasta relativo à raiz (a raiz é '')."""
+    with table._lock:
+        paths = table.dir_paths[:table.dir_count]
+    root = paths[0] if paths else table.root
+    return _hash_strings([p[len(root):].lstrip("\\/") if p.startswith(root) else p for p in paths])
+
+def file_path_ids(table: ScanTable, dir_ids: Optional[np.ndarray] = None) -> np.ndarray:
+    """Hash de 64 bits do caminho relativo de cada ficheiro: hash da pasta misturado com o hash do nome."""
+    dir_ids = dir_path_ids(table) if dir_ids is None else dir_ids
+    if not len(table): return np.zeros(0, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        return (dir_ids[table.file_dir.view()] * _MIX) ^ _hash_strings(table.name.view())
+
+
+def _match(old_ids: np.ndarray, new_ids: np.ndarray):
+    """Posições emparelhadas (old, new) e máscaras das linhas só de um dos lados."""
+    _, old_pos, new_pos = np.intersect1d(old_ids, new_ids, return_indices=True)
+    only_old = np.ones(len(old_ids), dtype=bool); only_old[old_pos] = False
+    only_new = np.ones(len(new_ids), dtype=bool); only_new[new_pos] = False
+    return old_pos, new_pos, only_old, only_new
+
+def diff_tables(old: ScanTable, new: ScanTable, old_taken_at: Optional[float] = None,
+                new_taken_at: Optional[float] = None) -> SnapshotDiff:
+    """
+    Diferença entre duas varreduras da mesma árvore: ficheiros novos, apagados, que cresceram ou
+    diminuíram (os que não mudaram de tamanho ficam de fora) e a variação do tamanho recursivo de
+    cada pasta. As linhas vêm ordenadas da maior subida para a maior descida.
+    """
+    old_dirs, new_dirs = dir_path_ids(old), dir_path_ids(new)
+    old_ids, new_ids = file_path_ids(old, old_dirs), file_path_ids(new, new_dirs)
+    old_pos, new_pos, only_old, only_new = _match(old_ids, new_ids)
+    old_size, new_size = old.size.view(), new.size.view()
+    changed = old_size[old_pos] != new_size[new_pos]
+    old_pos, new_pos = old_pos[changed], new_pos[changed]
+
+    parts = []
+    if only_new.any():
+        rows = new.with_paths(new.frame[only_new])
+        parts.append(pd.DataFrame({'status': 'new', 'path': rows['path'].to_numpy(), 'size_old': 0,
+                                   'size_new': rows['size'].to_numpy(), 'mtime': rows['mtime'].to_numpy()}))
+    if only_old.any():
+        rows = old.with_paths(old.frame[only_old])
+        parts.append(pd.DataFrame({'status': 'deleted', 'path': rows['path'].to_numpy(), 'size_old': rows['size'].to_numpy(),
+                                   'size_new': 0, 'mtime': rows['mtime'].to_numpy()}))
+    if len(new_pos):
+        rows = new.with_paths(new.frame.iloc[new_pos])
+        sizes_old, sizes_new = old_size[old_pos], new_size[new_pos]
+        parts.append(pd.DataFrame({'status': np.where(sizes_new > sizes_old, 'grown', 'shrunk'), 'path': rows['path'].to_numpy(),
+                                   'size_old': sizes_old, 'size_new': sizes_new, 'mtime': rows['mtime'].to_numpy()}))
+    files = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        {'status': pd.Series(dtype=object), 'path': pd.Series(dtype=object), 'size_old': pd.Series(dtype=np.int64),
+         'size_new': pd.Series(dtype=np.int64), 'mtime': pd.Series(dtype=np.float64)})
+    files['delta'] = files['size_new'].astype(np.int64) - files['size_old'].astype(np.int64)
+    files = files.sort_values('delta', ascending=False, kind='stable').reset_index(drop=True)
+
+    # Pastas: tamanho recursivo dos dois lados, emparelhado pelos ids das pastas
+    old_total, new_total = old.dir_index.total_size, new.dir_index.total_size
+    d_old, d_new, d_only_old, d_only_new = _match(old_dirs, new_dirs)
+    directories = pd.DataFrame({
+        'status': np.concatenate([np.full(len(d_old), 'changed', dtype=object), np.full(int(d_only_new.sum()), 'new', dtype=object),
+                                  np.full(int(d_only_old.sum()), 'deleted', dtype=object)]),
+        'path': np.concatenate([np.asarray(new.dir_paths, dtype=object)[d_new], np.asarray(new.dir_paths, dtype=object)[d_only_new],
+                                np.asarray(old.dir_paths, dtype=object)[d_only_old]]),
+        'path_id': np.concatenate([new_dirs[d_new], new_dirs[d_only_new], old_dirs[d_only_old]]),
+        'size_old': np.concatenate([old_total[d_old], np.zeros(int(d_only_new.sum()), dtype=np.int64), old_total[d_only_old]]),
+        'size_new': np.concatenate([new_total[d_new], new_total[d_only_new], np.zeros(int(d_only_old.sum()), dtype=np.int64)]),
+    })
+    directories['delta'] = directories['size_new'] - directories['size_old']
+    directories = directories[directories['delta'] != 0].sort_values('delta', ascending=False, kind='stable').reset_index(drop=True)
+    return SnapshotDiff(files, directories, old_taken_at, new_taken_at)
@@ -0,0 +1,104 @@
+# tests/test_archiver.py
+import os
+import sys
+import tarfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import archiver
+from jobs import Job
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Ficheiros com conteúdo pouco compressível, em duas pastas; devolve {caminho: conteúdo}."""
+    (tmp_path / "antigos" / "sub").mkdir(parents=True)
+    files = {}
+    for i, name in enumerate(["a.log", "b.log", "sub/c.log", "sub/d.log"]):
+        path = str(tmp_path / "antigos" / name)
+        data = os.urandom(3000 + 500 * i)
+        with open(path, "wb") as f: f.write(data)
+        files[path] = data
+    return files
+
+
+def archive_contents(target, fmt):
+    if fmt == "zip":
+        with zipfile.ZipFile(target) as zf:
+            return {info.filename: zf.read(info) for info in zf.infolist()}
+    with open(target, "rb") as raw, archiver._tar_stream(raw, fmt) as stream, tarfile.open(fileobj=stream, mode="r|") as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar if member.isfile()}
+
+
+def by_arcname(files):
+    return dict(zip(archiver.archive_names(list(files)), files.values()))
+
+
+@pytest.mark.parametrize("fmt", archiver.available_formats())
+def test_archive_verifies_then_deletes(tmp_path, sources, fmt):
+    target = str(tmp_path / f"arquivo{archiver.FORMATS[fmt][0]}")
+    result = archiver.archive_files(list(sources), target, workers=2)
+    assert result.complete and not result.failed
+    assert sorted(result.deleted) == sorted(sources)
+    assert result.stats['verified'].all() and result.stats['deleted'].all()
+    assert not any(os.path.exists(path) for path in sources)
+    assert not archiver.has_journal(target)
+    assert archive_contents(target, fmt) == by_arcname(sources)
+
+
+def test_changed_source_is_kept(tmp_path, sources):
+    target = str(tmp_path / "arquivo.tar.gz")
+    changed = next(iter(sources))
+    def progress(event):
+        # Alterado depois de lido para o arquivo, antes da fase de apagar
+        if event["phase"] == "verify" and event["path"] == changed:
+            with open(changed, "ab") as f: f.write(b"mais")
+    result = archiver.archive_files(list(sources), target, workers=1, progress=progress)
+    assert result.complete
+    assert result.failed == {changed: "alterado depois de arquivado"}
+    assert os.path.getsize(changed) == len(sources[changed]) + 4
+    assert sorted(result.deleted) == sorted(set(sources) - {changed})
+
+
+def test_unverified_member_is_not_deleted(tmp_path, sources):
+    target = str(tmp_path / "arquivo.tar.gz")
+    archiver.archive_files(list(sources), target, workers=1, delete=False)
+    paths = list(sources)
+    state = archiver._State("tar.gz", 6, [])
+    for path in paths:
+        st = os.stat(path)
+        state.members[path] = {"path": path, "size": st.st_size, "mtime": st.st_mtime, "changed": False}
+    state.verified = set(paths[1:])
+    journal = archiver.ArchiveJournal(archiver.journal_path(target))
+    assert archiver._delete_sources(state, journal, None, lambda member: None)
+    assert state.failed == {paths[0]: "não verificado no arquivo"}
+    assert os.path.exists(paths[0]) and not any(os.path.exists(path) for path in paths[1:])
+
+
+@pytest.mark.parametrize("fmt", archiver.available_formats())
+def test_resume_after_interruption(tmp_path, sources, monkeypatch, fmt):
+    # Segmentos pequenos: os primeiros membros chegam ao disco (e ao diário) antes do cancelamento
+    monkeypatch.setattr(archiver, "SEGMENT_BYTES", 1024)
+    target = str(tmp_path / f"arquivo{archiver.FORMATS[fmt][0]}")
+    job = Job()
+    def progress(event):
+        if event["phase"] == "write": job.cancel()
+    result = archiver.archive_files(list(sources), target, workers=1, job=job, progress=progress)
+    assert not result.complete and not result.deleted
+    assert archiver.has_journal(target)
+    assert all(os.path.exists(path) for path in sources)
+
+    # Uma queda a meio deixa o fim do arquivo e do diário por escrever
+    with open(target, "r+b") as f: f.truncate(os.path.getsize(target) * 2 // 3)
+    with open(archiver.journal_path(target), "a", encoding="utf-8") as f: f.write('{"event": "mem')
+
+    with pytest.raises(FileExistsError):
+        archiver.archive_files(list(sources), target)
+    result = archiver.resume_archive(target, workers=1)
+    assert result.complete and not result.failed
+    assert sorted(result.deleted) == sorted(sources)
+    assert not archiver.has_journal(target)
+    assert archive_contents(target, fmt) == by_arcname(sources)
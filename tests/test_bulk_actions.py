@@ -0,0 +1,170 @@
+# tests/test_bulk_actions.py
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import bulk_actions
+import retention
+import scan_cache
+import scanner
+import settings
+from engine import Engine
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # A reciclagem fica ao lado do app_config.json, aqui dentro da própria raiz varrida
+    app = tmp_path / "app"
+    app.mkdir()
+    monkeypatch.setattr(settings, "CONFIG_FILE", str(app / "app_config.json"))
+    monkeypatch.chdir(app)
+    data = tmp_path / "data"
+    (data / "copias").mkdir(parents=True)
+    for path in (data / "x.bin", data / "copias" / "x.bin", data / "copias" / "x_antigo.bin"):
+        path.write_bytes(b"a" * 4096)
+    return tmp_path
+
+
+def duplicate_paths(engine, root):
+    table = engine.scan(str(root), refresh=True, use_cache=False).table
+    return table, engine.find_duplicates(table, workers=1).frame
+
+
+def test_rescan_ignores_trash(tree):
+    engine = Engine(session=scan_cache.SessionCache())
+    table, groups = duplicate_paths(engine, tree)
+    assert len(groups) == 3
+    plan = engine.retention_plan(groups, [retention.Rule("shortest")])
+    outcome = engine.apply_plan(table, plan, "trash", groups)
+    assert len(outcome.batch.file_ids) == 2
+    assert os.listdir(os.path.join(bulk_actions.trash_dir(), outcome.batch.batch_id))
+
+    # As cópias na reciclagem não aparecem na nova varredura, nem como duplicados da que ficou
+    table, groups = duplicate_paths(engine, tree)
+    assert groups.empty
+    assert not any(path.startswith(bulk_actions.trash_dir()) for path in table.with_paths(table.frame)['path'])
+
+
+def test_recycled_rows_are_refused(tree):
+    # Uma reciclagem de volume fora da raiz do volume é varrida, mas nunca tratada
+    staged = tree / "data" / settings.STAGING_DIR_NAME / "lote"
+    staged.mkdir(parents=True)
+    (staged / "x.bin").write_bytes(b"a" * 4096)
+    engine = Engine(session=scan_cache.SessionCache())
+    table, groups = duplicate_paths(engine, tree)
+    assert str(staged / "x.bin") in set(groups['path'])
+
+    plan = engine.retention_plan(groups, [retention.Rule("under", (str(staged),))])
+    assert str(staged / "x.bin") not in set(plan.frame['path'])
+    assert plan.count("delete") == 2
+
+    rows = table.with_paths(table.frame)
+    recycled = rows[rows['path'] == str(staged / "x.bin")]
+    batch = bulk_actions.run_batch(table, recycled.index, "delete")
+    assert batch.failed == {str(staged / "x.bin"): "na reciclagem do Analisador"}
+    assert (staged / "x.bin").exists()
+
+
+def file_ids(table, *paths):
+    rows = table.with_paths(table.frame)
+    return rows.index[rows['path'].isin([str(path) for path in paths])]
+
+
+def test_trash_and_undo(tree):
+    data = tree / "data"
+    table = scanner.scan_tree(str(data))
+    batch = bulk_actions.run_batch(table, file_ids(table, data / "x.bin", data / "copias" / "x.bin"), "trash")
+    assert batch.complete and not batch.failed and batch.bytes == 8192
+    assert not (data / "x.bin").exists()
+    assert [info.files for info in bulk_actions.list_batches()] == [2]
+
+    undone = bulk_actions.undo_batch(batch.batch_id)
+    assert sorted(undone.restored) == sorted([str(data / "x.bin"), str(data / "copias" / "x.bin")])
+    assert (data / "x.bin").read_bytes() == b"a" * 4096
+    assert bulk_actions.list_batches() == []
+    assert os.listdir(bulk_actions.trash_dir()) == []
+
+
+def test_changed_file_is_refused(tree):
+    data = tree / "data"
+    table = scanner.scan_tree(str(data))
+    (data / "x.bin").write_bytes(b"b" * 100)
+    batch = bulk_actions.run_batch(table, file_ids(table, data / "x.bin"), "delete")
+    assert batch.failed == {str(data / "x.bin"): "alterado desde a varredura"}
+    assert len(batch.file_ids) == 0
+    assert (data / "x.bin").read_bytes() == b"b" * 100
+
+
+def test_purge_expired(tree, monkeypatch):
+    data = tree / "data"
+    table = scanner.scan_tree(str(data))
+    batch = bulk_actions.run_batch(table, file_ids(table, data / "x.bin"), "trash")
+    assert bulk_actions.purge_expired(days=1) == 0
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 2 * 86400)
+    assert bulk_actions.purge_expired(days=1) == 4096
+    assert not os.path.exists(bulk_actions.journal_path(batch.batch_id))
+    assert not os.path.exists(os.path.join(bulk_actions.trash_dir(), batch.batch_id))
+    assert not (data / "x.bin").exists()
+
+
+@pytest.mark.parametrize("action", bulk_actions.ACTIONS)
+def test_replace_with_hardlink(tree, action):
+    data = tree / "data"
+    keeper, copy = data / "x.bin", data / "copias" / "x.bin"
+    original_inode = copy.stat().st_ino
+    table = scanner.scan_tree(str(data))
+    ids = file_ids(table, copy)
+    batch = bulk_actions.run_batch(table, ids, action, link_targets={int(ids[0]): str(keeper)})
+    assert batch.linked.tolist() == ids.tolist()
+    assert os.path.samefile(copy, keeper) and copy.read_bytes() == b"a" * 4096
+    assert not os.path.exists(f"{copy}.{bulk_actions.LINK_SUFFIX}")
+    if action == "trash":
+        # Repor tira a ligação e devolve o ficheiro original
+        assert bulk_actions.undo_batch(batch.batch_id).restored == [str(copy)]
+        assert copy.stat().st_ino == original_inode and not os.path.samefile(copy, keeper)
+
+
+def test_hardlink_to_changed_target_keeps_original(tree):
+    data = tree / "data"
+    keeper, copy = data / "x.bin", data / "copias" / "x.bin"
+    table = scanner.scan_tree(str(data))
+    keeper.write_bytes(b"b" * 10)
+    ids = file_ids(table, copy)
+    batch = bulk_actions.run_batch(table, ids, "delete", link_targets={int(ids[0]): str(keeper)})
+    assert list(batch.failed) == [str(copy)] and len(batch.linked) == 0
+    assert copy.read_bytes() == b"a" * 4096 and not os.path.samefile(copy, keeper)
+
+
+def test_undo_after_interrupted_block(tree):
+    data = tree / "data"
+    table = scanner.scan_tree(str(data))
+    batch = bulk_actions.run_batch(table, file_ids(table, data / "x.bin", data / "copias" / "x.bin"), "trash")
+    # Interrupção a meio do bloco: só as anotações feitas antes de cada mudança chegaram ao diário
+    journal = bulk_actions.journal_path(batch.batch_id)
+    with open(journal, encoding="utf-8") as f:
+        lines = [line for line in f if json.loads(line)["event"] in ("start", "staging")]
+    with open(journal, "w", encoding="utf-8") as f: f.writelines(lines)
+    assert [info.files for info in bulk_actions.list_batches()] == [2]
+
+    undone = bulk_actions.undo_batch(batch.batch_id)
+    assert len(undone.restored) == 2 and not undone.failed
+    assert (data / "x.bin").exists() and (data / "copias" / "x.bin").exists()
+
+
+def test_announced_file_that_never_moved_is_not_staged(tree):
+    data = tree / "data"
+    table = scanner.scan_tree(str(data))
+    batch = bulk_actions.run_batch(table, file_ids(table, data / "x.bin"), "trash")
+    bulk_actions.undo_batch(batch.batch_id)
+    # Anotado mas ainda no sítio original (a interrupção veio antes do rename)
+    records = [{"event": "start", "batch_id": "lote", "action": "trash", "root": str(data), "created": time.time(), "files": 1},
+               {"event": "staging", "id": 0, "path": str(data / "x.bin"),
+                "staged": os.path.join(bulk_actions.trash_dir(), "lote", "00000000_x.bin"), "size": 4096, "mtime": 0.0}]
+    bulk_actions._append("lote", records)
+    assert [info.restorable for info in bulk_actions.list_batches()] == [False]
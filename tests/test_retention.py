@@ -0,0 +1,88 @@
+# tests/test_retention.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+import retention
+from retention import Rule
+
+
+def groups(*rows):
+    """Resultado de find_duplicates com as colunas que o plano usa; o id da linha é a posição."""
+    frame = pd.DataFrame(rows, columns=['group_id', 'path', 'size', 'mtime', 'dev', 'ino', 'nlink'])
+    return frame.sort_values(['group_id', 'path'])
+
+
+@pytest.fixture
+def copies():
+    return groups((0, "/dados/mestre/foto.jpg", 100, 10.0, 1, 11, 1),
+                  (0, "/backup/2023/foto.jpg", 100, 30.0, 1, 12, 1),
+                  (0, "/b/foto.jpg", 100, 20.0, 1, 13, 1),
+                  (1, "/dados/doc.orig", 50, 5.0, 1, 21, 1),
+                  (1, "/dados/doc.txt", 50, 1.0, 1, 22, 1))
+
+
+def keepers(plan):
+    frame = plan.frame
+    return frame[frame['action'] == "keep"].groupby('group_id')['path'].first().to_dict()
+
+
+@pytest.mark.parametrize("rules, expected", [
+    ([Rule("newest")], {0: "/backup/2023/foto.jpg", 1: "/dados/doc.orig"}),
+    ([Rule("oldest")], {0: "/dados/mestre/foto.jpg", 1: "/dados/doc.txt"}),
+    ([Rule("shortest")], {0: "/b/foto.jpg", 1: "/dados/doc.txt"}),
+    ([Rule("under", ("/nada", "/dados/mestre")), Rule("newest")], {0: "/dados/mestre/foto.jpg", 1: "/dados/doc.orig"}),
+    ([Rule("regex", (r"\.orig$",)), Rule("oldest")], {0: "/dados/mestre/foto.jpg", 1: "/dados/doc.orig"}),
+])
+def test_keeper_choice(copies, rules, expected):
+    plan = retention.build_plan(copies, rules)
+    assert keepers(plan) == expected
+    assert plan.count("keep") == 2 and plan.count("delete") == 3
+    assert plan.reclaimable_bytes == 2 * 100 + 50
+
+
+def test_reclaimable_with_hardlinks():
+    plan = retention.build_plan(groups(
+        (0, "/a/keep.bin", 100, 1.0, 1, 1, 2),
+        (0, "/a/keep_link.bin", 100, 1.0, 1, 1, 2),      # ligação da guardada: fica e não liberta nada
+        (0, "/b/copy.bin", 100, 1.0, 1, 2, 2),
+        (0, "/b/copy_link.bin", 100, 1.0, 1, 2, 2),      # as duas ligações do inode 2 são tratadas: liberta 100
+        (0, "/c/shared.bin", 100, 1.0, 1, 3, 3)),        # uma ligação fora da varredura: não liberta nada
+        [Rule("shortest")])
+    frame = plan.frame.set_index('path')
+    assert frame.loc["/a/keep_link.bin", 'action'] == "keep"
+    assert frame['reclaimable'].to_dict() == {"/a/keep.bin": 0, "/a/keep_link.bin": 0, "/b/copy.bin": 100,
+                                              "/b/copy_link.bin": 0, "/c/shared.bin": 0}
+    assert plan.reclaimable_bytes == 100 and plan.count("delete") == 3
+
+
+def test_hardlink_mode_skips_other_volumes():
+    plan = retention.build_plan(groups(
+        (0, "/a/keep.bin", 100, 1.0, 1, 1, 1),
+        (0, "/a/same_volume.bin", 100, 1.0, 1, 2, 1),
+        (0, "/mnt/other.bin", 100, 1.0, 2, 1, 1)),       # mesmo número de inode, outro volume
+        [Rule("shortest")], mode="hardlink")
+    assert plan.frame.set_index('path')['action'].to_dict() == {
+        "/a/keep.bin": "keep", "/a/same_volume.bin": "hardlink", "/mnt/other.bin": "keep"}
+    assert plan.reclaimable_bytes == 100
+
+
+def test_unknown_dev_uses_the_drive(monkeypatch):
+    # Varredura do Windows: dev fica a 0 e o volume sai da unidade do caminho
+    monkeypatch.setattr(os.path, "splitdrive", lambda path: (path[:2], path[2:]) if path[1:2] == ":" else ("", path))
+    plan = retention.build_plan(groups(
+        (0, "C:/a/keep.bin", 100, 1.0, 0, 7, 0),
+        (0, "C:/b/copy.bin", 100, 1.0, 0, 8, 0),
+        (0, "D:/a/keep.bin", 100, 1.0, 0, 7, 0)),        # o mesmo índice de ficheiro NTFS noutra unidade
+        [Rule("oldest")], mode="hardlink")
+    assert plan.frame.set_index('path')['action'].to_dict() == {
+        "C:/a/keep.bin": "keep", "C:/b/copy.bin": "hardlink", "D:/a/keep.bin": "keep"}
+
+    plan = retention.build_plan(plan.frame.assign(dev=0, ino=[7, 8, 7], nlink=0), [Rule("oldest")])
+    assert plan.frame.set_index('path')['action'].to_dict() == {
+        "C:/a/keep.bin": "keep", "C:/b/copy.bin": "delete", "D:/a/keep.bin": "delete"}
+    assert plan.reclaimable_bytes == 200
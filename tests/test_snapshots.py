@@ -0,0 +1,53 @@
+# tests/test_snapshots.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import scan_cache
+import settings
+import snapshots
+from engine import Engine
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # Instantâneos e cache de varreduras ficam ao lado do app_config.json: aqui, numa pasta temporária
+    monkeypatch.setattr(settings, "CONFIG_FILE", str(tmp_path / "app_config.json"))
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "root.txt").write_bytes(b"x" * 10)
+    (root / "sub" / "a.log").write_bytes(b"y" * 20)
+    return str(root)
+
+
+def test_diff_sees_file_grown_in_place(tree):
+    engine = Engine(session=scan_cache.SessionCache())
+    table = engine.scan(tree, use_cache=True).table
+    old = engine.save_snapshot(table)
+    directory_mtime = os.stat(tree).st_mtime
+    with open(os.path.join(tree, "root.txt"), "ab") as f: f.write(b"z" * 100000)
+    assert os.stat(tree).st_mtime == directory_mtime
+
+    # A tabela mostrada (da sessão) é a de antes; o diff tem de ir ao disco
+    current = engine.scan(tree, use_cache=True).table
+    diff = engine.diff(old, current)
+    grown = diff.files.set_index('path')
+    assert grown.loc[os.path.join(tree, "root.txt"), 'status'] == "grown"
+    assert grown.loc[os.path.join(tree, "root.txt"), 'delta'] == 100000
+    assert diff.total_delta == 100000
+
+
+def test_snapshot_after_growth_in_place(tree):
+    engine = Engine(session=scan_cache.SessionCache())
+    table = engine.scan(tree, use_cache=True).table
+    first = engine.save_snapshot(table)
+    with open(os.path.join(tree, "sub", "a.log"), "ab") as f: f.write(b"z" * 500)
+
+    second = engine.save_snapshot(engine.scan(tree, use_cache=True).table)
+    assert second.total_bytes - first.total_bytes == 500
+    saved = snapshots.load_snapshot(second.path)
+    sizes = saved.with_paths(saved.frame).set_index('path')['size']
+    assert sizes[os.path.join(tree, "sub", "a.log")] == 520
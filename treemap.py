@@ -0,0 +1,193 @@
+# treemap.py
+import os
+import zlib
+from collections import OrderedDict
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scan_table import ScanTable
+
+# Cores das pastas por profundidade e dos ficheiros por extensão (paleta 'tab10')
+DIR_COLORS = ('#1f77b4', '#2ca02c', '#9467bd', '#8c564b', '#17becf', '#7f7f7f')
+FILE_COLORS = ('#ff7f0e', '#d62728', '#e377c2', '#bcbd22', '#aec7e8', '#98df8a', '#ffbb78', '#c5b0d5')
+REST_COLOR = '#555555'
+
+
+class TreemapItem(NamedTuple):
+    x: float
+    y: float
+    w: float
+    h: float
+    depth: int
+    kind: str       # 'dir', 'file' ou 'rest' (itens pequenos demais agrupados num só bloco)
+    key: int        # id da pasta, linha do ficheiro ou -1
+    label: str
+    size: int
+
+
+def item_color(item: TreemapItem) -> str:
+    if item.kind == 'dir': return DIR_COLORS[item.depth % len(DIR_COLORS)]
+    if item.kind == 'rest': return REST_COLOR
+    ext = os.path.splitext(item.label)[1].lower().encode('utf-8', 'surrogatepass')
+    return FILE_COLORS[zlib.crc32(ext) % len(FILE_COLORS)]
+
+
+def squarify(areas: Sequence[float], x: float, y: float, width: float, height: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Algoritmo 'squarified' (Bruls, Huizing e van Wijk): 'areas' por ordem decrescente e somando
+    width*height. Cada linha cresce enquanto a pior proporção dos seus retângulos melhora.
+    """
+    rects = []
+    i, count = 0, len(areas)
+    while i < count:
+        short = min(width, height)
+        if short <= 0: break
+        row_sum = row_min = row_max = areas[i]
+        worst = max(short * short * row_max / (row_sum * row_sum), row_sum * row_sum / (short * short * row_min))
+        j = i + 1
+        while j < count:
+            area = areas[j]
+            total, low, high = row_sum + area, min(row_min, area), max(row_max, area)
+            candidate = max(short * short * high / (total * total), total * total / (short * short * low))
+            if candidate > worst: break
+            row_sum, row_min, row_max, worst = total, low, high, candidate
+            j += 1
+        if width >= height:
+            # A linha ocupa uma coluna à esquerda do espaço livre
+            thickness = row_sum / height
+            offset = y
+            for area in areas[i:j]:
+                rects.append((x, offset, thickness, area / thickness)); offset += area / thickness
+            x += thickness; width -= thickness
+        else:
+            thickness = row_sum / width
+            offset = x
+            for area in areas[i:j]:
+                rects.append((offset, y, area / thickness, thickness)); offset += area / thickness
+            y += thickness; height -= thickness
+        i = j
+    return rects
+
+
+def _place(sizes: np.ndarray, width: float, height: float, min_area: float) -> Tuple[np.ndarray, List[Tuple[float, float, float, float]], int]:
+    """
+    Ordena por tamanho e corta os itens cuja área ficaria abaixo de 'min_area' (nível de detalhe):
+    esses juntam-se num último bloco. Devolve a ordem dos itens desenhados, os retângulos e o
+    tamanho agrupado no bloco final (0 se não houver).
+    """
+    positive = np.flatnonzero(sizes > 0)
+    order = positive[np.argsort(-sizes[positive], kind='stable')]
+    total = float(sizes[order].sum())
+    if total <= 0 or width <= 0 or height <= 0: return order[:0], [], 0
+    scale = width * height / total
+    visible = int(np.searchsorted(-sizes[order] * scale, -min_area, side='right'))
+    rest = int(sizes[order[visible:]].sum())
+    areas = list(sizes[order[:visible]] * scale)
+    if rest: areas.append(rest * scale)
+    return order[:visible], squarify(areas, 0.0, 0.0, width, height), rest
+
+
+class TreemapLayout:
+    """
+    Treemap de toda a hierarquia de uma ScanTable, calculado a partir do índice de tamanhos
+    (DirIndex). Desce na árvore em largura até os retângulos ficarem menores que 'min_side'
+    píxeis ou até 'max_items' retângulos; o que fica abaixo do limite é agrupado num bloco.
+    A disposição de cada pasta é guardada em cache por (pasta, largura, altura), por isso
+    voltar a uma pasta (ou redesenhar ao mesmo tamanho) não volta a calcular nada.
+    """
+    def __init__(self, table: ScanTable, min_side: int = 6, max_items: int = 4000,
+                 header: int = 14, padding: int = 2, cache_size: int = 20000):
+        self.table = table
+        self.min_side, self.max_items = min_side, max_items
+        self.header, self.padding = header, padding
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[int, int, int], List[TreemapItem]]' = OrderedDict()
+        self._index = None
+
+    def _node(self, dir_id: int, width: int, height: int) -> List[TreemapItem]:
+        key = (dir_id, width, height)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        index, table = self._index, self.table
+        children = index.children(dir_id)
+        files = table.directory_files(dir_id)
+        file_sizes = table.size.view()[files]
+        sizes = np.concatenate([index.total_size[children].astype(np.int64), file_sizes.astype(np.int64)])
+        order, rects, rest = _place(sizes, width, height, self.min_side * self.min_side)
+        names = table.name.view()
+        items = []
+        for position, (x, y, w, h) in zip(order, rects):
+            if position < len(children):
+                child = int(children[position])
+                items.append(TreemapItem(x, y, w, h, 0, 'dir', child, os.path.basename(table.dir_paths[child]), int(sizes[position])))
+            else:
+                row = files.start + int(position) - len(children)
+                items.append(TreemapItem(x, y, w, h, 0, 'file', row, names[row], int(sizes[position])))
+        if rest:
+            x, y, w, h = rects[-1]
+            items.append(TreemapItem(x, y, w, h, 0, 'rest', -1, "", rest))
+        self._cache[key] = items
+        if len(self._cache) > self.cache_size: self._cache.popitem(last=False)
+        return items
+
+    def layout(self, root_id: int, width: int, height: int) -> List[TreemapItem]:
+        index = self.table.dir_index
+        if index is not self._index:
+            # A tabela mudou (varredura nova ou ainda em curso): as disposições antigas já não valem
+            self._index = index
+            self._cache.clear()
+        size = int(index.total_size[root_id])
+        items = [TreemapItem(0, 0, width, height, 0, 'dir', root_id, self.table.dir_paths[root_id], size)]
+        queue = [items[0]]
+        while queue and len(items) < self.max_items:
+            next_level = []
+            for node in queue:
+                pad = self.padding
+                top = self.header if node.h >= 3 * self.header else pad
+                inner_w, inner_h = int(node.w - 2 * pad), int(node.h - top - pad)
+                if inner_w < self.min_side or inner_h < self.min_side: continue
+                for child in self._node(node.key, inner_w, inner_h):
+                    placed = child._replace(x=child.x + node.x + pad, y=child.y + node.y + top, depth=node.depth + 1)
+                    items.append(placed)
+                    if placed.kind == 'dir' and placed.w >= 3 * self.min_side and placed.h >= 3 * self.min_side:
+                        next_level.append(placed)
+                if len(items) >= self.max_items: break
+            queue = next_level
+        return items
+
+
+def layout_frame(dataframe: pd.DataFrame, width: int, height: int, min_side: int = 6) -> List[TreemapItem]:
+    """Treemap de um só nível de um DataFrame com 'name' e 'size' (por exemplo, durante a varredura)."""
+    if dataframe.empty: return []
+    sizes = dataframe['size'].to_numpy(dtype=np.int64)
+    order, rects, rest = _place(sizes, width, height, min_side * min_side)
+    names = dataframe['name'].to_numpy(dtype=object)
+    items = [TreemapItem(x, y, w, h, 1, 'dir', -1, str(names[position]), int(sizes[position]))
+             for position, (x, y, w, h) in zip(order, rects)]
+    if rest:
+        x, y, w, h = rects[-1]
+        items.append(TreemapItem(x, y, w, h, 1, 'rest', -1, "", rest))
+    return items
+
+
+def save_png(items: List[TreemapItem], path: str, width: int, height: int, background: str, text_color: str,
+             max_depth: int = 3):
+    """Grava o treemap como imagem (para o relatório PDF) sem usar o pyplot nem a janela Tk."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.patches import Rectangle
+    dpi = 100
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi, facecolor=background)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, width); ax.set_ylim(height, 0); ax.axis('off')
+    for item in items:
+        if item.depth > max_depth: continue
+        ax.add_patch(Rectangle((item.x, item.y), item.w, item.h, facecolor=item_color(item), edgecolor=background, linewidth=0.5))
+        if item.depth and item.w > 60 and item.h > 14 and item.label:
+            ax.text(item.x + 3, item.y + 3, item.label[:int(item.w / 7)], fontsize=7, color=text_color, va='top', ha='left')
+    fig.savefig(path, facecolor=background)
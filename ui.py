@@ -4,21 +4,32 @@ import shutil
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import threading
+import queue
 import sys
 import subprocess
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime
 import time
 import zipfile
 import logging
 from typing import Optional
 
 import analysis
+import archiver
+import bulk_actions
+import duplicates
+import jobs
+import exporters
+import retention
+import scanner
+import settings
+import snapshots
+import treemap
+from file_filter import BackgroundFilter
+import scan_cache
 import utils
 import i18n
 import themes
+from virtual_table import VirtualTable, Column, format_text, format_size_gb, format_size_delta_gb, format_timestamp
 
 _ = i18n.get_text
 
@@ -64,26 +75,40 @@ class FinalDiskAnalyzerApp(tk.Tk):
             logging.warning("Ficheiro 'app_icon.ico' não encontrado.")
 
         self.df_files, self.df_folders = pd.DataFrame(), pd.DataFrame()
-        self.duplicate_groups, self.old_files, self.big_files, self.storage_summary = [], [], [], {}
+        self.duplicates, self.old_files, self.big_files, self.storage_summary = pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {}
+        # (ScanTable, id da pasta) mostrada, quando vem de uma varredura; o treemap pode estar ampliado noutra pasta
+        self.view_location, self.treemap_root, self.treemap_layout, self.treemap_items = None, 0, None, []
+        self.scan_session = scan_cache.SessionCache()
+        # Instantâneos gravados da raiz atual (pela ordem da lista) e a última comparação feita
+        self.snapshot_infos, self.growth_diff = [], None
+        # Trabalho em segundo plano atual (ver jobs.Job); os botões Pausar/Cancelar atuam sobre ele
+        self.current_job: Optional[jobs.Job] = None
+        # Fila de atualizações vindas das threads de trabalho, esvaziada por um único poller 'after'
+        self.ui_queue = queue.Queue()
         self.current_path = tk.StringVar(value=_("select_folder_prompt"))
         self.filter_text_var, self.filter_min_size_var, self.filter_max_size_var = tk.StringVar(), tk.StringVar(), tk.StringVar()
         self.filter_unit_var = tk.StringVar(value="MB")
+        # Filtro da lista em segundo plano: escrever na caixa de pesquisa filtra ao fim de uma pausa curta
+        self.list_filter = BackgroundFilter(lambda generation, result: self.post(self.show_filter_result, generation, result, coalesce="list_filter"))
+        self._list_content, self._list_content_key, self._filter_after_id = pd.DataFrame(), None, None
+        for var in (self.filter_text_var, self.filter_min_size_var, self.filter_max_size_var, self.filter_unit_var):
+            var.trace_add('write', lambda *args: self.schedule_filters())
         self.category_vars = {}
-        self.category_map = {
-            _("category_images"): ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'],
-            _("category_music"): ['.mp3', '.wav', '.aac', '.flac', '.ogg', '.wma', '.m4a'],
-            _("category_videos"): ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm'],
-            _("category_documents"): ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.rtf', '.csv'],
-            _("category_compressed"): ['.zip', '.rar', '.7z', '.tar', '.gz', '.iso', '.jar'],
-            _("category_system"): ['.exe', '.dll', '.sys', '.ini', '.drv', '.bat', '.sh']
-        }
+        # Árvore de navegação: listagens e tamanhos de pastas correm em threads de fundo.
+        # Cada abertura de um nó tem uma geração; fechar ou reabrir o nó descarta o trabalho antigo.
+        self.nav_list_queue, self.nav_size_queue, self._nav_generation = queue.Queue(), queue.Queue(), {}
+        self.start_background_workers(self.nav_list_queue, 1, "nav-list")
+        self.start_background_workers(self.nav_size_queue, 2, "nav-size")
+        self.category_map = utils.default_category_map()
         self.create_menubar()
         self.create_interface()
         self.setup_styles()
         self.tree.bind('<<TreeviewOpen>>', self.on_tree_open)
+        self.tree.bind('<<TreeviewClose>>', self.on_tree_close)
         self.tree.bind('<<TreeviewSelect>>', self.on_folder_select)
         self.populate_root_nodes()
         self.create_context_menu()
+        self.after(100, self.process_ui_queue)
         logging.info("Aplicação iniciada com sucesso.")
         splash.destroy()
         self.deiconify()
@@ -116,7 +141,8 @@ class FinalDiskAnalyzerApp(tk.Tk):
         for frame in [self.main_frame, self.nav_frame, self.view_frame]:
             if frame.winfo_exists(): frame.configure(style='TFrame')
         self.setup_styles()
-        if self.fig_canvas: self.update_pie_chart()
+        self.treemap_canvas.configure(background=self.COLOR_BACKGROUND)
+        if self.treemap_items: self.update_treemap()
 
     def change_language(self, language_code: str):
         i18n.save_language_setting(language_code)
@@ -150,8 +176,10 @@ class FinalDiskAnalyzerApp(tk.Tk):
         self.paned_window.pack(fill='both', expand=True)
         self.nav_frame = ttk.LabelFrame(self.paned_window, text=_("nav_header"), padding=5)
         self.paned_window.add(self.nav_frame, weight=1)
-        self.tree = ttk.Treeview(self.nav_frame, show="tree headings")
+        # Os valores de cada nó são (caminho, tipo, tamanho); só o tamanho é mostrado
+        self.tree = ttk.Treeview(self.nav_frame, columns=("path", "kind", "size"), displaycolumns=("size",), show="tree headings")
         self.tree.heading("#0", text=_("nav_header_col"))
+        self.tree.heading("size", text=_("col_size_mb")); self.tree.column("size", width=90, anchor='e', stretch=False)
         tree_scrollbar = ttk.Scrollbar(self.nav_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=tree_scrollbar.set)
         tree_scrollbar.pack(side='right', fill='y')
@@ -171,6 +199,8 @@ class FinalDiskAnalyzerApp(tk.Tk):
         
         self.btn_start_scan = ttk.Button(top_action_frame, text=_("start_scan"), command=self.start_initial_scan, state='disabled', style='Accent.TButton')
         self.btn_start_scan.pack(side='left', padx=5)
+        self.btn_refresh_scan = ttk.Button(top_action_frame, text=_("refresh_scan"), command=self.refresh_scan, state='disabled')
+        self.btn_refresh_scan.pack(side='left')
 
         # Frame separado para os outros botões de análise
         analysis_btns_frame = ttk.Frame(self.view_frame)
@@ -188,13 +218,14 @@ class FinalDiskAnalyzerApp(tk.Tk):
         self.notebook.pack(fill='both', expand=True, pady=5)
         
         # Adiciona as abas ao Notebook
-        self.summary_tab, self.chart_tab, self.files_tab, self.duplicates_tab, self.old_files_tab, self.big_files_tab = (ttk.Frame(self.notebook) for i in range(6))
+        self.summary_tab, self.chart_tab, self.files_tab, self.duplicates_tab, self.old_files_tab, self.big_files_tab, self.growth_tab = (ttk.Frame(self.notebook) for i in range(7))
         self.notebook.add(self.summary_tab, text=_("summary_tab"))
         self.notebook.add(self.chart_tab, text=_("chart_tab"))
         self.notebook.add(self.files_tab, text=_("list_tab"))
         self.notebook.add(self.duplicates_tab, text=_("duplicates_tab"))
         self.notebook.add(self.old_files_tab, text=_("old_files_tab"))
         self.notebook.add(self.big_files_tab, text=_("big_files_tab"))
+        self.notebook.add(self.growth_tab, text=_("growth_tab"))
         
         # Cria os rótulos de estado e outros widgets
         self.status_labels = {
@@ -204,8 +235,21 @@ class FinalDiskAnalyzerApp(tk.Tk):
         }
         self.status_labels["chart"].pack(pady=50)
 
-        self.fig_canvas = None
+        # Um único canvas para o treemap, reutilizado em cada desenho
+        self.treemap_label = ttk.Label(self.chart_tab, text="", font=('Segoe UI', 9))
+        self.treemap_canvas = tk.Canvas(self.chart_tab, background=self.COLOR_BACKGROUND, highlightthickness=0)
+        self.treemap_canvas.bind("<Configure>", lambda event: self.schedule_treemap_redraw())
+        self.treemap_canvas.bind("<Button-1>", self.on_treemap_click)
+        self.treemap_canvas.bind("<Button-3>", lambda event: self.zoom_treemap_out())
+        self.treemap_canvas.bind("<Motion>", self.on_treemap_hover)
+        self._treemap_after_id = None
         self.progress_bar = ttk.Progressbar(self.view_frame, orient='horizontal', mode='indeterminate', style='custom.Horizontal.TProgressbar')
+        self.progress_label = ttk.Label(self.view_frame, text="", font=('Segoe UI', 9))
+        self.job_controls_frame = ttk.Frame(self.view_frame)
+        self.btn_cancel_job = ttk.Button(self.job_controls_frame, text=_("cancel_job"), command=self.cancel_current_job)
+        self.btn_cancel_job.pack(side='right', padx=(5, 0))
+        self.btn_pause_job = ttk.Button(self.job_controls_frame, text=_("pause_job"), command=self.toggle_pause_current_job)
+        self.btn_pause_job.pack(side='right')
         
         # Cria o conteúdo de cada aba
         self.create_summary_view(self.summary_tab)
@@ -214,14 +258,17 @@ class FinalDiskAnalyzerApp(tk.Tk):
         self.create_duplicates_table(self.duplicates_tab)
         self.create_old_files_table(self.old_files_tab)
         self.create_big_files_table(self.big_files_tab)
+        self.create_growth_view(self.growth_tab)
     def create_summary_view(self, parent_tab):
         frame = ttk.Frame(parent_tab, padding=20)
         frame.pack(fill='both', expand=True)
         self.lbl_total_files, self.lbl_total_size, self.lbl_avg_size = (ttk.Label(frame, text="", font=self.FONT_LABEL) for i in range(3))
         self.lbl_total_files.pack(anchor='w', pady=5); self.lbl_total_size.pack(anchor='w', pady=5); self.lbl_avg_size.pack(anchor='w', pady=5)
         export_button = ttk.Button(frame, text=_("export_pdf"), command=self.export_to_pdf, state='disabled')
-        export_button.pack(anchor='w', pady=20)
+        export_button.pack(anchor='w', pady=(20, 5))
         self.btn_export = export_button
+        self.btn_export_data = ttk.Button(frame, text=_("export_data"), command=self.export_data, state='disabled')
+        self.btn_export_data.pack(anchor='w')
 
     def create_filter_panel(self, parent_tab):
         filter_frame = ttk.LabelFrame(parent_tab, text=_("filters"), padding=10)
@@ -238,7 +285,7 @@ class FinalDiskAnalyzerApp(tk.Tk):
         types_frame = ttk.Frame(right_frame); types_frame.pack(anchor='w', pady=5)
         col, row = 0, 0
         for category_text in self.category_map.keys():
-            var = tk.BooleanVar(); cb = ttk.Checkbutton(types_frame, text=category_text, variable=var); cb.grid(row=row, column=col, sticky='w', padx=5)
+            var = tk.BooleanVar(); cb = ttk.Checkbutton(types_frame, text=category_text, variable=var, command=self.schedule_filters); cb.grid(row=row, column=col, sticky='w', padx=5)
             self.category_vars[category_text] = var; col = (col + 1) % 3
             if col == 0: row += 1
         action_frame = ttk.Frame(left_frame); action_frame.pack(anchor='w', pady=(15,0))
@@ -246,50 +293,87 @@ class FinalDiskAnalyzerApp(tk.Tk):
         self.btn_clear_filters = ttk.Button(action_frame, text=_("clear_filters"), command=self.clear_filters); self.btn_clear_filters.pack(side='left', padx=5)
         
     def create_file_list_table(self, parent_tab):
-        frame = ttk.Frame(parent_tab); frame.pack(fill='both', expand=True, padx=5, pady=5)
-        cols = (_("col_name"), _("col_size_mb"), _("col_mdate"), _("col_fullpath")); self.files_tree = ttk.Treeview(frame, columns=cols, show='headings')
-        for col in cols: self.files_tree.heading(col, text=col, command=lambda _col=col: self.sort_treeview_column(self.files_tree, _col, False))
-        self.files_tree.column(_("col_name"), width=250); self.files_tree.column(_("col_size_mb"), anchor='e', width=120)
-        self.files_tree.column(_("col_mdate"), width=150); self.files_tree.column(_("col_fullpath"), width=400)
-        v_scroll, h_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.files_tree.yview), ttk.Scrollbar(frame, orient="horizontal", command=self.files_tree.xview)
-        self.files_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-        v_scroll.pack(side='right', fill='y'); h_scroll.pack(side='bottom', fill='x'); self.files_tree.pack(fill='both', expand=True)
+        # Tabela virtual: só a página visível existe no Treeview, mesmo com milhões de linhas
+        self.files_table = VirtualTable(parent_tab, [
+            Column('name', _("col_name"), 250, format_text('name')),
+            Column('size', _("col_size_mb"), 120, format_size_gb('size'), anchor='e'),
+            Column('mtime', _("col_mdate"), 150, format_timestamp('mtime')),
+            Column('path', _("col_fullpath"), 400, format_text('path'))])
+        self.files_table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.files_tree = self.files_table.tree
         self.files_tree.bind("<Double-1>", self.on_double_click_item)
 
     def on_double_click_item(self, event): self.open_file_location()
 
     def create_duplicates_table(self, parent_tab):
-        frame = ttk.Frame(parent_tab); frame.pack(fill='both', expand=True, padx=5, pady=5)
-        cols = (_("col_file_group"), _("col_size_mb")); self.duplicates_tree = ttk.Treeview(frame, columns=cols, show='headings')
-        for col in cols: self.duplicates_tree.heading(col, text=col)
-        self.duplicates_tree.column(_("col_file_group"), width=600); self.duplicates_tree.column(_("col_size_mb"), anchor='e', width=120)
-        v_scroll, h_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.duplicates_tree.yview), ttk.Scrollbar(frame, orient="horizontal", command=self.duplicates_tree.xview)
-        self.duplicates_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-        v_scroll.pack(side='right', fill='y'); h_scroll.pack(side='bottom', fill='x'); self.duplicates_tree.pack(fill='both', expand=True)
+        # Uma linha por caminho, com o grupo na primeira coluna; a seleção guarda os ids das linhas na varredura
+        group_title = _("group_files_reclaimable")
+        self.duplicates_table = VirtualTable(parent_tab, [
+            Column('group_num', _("col_group"), 280, lambda page: [group_title.format(group_num=g, count=c, reclaimable=f"{r / (1024*1024):,.2f}")
+                                                                   for g, c, r in zip(page['group_num'], page['group_files'], page['reclaimable'])]),
+            Column('size', _("col_size_mb"), 110, format_size_gb('size'), anchor='e'),
+            Column('hardlink', "", 110, lambda page: page['hardlink'].map(lambda linked: _("hardlink") if linked else "")),
+            Column('path', _("col_fullpath"), 500, format_text('path'))])
+        self.duplicates_table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.duplicates_tree = self.duplicates_table.tree
         btn_frame = ttk.Frame(parent_tab); btn_frame.pack(fill='x', padx=5)
         self.btn_delete_duplicates = ttk.Button(btn_frame, text=_("delete_selected"), command=self.delete_selected_duplicates, state='disabled'); self.btn_delete_duplicates.pack(side='left', pady=5)
+        self.btn_undo_delete = ttk.Button(btn_frame, text=_("undo_delete"), command=self.undo_last_delete, state='normal' if bulk_actions.list_batches() else 'disabled'); self.btn_undo_delete.pack(side='left', padx=5, pady=5)
+        # Política de retenção: uma regra escolhe a cópia a guardar em todos os grupos de uma vez
+        self.retention_rule_names = {_(f"retention_rule_{kind}"): kind for kind in retention.RULE_KINDS}
+        self.retention_rule_var, self.retention_values_var, self.retention_link_var = tk.StringVar(value=next(iter(self.retention_rule_names))), tk.StringVar(), tk.BooleanVar()
+        self.btn_export_plan = ttk.Button(btn_frame, text=_("retention_export"), command=self.export_retention_plan, state='disabled'); self.btn_export_plan.pack(side='right', pady=5)
+        self.btn_apply_retention = ttk.Button(btn_frame, text=_("retention_apply"), command=self.apply_retention_policy, state='disabled'); self.btn_apply_retention.pack(side='right', padx=5, pady=5)
+        ttk.Checkbutton(btn_frame, text=_("retention_hardlink"), variable=self.retention_link_var).pack(side='right', padx=5)
+        ttk.Entry(btn_frame, textvariable=self.retention_values_var, width=30).pack(side='right')
+        ttk.Combobox(btn_frame, textvariable=self.retention_rule_var, values=list(self.retention_rule_names), width=22, state="readonly").pack(side='right', padx=5)
+        ttk.Label(btn_frame, text=_("retention_keep")).pack(side='right')
         
     def create_old_files_table(self, parent_tab):
-        frame = ttk.Frame(parent_tab); frame.pack(fill='both', expand=True, padx=5, pady=5)
-        cols = (_("col_name"), _("col_size_mb"), _("col_last_access")); self.old_files_tree = ttk.Treeview(frame, columns=cols, show='headings')
-        for col in cols: self.old_files_tree.heading(col, text=col)
-        self.old_files_tree.column(_("col_name"), width=500); self.old_files_tree.column(_("col_size_mb"), anchor='e', width=120)
-        self.old_files_tree.column(_("col_last_access"), anchor='center', width=150)
-        v_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.old_files_tree.yview); v_scroll.pack(side='right', fill='y')
-        self.old_files_tree.configure(yscrollcommand=v_scroll.set); self.old_files_tree.pack(fill='both', expand=True)
+        self.old_files_table = VirtualTable(parent_tab, [
+            Column('path', _("col_name"), 500, format_text('path')),
+            Column('size', _("col_size_mb"), 120, format_size_gb('size'), anchor='e'),
+            Column('atime', _("col_last_access"), 150, format_timestamp('atime', '%Y-%m-%d'), anchor='center')])
+        self.old_files_table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.old_files_tree = self.old_files_table.tree
         btn_frame = ttk.Frame(parent_tab); btn_frame.pack(fill='x', padx=5)
         self.btn_compress_old_files = ttk.Button(btn_frame, text=_("compress_selected"), command=self.compress_selected_old_files, state='disabled'); self.btn_compress_old_files.pack(side='left', pady=5)
 
     def create_big_files_table(self, parent_tab):
-        frame = ttk.Frame(parent_tab); frame.pack(fill='both', expand=True, padx=5, pady=5)
-        cols = (_("col_name"), _("col_size_mb"), _("col_mdate"), _("col_fullpath")); self.big_files_tree = ttk.Treeview(frame, columns=cols, show='headings')
-        for col in cols: self.big_files_tree.heading(col, text=col, command=lambda _col=col: self.sort_treeview_column(self.big_files_tree, _col, False))
-        self.big_files_tree.column(_("col_name"), width=250); self.big_files_tree.column(_("col_size_mb"), anchor='e', width=120)
-        self.big_files_tree.column(_("col_mdate"), width=150); self.big_files_tree.column(_("col_fullpath"), width=400)
-        v_scroll, h_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.big_files_tree.yview), ttk.Scrollbar(frame, orient="horizontal", command=self.big_files_tree.xview)
-        self.big_files_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-        v_scroll.pack(side='right', fill='y'); h_scroll.pack(side='bottom', fill='x'); self.big_files_tree.pack(fill='both', expand=True)
+        self.big_files_table = VirtualTable(parent_tab, [
+            Column('name', _("col_name"), 250, format_text('name')),
+            Column('size', _("col_size_mb"), 120, format_size_gb('size'), anchor='e'),
+            Column('mtime', _("col_mdate"), 150, format_timestamp('mtime')),
+            Column('path', _("col_fullpath"), 400, format_text('path'))])
+        self.big_files_table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.big_files_tree = self.big_files_table.tree
         
+    def create_growth_view(self, parent_tab):
+        # Comparação da varredura atual com um instantâneo gravado: pastas e ficheiros que mais mudaram
+        action_frame = ttk.Frame(parent_tab); action_frame.pack(fill='x', padx=5, pady=5)
+        self.btn_save_snapshot = ttk.Button(action_frame, text=_("save_snapshot"), command=self.save_current_snapshot, state='disabled'); self.btn_save_snapshot.pack(side='left')
+        ttk.Label(action_frame, text=_("compare_with")).pack(side='left', padx=(15, 5))
+        self.snapshot_combo = ttk.Combobox(action_frame, state='readonly', width=45); self.snapshot_combo.pack(side='left')
+        self.btn_compare_snapshot = ttk.Button(action_frame, text=_("compare_snapshot"), command=self.compare_with_snapshot, state='disabled'); self.btn_compare_snapshot.pack(side='left', padx=5)
+        self.growth_summary_label = ttk.Label(parent_tab, text="", font=self.FONT_LABEL); self.growth_summary_label.pack(anchor='w', padx=5)
+        panes = ttk.PanedWindow(parent_tab, orient='vertical'); panes.pack(fill='both', expand=True, padx=5, pady=5)
+        dirs_frame, files_frame = ttk.LabelFrame(panes, text=_("growth_folders"), padding=5), ttk.LabelFrame(panes, text=_("growth_files"), padding=5)
+        panes.add(dirs_frame, weight=1); panes.add(files_frame, weight=1)
+        status_text = lambda page: page['status'].map(lambda status: _(f"growth_status_{status}"))
+        self.growth_dirs_table = VirtualTable(dirs_frame, [
+            Column('path', _("col_fullpath"), 450, format_text('path')),
+            Column('size_old', _("col_size_before"), 110, format_size_gb('size_old'), anchor='e'),
+            Column('size_new', _("col_size_after"), 110, format_size_gb('size_new'), anchor='e'),
+            Column('delta', _("col_size_delta"), 110, format_size_delta_gb('delta'), anchor='e')])
+        self.growth_dirs_table.pack(fill='both', expand=True)
+        self.growth_files_table = VirtualTable(files_frame, [
+            Column('status', _("col_change"), 90, status_text),
+            Column('path', _("col_fullpath"), 450, format_text('path')),
+            Column('size_old', _("col_size_before"), 110, format_size_gb('size_old'), anchor='e'),
+            Column('size_new', _("col_size_after"), 110, format_size_gb('size_new'), anchor='e'),
+            Column('delta', _("col_size_delta"), 110, format_size_delta_gb('delta'), anchor='e')])
+        self.growth_files_table.pack(fill='both', expand=True)
+
     def create_context_menu(self):
         self.context_menu = tk.Menu(self, tearoff=0)
         self.context_menu.add_command(label=_("open_location"), command=self.open_file_location); self.context_menu.add_separator()
@@ -345,141 +429,243 @@ class FinalDiskAnalyzerApp(tk.Tk):
             import string
             drives = [f'{d}:\\' for d in string.ascii_uppercase if os.path.exists(f'{d}:')]
             for drive in drives:
-                node = self.tree.insert('', 'end', text=drive, values=[drive, 'drive']); self.tree.insert(node, 'end')
+                node = self.tree.insert('', 'end', text=drive, values=[drive, 'drive', '']); self.tree.insert(node, 'end')
         else:
-            root_node = self.tree.insert('', 'end', text="/", values=["/", 'folder']); self.tree.insert(root_node, 'end')
+            root_node = self.tree.insert('', 'end', text="/", values=["/", 'folder', '']); self.tree.insert(root_node, 'end')
+
+    def start_background_workers(self, task_queue: queue.Queue, count: int, name: str):
+        """ Threads daemon que executam as funções postas em 'task_queue' (não atrasam o fecho da aplicação). """
+        def worker():
+            while True:
+                func, args = task_queue.get()
+                try: func(*args)
+                except Exception: logging.error(f"Erro na tarefa de fundo {name}", exc_info=True)
+        for i in range(count): threading.Thread(target=worker, name=f"{name}-{i}", daemon=True).start()
 
     def on_tree_open(self, event):
-        parent_id = self.tree.focus();
+        """ Lista a pasta numa thread de fundo; as subpastas chegam em lotes e a interface nunca bloqueia. """
+        parent_id = self.tree.focus()
         if not parent_id: return
         parent_path = self.tree.item(parent_id)['values'][0]
+        generation = self._nav_generation[parent_id] = self._nav_generation.get(parent_id, 0) + 1
         self.tree.delete(*self.tree.get_children(parent_id))
+        self.tree.insert(parent_id, 'end', iid=f"{parent_id}:loading", text=_("loading"), values=["", 'placeholder', ''])
+        self.nav_list_queue.put((self.list_nav_children, (parent_id, parent_path, generation)))
+
+    def on_tree_close(self, event):
+        # Fechar o nó invalida as listagens e os cálculos de tamanho ainda em curso
+        parent_id = self.tree.focus()
+        if parent_id: self._nav_generation[parent_id] = self._nav_generation.get(parent_id, 0) + 1
+
+    def nav_is_current(self, parent_id: str, generation: int) -> bool:
+        return self._nav_generation.get(parent_id) == generation
+
+    def list_nav_children(self, parent_id: str, parent_path: str, generation: int, batch_size: int = 500):
+        """ (Thread de fundo) os.scandir da pasta, enviando as subpastas legíveis para a interface em lotes. """
+        batch = []
         try:
-            for item in os.listdir(parent_path):
-                full_path = os.path.join(parent_path, item)
-                if os.path.isdir(full_path):
+            with os.scandir(parent_path) as entries:
+                for entry in entries:
+                    if not self.nav_is_current(parent_id, generation): return
                     try:
-                        os.listdir(full_path); node = self.tree.insert(parent_id, 'end', text=item, values=[full_path, 'folder'])
-                        self.tree.insert(node, 'end') 
-                    except (PermissionError, OSError): continue
-        except (PermissionError, OSError) as e:
+                        if not entry.is_dir() or not os.access(entry.path, os.R_OK | os.X_OK): continue
+                    except OSError:
+                        continue
+                    batch.append((entry.name, entry.path))
+                    if len(batch) >= batch_size:
+                        self.post(self.insert_nav_children, parent_id, generation, batch, False); batch = []
+        except OSError as e:
             logging.warning(f"Não foi possível abrir o diretório {parent_path}: {e}")
+        self.post(self.insert_nav_children, parent_id, generation, batch, True)
+
+    def insert_nav_children(self, parent_id: str, generation: int, batch, done: bool):
+        if not self.nav_is_current(parent_id, generation) or not self.tree.exists(parent_id): return
+        unknown = []
+        for name, path in batch:
+            # Dentro de uma varredura da sessão, o tamanho recursivo já está no índice
+            located = self.scan_session.locate(path)
+            size = int(located[0].dir_index.total_size[located[1]]) if located else None
+            node = self.tree.insert(parent_id, 'end', text=name, values=[path, 'folder', self.format_nav_size(size) if located else ''])
+            self.tree.insert(node, 'end')
+            if not located: unknown.append((node, path))
+        if unknown: self.nav_size_queue.put((self.compute_nav_sizes, (parent_id, generation, unknown)))
+        if done and self.tree.exists(f"{parent_id}:loading"): self.tree.delete(f"{parent_id}:loading")
+
+    def compute_nav_sizes(self, parent_id: str, generation: int, nodes):
+        """ (Thread de fundo) tamanho das subpastas com um 'du' limitado, enquanto o nó continuar aberto. """
+        for node, path in nodes:
+            if not self.nav_is_current(parent_id, generation): return
+            size, complete = scanner.directory_size(path, should_continue=lambda: self.nav_is_current(parent_id, generation))
+            self.post(self.set_nav_size, node, size, complete)
+
+    def set_nav_size(self, node: str, size: int, complete: bool):
+        if self.tree.exists(node): self.tree.set(node, "size", self.format_nav_size(size, complete))
+
+    @staticmethod
+    def format_nav_size(size: int, complete: bool = True) -> str:
+        # Um total incompleto (limite de entradas do 'du') é um limite inferior
+        return f"{size / (1024**3):,.2f}" + ("" if complete else "+")
 
     def reset_view_state(self):
-        if self.fig_canvas: self.fig_canvas.get_tk_widget().destroy()
+        self.view_location, self.treemap_root, self.treemap_items = None, 0, []
+        self.treemap_canvas.delete('all'); self.treemap_canvas.pack_forget(); self.treemap_label.pack_forget()
         self.status_labels['chart'].config(text=_("select_folder_prompt")); self.status_labels['chart'].pack(pady=50)
         self.clear_filters()
-        for tree in [self.files_tree, self.duplicates_tree, self.old_files_tree, self.big_files_tree]:
-            if hasattr(self, 'tree') and self.tree.winfo_exists(): tree.delete(*tree.get_children())
-        for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_delete_duplicates, self.btn_compress_old_files, self.btn_export]:
+        for table in [self.files_table, self.duplicates_table, self.old_files_table, self.big_files_table, self.growth_dirs_table, self.growth_files_table]: table.clear()
+        # Resultados da pasta anterior: sem isto entrariam nas exportações e no relatório desta
+        self.duplicates, self.old_files, self.big_files = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        self.growth_diff = None; self.growth_summary_label.config(text="")
+        for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_delete_duplicates, self.btn_apply_retention, self.btn_export_plan, self.btn_compress_old_files, self.btn_export, self.btn_export_data, self.btn_refresh_scan, self.btn_save_snapshot, self.btn_compare_snapshot]:
              if btn.winfo_exists(): btn.config(state='disabled')
 
-    def apply_filters(self):
+    def list_content(self) -> pd.DataFrame:
+        """ Pastas + ficheiros da lista detalhada; só é recombinado quando os dados mudam, para o índice do filtro ser reutilizado. """
+        key = (id(self.df_folders), id(self.df_files))
+        if key != self._list_content_key:
+            self._list_content, self._list_content_key = pd.concat([self.df_folders, self.df_files], ignore_index=True), key
+        return self._list_content
+
+    def schedule_filters(self):
+        """ Debounce: o filtro só corre quando se deixa de escrever durante 250 ms. """
+        if self._filter_after_id: self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(250, lambda: self.apply_filters(quiet=True))
+
+    def apply_filters(self, quiet: bool = False):
+        self._filter_after_id = None
         unit = self.filter_unit_var.get(); multiplier = {"KB": 1024, "MB": 1024**2, "GB": 1024**3}[unit]
         try: min_size, max_size = float(self.filter_min_size_var.get() or 0) * multiplier, float(self.filter_max_size_var.get() or float('inf')) * multiplier
-        except ValueError: messagebox.showerror(_("error_value_title"), _("error_value_message")); return
-        texto = self.filter_text_var.get().lower()
+        except ValueError:
+            # Enquanto se escreve, um valor incompleto não merece uma janela de erro
+            if not quiet: messagebox.showerror(_("error_value_title"), _("error_value_message"))
+            return
+        texto = self.filter_text_var.get()
         exts = [ext for cat, var in self.category_vars.items() if var.get() for ext in self.category_map[cat]]
-        all_content = pd.concat([self.df_folders, self.df_files], ignore_index=True)
-        if all_content.empty: self.populate_file_list_table(all_content); return
-        mask = pd.Series(True, index=all_content.index)
-        if texto: mask &= all_content['path'].str.lower().str.contains(texto, na=False)
-        if min_size > 0: mask &= all_content['size'] >= min_size
-        if max_size != float('inf'): mask &= all_content['size'] <= max_size
-        if exts: mask &= all_content['ext'].isin(exts)
-        self.populate_file_list_table(all_content[mask])
+        self.list_filter.submit(self.list_content(), text=texto, min_size=min_size, max_size=max_size, exts=exts)
+
+    def show_filter_result(self, generation: int, result: pd.DataFrame):
+        if self.list_filter.is_current(generation): self.populate_file_list_table(result)
 
     def clear_filters(self):
         self.filter_text_var.set(""); self.filter_min_size_var.set(""); self.filter_max_size_var.set("")
         for var in self.category_vars.values(): var.set(False)
         self.apply_filters()
 
-    def sort_treeview_column(self, tv, col, reverse):
-        try: l = [(float(tv.set(k, col).replace(",", "")), k) for k in tv.get_children('')]
-        except (ValueError, tk.TclError): l = [(tv.set(k, col), k) for k in tv.get_children('')]
-        l.sort(key=lambda item: item[0], reverse=reverse)
-        for index, (val, k) in enumerate(l): tv.move(k, '', index)
-        tv.heading(col, command=lambda _col=col: self.sort_treeview_column(tv, _col, not reverse))
-        
     def populate_file_list_table(self, dataframe):
-        self.files_tree.delete(*self.files_tree.get_children())
-        for _, row in dataframe.iterrows():
-            name, size_gb, mtime, path = row['name'], row['size'] / (1024**3), datetime.fromtimestamp(row['mtime']).strftime('%Y-%m-%d %H:%M'), row['path']
-            self.files_tree.insert("", "end", values=(name, f"{size_gb:,.4f}", mtime, path))
+        self.files_table.set_data(dataframe)
 
     def populate_duplicates_table(self):
-        self.duplicates_tree.delete(*self.duplicates_tree.get_children())
-        for i, group in enumerate(self.duplicate_groups):
-            if not group: continue
-            size_mb, group_title = os.path.getsize(group[0]) / (1024*1024), _("group_files").format(group_num=i + 1, count=len(group))
-            parent = self.duplicates_tree.insert("", "end", iid=f"G{i}", values=(group_title, f"{size_mb:,.2f}"))
-            for file_path in group: self.duplicates_tree.insert(parent, "end", values=(f"  └─ {file_path}", ""))
+        # Numeração e contagem dos grupos vetorizadas; o texto só é montado para a página visível
+        if self.duplicates.empty: self.duplicates_table.clear(); return
+        group_ids = self.duplicates['group_id'].to_numpy()
+        self.duplicates_table.set_data(self.duplicates.assign(group_num=pd.factorize(group_ids)[0] + 1,
+                                                              group_files=self.duplicates.groupby('group_id')['group_id'].transform('size')))
 
     def populate_old_files_table(self):
-        self.old_files_tree.delete(*self.old_files_tree.get_children())
-        self.old_files.sort(key=lambda x: x['atime'])
-        for item in self.old_files:
-            size_gb, atime_str = item['size'] / (1024**3), datetime.fromtimestamp(item['atime']).strftime('%Y-%m-%d')
-            self.old_files_tree.insert("", "end", values=(item['path'], f"{size_gb:,.4f}", atime_str), iid=item['path'])
+        # Os mais antigos primeiro; os cabeçalhos reordenam sobre as colunas tipadas
+        if self.old_files_table.sort_field is None: self.old_files_table.sort_field = 'atime'
+        self.old_files_table.set_data(self.old_files)
 
     def populate_big_files_table(self):
-        self.big_files_tree.delete(*self.big_files_tree.get_children())
-        for item in self.big_files:
-            name, size_gb, mtime, path = os.path.basename(item['path']), item['size'] / (1024**3), datetime.fromtimestamp(item['mtime']).strftime('%Y-%m-%d %H:%M'), item['path']
-            self.big_files_tree.insert("", "end", values=(name, f"{size_gb:,.4f}", mtime, path))
+        self.big_files_table.set_data(self.big_files)
 
     def delete_selected_duplicates(self):
-        selected_items = self.duplicates_tree.selection()
-        files_to_delete = [self.duplicates_tree.item(item)['values'][0].strip().replace("└─ ", "") for item in selected_items if self.duplicates_tree.parent(item)]
-        if not files_to_delete: messagebox.showwarning(_("delete_warning_title"), _("delete_warning_message")); return
-        confirm_msg = _("delete_confirm_message").format(count=len(files_to_delete))
-        if messagebox.askyesno(_("delete_confirm_title"), confirm_msg):
-            deleted_count = 0
-            for file in files_to_delete:
-                try: os.remove(file); deleted_count +=1
-                except Exception as e: logging.error(f"Falha ao apagar ficheiro duplicado {file}", exc_info=True)
-            messagebox.showinfo(_("delete_done_title"), _("delete_done_message").format(count=deleted_count)); self.start_duplicate_search()
-
-    def export_to_excel(self):
-        path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")])
-        if not path: return
+        """ Move os ficheiros escolhidos para a reciclagem do Analisador (ou apaga-os, com "delete_permanently") num lote em segundo plano. """
+        file_ids = self.duplicates_table.selected_rows().index.tolist()
+        if not file_ids or self.view_location is None: messagebox.showwarning(_("delete_warning_title"), _("delete_warning_message")); return
+        emptied = duplicates.emptied_groups(self.duplicates, file_ids)
+        if emptied: messagebox.showwarning(_("delete_warning_title"), _("delete_all_copies_message").format(count=len(emptied))); return
+        rows = self.duplicates.loc[file_ids]
+        action = "delete" if settings.get_setting("delete_permanently", False) else "trash"
+        confirm_key = "delete_confirm_message" if action == "delete" else "trash_confirm_message"
+        if not messagebox.askyesno(_("delete_confirm_title"), _(confirm_key).format(count=len(rows), size=rows['size'].sum() / (1024**2))): return
+        self.threaded_task(analysis.run_bulk_action, self.view_location[0], rows, action)
+
+    def retention_plan(self) -> Optional[retention.RetentionPlan]:
+        """ Plano da regra escolhida sobre todos os grupos mostrados (valores de 'under'/'regex' separados por ';'). """
+        if self.duplicates.empty or self.view_location is None: messagebox.showwarning(_("delete_warning_title"), _("retention_nothing_message")); return None
+        kind, values = self.retention_rule_names[self.retention_rule_var.get()], self.retention_values_var.get().strip()
         try:
-            with pd.ExcelWriter(path) as writer:
-                all_content = pd.concat([self.df_folders, self.df_files], ignore_index=True)
-                if not all_content.empty: all_content.to_excel(writer, sheet_name=_("list_tab"), index=False)
-                if self.duplicate_groups: pd.DataFrame(self.duplicate_groups).to_excel(writer, sheet_name=_("duplicates_tab"), index=False)
-                if self.old_files: pd.DataFrame(self.old_files).to_excel(writer, sheet_name=_("old_files_tab"), index=False)
-            logging.info(f"Resultados exportados com sucesso para {path}")
-            messagebox.showinfo(_("export_success_title"), _("export_success_message").format(path=path))
-        except Exception as e:
-            logging.error(f"Erro ao exportar para Excel em {path}", exc_info=True)
-            messagebox.showerror(_("export_error_title"), _("export_error_message"))
+            rule = retention.parse_rule(f"{kind}:{values}" if kind in ("under", "regex") else kind)
+            return retention.build_plan(self.duplicates, [rule], "hardlink" if self.retention_link_var.get() else "delete")
+        except ValueError as e:
+            messagebox.showerror(_("error_value_title"), str(e)); return None
+
+    def apply_retention_policy(self):
+        """ Mostra o resumo do plano e executa-o num lote em segundo plano (reciclagem ou, com "delete_permanently", apagar). """
+        plan = self.retention_plan()
+        if plan is None: return
+        rows = plan.actions()
+        if rows.empty: messagebox.showinfo(_("delete_done_title"), _("retention_nothing_message")); return
+        action = "delete" if settings.get_setting("delete_permanently", False) else "trash"
+        summary = _("retention_confirm_message").format(rule=retention.describe(plan.rules), groups=rows['group_id'].nunique(), count=len(rows),
+                                                         linked=plan.count("hardlink"), size=plan.reclaimable_bytes / (1024**2))
+        if action == "delete": summary += "\n\n" + _("retention_permanent_warning")
+        if not messagebox.askyesno(_("retention_apply"), summary): return
+        self.threaded_task(analysis.run_apply_plan, self.view_location[0], plan, action)
+
+    def export_retention_plan(self):
+        """ Grava o plano (uma linha por caminho, com a ação e a cópia guardada) para rever ou executar fora da aplicação. """
+        plan = self.retention_plan()
+        if plan is None: return
+        filetypes = [("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON Lines", "*.jsonl")]
+        if exporters.parquet_available(): filetypes.append(("Parquet", "*.parquet"))
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=filetypes)
+        if not path: return
+        self.threaded_task(analysis.export_plan, plan, path)
+
+    def update_bulk_progress(self, event):
+        if self.progress_bar['mode'] == 'determinate': self.progress_bar['value'] = 100 * event['done'] / max(event['total'], 1)
+        self.progress_label.config(text=_("bulk_progress").format(done=event['done'], total=event['total']))
+
+    def undo_last_delete(self):
+        batches = [batch for batch in bulk_actions.list_batches() if batch.restorable]
+        if not batches: messagebox.showinfo(_("delete_done_title"), _("undo_nothing_message")); return
+        batch = batches[0]
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(batch.created))
+        if not messagebox.askyesno(_("undo_delete"), _("undo_confirm_message").format(count=batch.files, size=batch.bytes / (1024**2), date=when)): return
+        self.threaded_task(analysis.run_undo_batch, batch.batch_id)
+
+    def export_data(self):
+        """ Exporta a varredura e os resultados para Parquet/CSV/JSON Lines em segundo plano, um ficheiro por conjunto de dados. """
+        if self.view_location is None: messagebox.showwarning(_("delete_warning_title"), _("export_no_data_message")); return
+        filetypes = [("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON Lines", "*.jsonl")]
+        if exporters.parquet_available(): filetypes.insert(0, ("Parquet", "*.parquet"))
+        path = filedialog.asksaveasfilename(defaultextension=filetypes[0][1][1:], filetypes=filetypes)
+        if not path: return
+        table, dir_id = self.view_location
+        self.threaded_task(analysis.export_data, table, dir_id, path, self.duplicates, self.old_files, self.big_files)
+
+    def update_export_progress(self, event):
+        total = max(event['total'], 1)
+        if self.progress_bar['mode'] == 'determinate': self.progress_bar['value'] = 100 * event['rows'] / total
+        self.progress_label.config(text=_("export_progress").format(dataset=event['dataset'], rows=event['rows'], total=event['total']))
 
     def compress_selected_old_files(self):
-        selected_iids = self.old_files_tree.selection()
-        if not selected_iids: messagebox.showwarning(_("compress_no_selection_title"), _("compress_no_selection_message")); return
-        confirm_msg = _("compress_confirm_message").format(count=len(selected_iids))
+        files_to_compress = self.old_files_table.selected_rows()['path'].tolist() if len(self.old_files_table) else []
+        if not files_to_compress: messagebox.showwarning(_("compress_no_selection_title"), _("compress_no_selection_message")); return
+        confirm_msg = _("compress_confirm_message").format(count=len(files_to_compress))
         if not messagebox.askyesno(_("compress_confirm_title"), confirm_msg): return
-        files_to_compress = [self.old_files_tree.item(iid)['values'][0] for iid in selected_iids]
-        save_path = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=[("ZIP archive", "*.zip")])
+        filetypes = [(fmt, "*" + archiver.FORMATS[fmt][0]) for fmt in archiver.available_formats()]
+        save_path = filedialog.asksaveasfilename(defaultextension=filetypes[0][1][1:], filetypes=filetypes)
         if not save_path: return
-        self.threaded_task(analysis.run_compression_and_deletion, files_to_compress, save_path)
+        resume = archiver.has_journal(save_path) and messagebox.askyesno(_("archive_resume_title"), _("archive_resume_message"))
+        if not resume: archiver.discard_journal(save_path)
+        self.threaded_task(analysis.run_compression_and_deletion, files_to_compress, save_path, resume)
+
+    def update_archive_progress(self, event):
+        if self.progress_bar['mode'] == 'determinate': self.progress_bar['value'] = 100 * event['done'] / max(event['total'], 1)
+        self.progress_label.config(text=_("archive_progress").format(phase=_(f"archive_phase_{event['phase']}"), done=event['done'], total=event['total']))
 
     def export_to_pdf(self):
-        if self.df_files.empty and self.df_folders.empty: messagebox.showwarning(_("delete_warning_title"), "Não há dados para exportar."); return
+        """ Relatório em segundo plano: o PDF leva só as secções agregadas e a listagem completa vai para um anexo. """
+        if self.view_location is None: messagebox.showwarning(_("delete_warning_title"), _("export_no_data_message")); return
         save_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Document", "*.pdf")])
         if not save_path: return
-        chart_path = resource_path("temp_chart.png")
-        try:
-            if self.fig_canvas: self.fig_canvas.figure.savefig(chart_path, facecolor=self.COLOR_BACKGROUND, bbox_inches='tight')
-            all_content = pd.concat([self.df_folders, self.df_files], ignore_index=True)
-            utils.export_report_pdf(all_content, chart_path, save_path, self.storage_summary)
-            messagebox.showinfo(_("export_success_title"), _("export_success_message").format(path=save_path))
-        except Exception as e:
-            logging.error(f"Erro ao exportar PDF: {e}", exc_info=True)
-            messagebox.showerror(_("export_error_title"), _("export_error_message"))
-        finally:
-            if os.path.exists(chart_path): os.remove(chart_path)
+        table, dir_id = self.view_location
+        # O desenho do treemap é tirado agora, na thread do Tk; a imagem é gravada na thread do trabalho
+        chart = (list(self.treemap_items), max(self.treemap_canvas.winfo_width(), 400), max(self.treemap_canvas.winfo_height(), 300),
+                 self.COLOR_BACKGROUND, '#FFFFFF') if self.treemap_items else None
+        self.threaded_task(analysis.export_report, table, dir_id, self.duplicates, save_path, chart)
 
     def get_status_label(self):
         try:
@@ -488,39 +674,106 @@ class FinalDiskAnalyzerApp(tk.Tk):
             return tab_map.get(current_tab_widget, self.status_labels["chart"])
         except (tk.TclError, AttributeError): return self.status_labels.get("chart", ttk.Label(self))
 
-    def set_determinate_progress(self, max_value): self.progress_bar.config(mode='determinate' if max_value > 0 else 'indeterminate', maximum=max_value, value=0)
+    def set_determinate_progress(self, max_value):
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate' if max_value > 0 else 'indeterminate', maximum=max(max_value, 1), value=0)
+        if max_value <= 0 and self.progress_bar.winfo_ismapped(): self.progress_bar.start(10)
     def update_progress_value(self, value): self.progress_bar['value'] = value
 
+    def show_message(self, kind: str, title_key: str, message_key: str, **values):
+        """ Caixa de mensagem ('info', 'warning' ou 'error') pedida pelo motor, que não importa o tkinter. """
+        getattr(messagebox, f"show{kind}")(_(title_key), _(message_key).format(**values))
+
+    def post(self, callback, *args, coalesce: Optional[str] = None):
+        """ Agenda 'callback' na thread do Tk a partir de qualquer thread. Com 'coalesce', só a última chamada com essa chave em cada ciclo é executada. """
+        self.ui_queue.put((coalesce, callback, args))
+
+    def process_ui_queue(self):
+        calls, slots = [], {}
+        try:
+            while True:
+                key, callback, args = self.ui_queue.get_nowait()
+                if key is not None and key in slots:
+                    calls[slots[key]] = (callback, args); continue
+                if key is not None: slots[key] = len(calls)
+                calls.append((callback, args))
+        except queue.Empty:
+            pass
+        for callback, args in calls:
+            try: callback(*args)
+            except Exception: logging.error("Erro ao atualizar a interface", exc_info=True)
+        self.after(100, self.process_ui_queue)
+
+    def update_scan_progress(self, event):
+        if self.progress_bar['mode'] == 'determinate': self.progress_bar['value'] = event['fraction'] * 100
+        eta = time.strftime('%H:%M:%S', time.gmtime(event['eta_seconds'])) if event['eta_seconds'] is not None else "--:--:--"
+        folder = event['current_dir'] if len(event['current_dir']) <= 60 else "…" + event['current_dir'][-59:]
+        self.progress_label.config(text=_("scan_progress").format(files=event['files'], size_gb=event['bytes'] / (1024**3), rate=event['files_per_sec'], eta=eta, folder=folder))
+
+    def show_partial_scan(self, folders):
+        """ Mostra no gráfico as maiores pastas encontradas até agora, enquanto a varredura decorre. """
+        if folders.empty: return
+        self.df_folders = folders
+        self.view_location = None
+        self.update_treemap()
+
     def set_ui_busy(self, is_busy: bool):
         self.config(cursor="watch" if is_busy else "")
         state = 'disabled' if is_busy else 'normal'
         if is_busy: self.tree.unbind("<<TreeviewSelect>>")
         else: self.tree.bind("<<TreeviewSelect>>", self.on_folder_select)
-        buttons = [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_delete_duplicates, self.btn_compress_old_files, self.btn_export, self.btn_start_scan]
+        buttons = [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_delete_duplicates, self.btn_apply_retention, self.btn_export_plan, self.btn_compress_old_files, self.btn_export, self.btn_export_data, self.btn_start_scan, self.btn_refresh_scan]
         for btn in buttons:
             if btn.winfo_exists(): btn.config(state=state)
+        # Os botões dos instantâneos dependem de haver uma varredura completa mostrada
+        if is_busy: self.btn_save_snapshot.config(state='disabled'); self.btn_compare_snapshot.config(state='disabled')
+        else: self.refresh_snapshot_list()
+        self.btn_undo_delete.config(state='disabled' if is_busy or not bulk_actions.list_batches() else 'normal')
         if not is_busy and not os.path.isdir(self.current_path.get()):
-             for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_export, self.btn_start_scan]:
+             for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_export, self.btn_export_data, self.btn_start_scan, self.btn_refresh_scan]:
                  if btn.winfo_exists(): btn.config(state='disabled')
         self.update_idletasks()
         if is_busy:
+            self.progress_label.config(text="")
+            self.btn_pause_job.config(text=_("pause_job"), state='normal'); self.btn_cancel_job.config(state='normal')
+            self.job_controls_frame.pack(fill='x', padx=10, pady=(0, 5), side='bottom')
+            self.progress_label.pack(fill='x', padx=10, side='bottom')
             self.progress_bar.pack(fill='x', padx=10, pady=5, side='bottom')
             if self.progress_bar['mode'] == 'indeterminate': self.progress_bar.start(10)
         else:
-            self.progress_bar.stop(); self.progress_bar.pack_forget()
+            self.progress_bar.stop(); self.progress_bar.pack_forget(); self.progress_label.pack_forget()
+            self.job_controls_frame.pack_forget()
+            self.set_determinate_progress(0)
         
+    def cancel_current_job(self):
+        if self.current_job is None: return
+        logging.info("Cancelamento pedido pelo utilizador.")
+        self.current_job.cancel()
+        self.btn_cancel_job.config(state='disabled'); self.btn_pause_job.config(state='disabled')
+
+    def toggle_pause_current_job(self):
+        job = self.current_job
+        if job is None or job.cancelled: return
+        if job.paused:
+            job.resume(); self.btn_pause_job.config(text=_("pause_job"))
+            if self.progress_bar['mode'] == 'indeterminate': self.progress_bar.start(10)
+        else:
+            job.pause(); self.btn_pause_job.config(text=_("resume_job"))
+            self.progress_bar.stop()
+
     def threaded_task(self, func, *args):
+        self.current_job = jobs.Job()
         self.set_ui_busy(True); thread = threading.Thread(target=self.run_task_wrapper, args=(func, self, *args), daemon=True); thread.start()
 
     def run_task_wrapper(self, func, *args):
         try: func(*args)
         except Exception as e:
             logging.error(f"Erro na thread da função {func.__name__}", exc_info=True)
-            self.after(0, lambda: messagebox.showerror(_("export_error_title"), _("export_error_message")))
-        finally: self.after(0, self.set_ui_busy, False)
+            self.post(lambda: messagebox.showerror(_("export_error_title"), _("export_error_message")))
+        finally: self.post(self.set_ui_busy, False)
 
     def on_folder_select(self, event):
-        """ ATUALIZADO: Agora apenas seleciona a pasta e ativa o botão de varredura. """
+        """ Seleciona a pasta; se já estiver dentro de uma varredura da sessão, mostra-a logo a partir da memória. """
         if not self.tree.selection(): return
         folder_id = self.tree.selection()[0]
         folder_path = self.tree.item(folder_id)['values'][0]
@@ -532,6 +785,11 @@ class FinalDiskAnalyzerApp(tk.Tk):
         self.reset_view_state()
         self.status_labels['chart'].config(text=_("folder_selected"))
         self.btn_start_scan.config(state='normal')
+        located = self.scan_session.locate(folder_path)
+        if located:
+            table, dir_id = located
+            logging.info(f"A mostrar {folder_path} a partir da varredura de {table.root}.")
+            analysis.show_directory(self, table, dir_id)
 
     def start_initial_scan(self):
         """ Inicia a análise GERAL quando o botão de varredura é clicado. """
@@ -542,6 +800,14 @@ class FinalDiskAnalyzerApp(tk.Tk):
         analyses_to_run = {"duplicates": False, "old_files": False, "big_files": False}
         self.threaded_task(analysis.run_full_scan_and_analyze, path, analyses_to_run, {})
 
+    def refresh_scan(self):
+        """ Descarta a varredura guardada na sessão e volta a ler o disco por completo. """
+        path = self.current_path.get()
+        if not os.path.isdir(path): return
+        self.scan_session.invalidate(path)
+        self.status_labels['chart'].config(text=_("analyzing").format(folder=os.path.basename(path)))
+        self.threaded_task(analysis.run_full_scan_and_analyze, path, {}, {"refresh": True})
+
     def start_duplicate_search(self):
         path = self.current_path.get();
         if not os.path.isdir(path): return
@@ -566,53 +832,89 @@ class FinalDiskAnalyzerApp(tk.Tk):
         
     def update_quick_analysis_view(self):
         """ ATUALIZADO: Agora ativa todos os botões de análise secundária. """
-        for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_export]:
+        for btn in [self.btn_find_duplicates, self.btn_find_old_files, self.btn_find_big_files, self.btn_export, self.btn_export_data, self.btn_refresh_scan]:
              if btn.winfo_exists(): btn.config(state='normal')
         
-        all_content = pd.concat([self.df_folders, self.df_files], ignore_index=True)
-        if all_content.empty: 
+        if self.list_content().empty:
             self.status_labels['chart'].config(text=_("empty_folder"))
             self.set_ui_busy(False)
             return
         self.apply_filters()
-        self.update_pie_chart()
-        self.threaded_task(analysis.compute_storage_summary, pd.concat([self.df_folders, self.df_files], ignore_index=True))
+        self.refresh_snapshot_list()
+        if self.view_location: self.treemap_root = self.view_location[1]
+        self.update_treemap()
         
-    def update_pie_chart(self):
-        if self.fig_canvas: self.fig_canvas.get_tk_widget().destroy()
-        self.status_labels['chart'].pack_forget()
-        chart_data = pd.concat([self.df_folders, self.df_files], ignore_index=True)
-        if chart_data.empty: return
-        top_n = 7; df_plot = chart_data.nlargest(top_n, 'size').copy()
-        if len(chart_data) > top_n:
-            outros_size = chart_data.nsmallest(len(chart_data) - top_n, 'size')['size'].sum()
-            outros_row = pd.DataFrame([{'name': _("chart_others"), 'size': outros_size}])
-            df_plot = pd.concat([df_plot, outros_row], ignore_index=True)
-        total_size = chart_data['size'].sum();
-        if total_size == 0: return
-        labels = [f"{row['name']} ({row['size']/total_size:.1%})" for _, row in df_plot.iterrows()]
-        plt.style.use('seaborn-v0_8-deep'); fig, ax = plt.subplots(figsize=(8, 6), dpi=100)
-        fig.patch.set_facecolor(self.COLOR_BACKGROUND); ax.set_facecolor(self.COLOR_BACKGROUND)
-        fig.subplots_adjust(left=0.05, right=0.7)
-        wedges, chart_texts = ax.pie(df_plot['size'], startangle=90, wedgeprops=dict(width=0.4, edgecolor=self.COLOR_BACKGROUND), radius=1.2)
-        legend = ax.legend(wedges, labels, title=_("chart_legend_title"), loc="center left", bbox_to_anchor=(1, 0, 0.5, 1), facecolor=self.COLOR_BACKGROUND, edgecolor=self.COLOR_BACKGROUND)
-        for text in legend.get_texts(): text.set_color(self.COLOR_TEXT)
-        legend.get_title().set_color(self.COLOR_TEXT)
-        title_text = _("chart_title").format(folder=os.path.basename(self.current_path.get()))
-        ax.set_title(title_text, pad=20, fontdict={'fontsize': 14, 'color': self.COLOR_TEXT})
-        self.fig_canvas = FigureCanvasTkAgg(fig, master=self.chart_tab); self.fig_canvas.draw()
-        self.fig_canvas.get_tk_widget().pack(fill='both', expand=True, padx=5, pady=5)
+    def schedule_treemap_redraw(self):
+        if self._treemap_after_id: self.after_cancel(self._treemap_after_id)
+        self._treemap_after_id = self.after(150, self.update_treemap)
+
+    def update_treemap(self):
+        """ Treemap da pasta atual (ou da pasta ampliada) no canvas único; as disposições ficam em cache no TreemapLayout. """
+        self._treemap_after_id = None
+        if self.view_location is None and self.list_content().empty: return
+        if not self.treemap_canvas.winfo_ismapped():
+            self.status_labels['chart'].pack_forget()
+            self.treemap_label.pack(fill='x', padx=5, pady=(5, 0))
+            self.treemap_canvas.pack(fill='both', expand=True, padx=5, pady=5)
+        width, height = self.treemap_canvas.winfo_width(), self.treemap_canvas.winfo_height()
+        # Com a aba escondida o canvas ainda não tem tamanho; o <Configure> volta a chamar quando tiver
+        if width < 20 or height < 20: return
+        if self.view_location:
+            table = self.view_location[0]
+            if self.treemap_layout is None or self.treemap_layout.table is not table: self.treemap_layout = treemap.TreemapLayout(table)
+            items = self.treemap_layout.layout(self.treemap_root, width, height)
+            title = f"{table.dir_paths[self.treemap_root]} · {items[0].size / (1024**3):,.2f} GB"
+        else:
+            items = treemap.layout_frame(self.list_content(), width, height)
+            title = _("chart_title").format(folder=os.path.basename(self.current_path.get()))
+        self.treemap_items = items
+        self.treemap_label.config(text=title)
+        canvas = self.treemap_canvas
+        canvas.delete('all')
+        for position, item in enumerate(items):
+            canvas.create_rectangle(item.x, item.y, item.x + item.w, item.y + item.h, fill=treemap.item_color(item),
+                                    outline=self.COLOR_BACKGROUND, tags=(f"i{position}",))
+            if item.depth and item.label and item.w > 40 and item.h > 14:
+                canvas.create_text(item.x + 3, item.y + 2, text=item.label[:max(1, int(item.w / 7))], anchor='nw',
+                                   fill='#FFFFFF', font=('Segoe UI', 8), tags=(f"i{position}",))
+
+    def treemap_item_at_pointer(self) -> Optional[treemap.TreemapItem]:
+        for tag in self.treemap_canvas.gettags('current'):
+            if tag.startswith('i'): return self.treemap_items[int(tag[1:])]
+        return None
+
+    def on_treemap_click(self, event):
+        """ Clicar numa pasta amplia o treemap nela; clicar num ficheiro amplia a pasta onde ele está. """
+        item = self.treemap_item_at_pointer()
+        if item is None or self.view_location is None or item.kind == 'rest': return
+        table = self.view_location[0]
+        target = item.key if item.kind == 'dir' else int(table.file_dir.view()[item.key])
+        if target != self.treemap_root:
+            self.treemap_root = target
+            self.update_treemap()
+
+    def zoom_treemap_out(self):
+        if self.view_location is None or self.treemap_root == 0: return
+        self.treemap_root = int(self.view_location[0].dir_parent.view()[self.treemap_root])
+        self.update_treemap()
+
+    def on_treemap_hover(self, event):
+        item = self.treemap_item_at_pointer()
+        if item is None or not item.depth: return
+        label = item.label or _("chart_others")
+        if self.view_location and item.kind == 'dir' and item.key >= 0: label = self.view_location[0].dir_paths[item.key]
+        self.treemap_label.config(text=f"{label} · {item.size / (1024**3):,.3f} GB")
 
     def update_duplicates_view(self):
         self.get_status_label().config(text=""); self.populate_duplicates_table()
-        if self.duplicate_groups:
-            self.btn_delete_duplicates.config(state='normal')
-            messagebox.showinfo(_("duplicates_found_title"), _("duplicates_found_message").format(count=len(self.duplicate_groups)))
+        if not self.duplicates.empty:
+            for btn in [self.btn_delete_duplicates, self.btn_apply_retention, self.btn_export_plan]: btn.config(state='normal')
+            messagebox.showinfo(_("duplicates_found_title"), _("duplicates_found_message").format(count=self.duplicates['group_id'].nunique()))
         else: messagebox.showinfo(_("no_duplicates_title"), _("no_duplicates_message"))
 
     def update_old_files_view(self):
         self.get_status_label().config(text=""); self.populate_old_files_table()
-        if self.old_files:
+        if not self.old_files.empty:
             self.btn_compress_old_files.config(state='normal')
             messagebox.showinfo(_("old_files_found_title"), _("old_files_found_message").format(count=len(self.old_files)))
         else: messagebox.showinfo(_("old_files_found_title"), _("no_old_files_found_message"))
@@ -620,6 +922,45 @@ class FinalDiskAnalyzerApp(tk.Tk):
     def update_big_files_view(self):
         self.get_status_label().config(text=""); self.populate_big_files_table()
 
+    def current_scan_table(self):
+        """ Varredura completa mostrada neste momento (a tabela inteira, mesmo que se veja uma subpasta). """
+        table = self.view_location[0] if self.view_location else None
+        return table if table is not None and table.complete else None
+
+    def refresh_snapshot_list(self):
+        table = self.current_scan_table()
+        self.snapshot_infos = snapshots.list_snapshots(table.root) if table else []
+        self.snapshot_combo['values'] = [
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(info.taken_at))} · {info.files:,} · {info.total_bytes / (1024**3):,.2f} GB"
+            for info in self.snapshot_infos]
+        if self.snapshot_infos: self.snapshot_combo.current(0)
+        else: self.snapshot_combo.set("")
+        self.btn_save_snapshot.config(state='normal' if table else 'disabled')
+        self.btn_compare_snapshot.config(state='normal' if table and self.snapshot_infos else 'disabled')
+
+    def save_current_snapshot(self):
+        table = self.current_scan_table()
+        if table is None: messagebox.showwarning(_("growth_tab"), _("snapshot_needs_scan")); return
+        self.threaded_task(analysis.save_snapshot, table)
+
+    def compare_with_snapshot(self):
+        table, position = self.current_scan_table(), self.snapshot_combo.current()
+        if table is None: messagebox.showwarning(_("growth_tab"), _("snapshot_needs_scan")); return
+        if position < 0: return
+        self.threaded_task(analysis.run_snapshot_diff, self.snapshot_infos[position], table)
+
+    def update_growth_view(self):
+        diff = self.growth_diff
+        if self.growth_dirs_table.sort_field is None: self.growth_dirs_table.sort_field, self.growth_dirs_table.sort_descending = 'delta', True
+        if self.growth_files_table.sort_field is None: self.growth_files_table.sort_field, self.growth_files_table.sort_descending = 'delta', True
+        self.growth_dirs_table.set_data(diff.directories)
+        self.growth_files_table.set_data(diff.files)
+        self.growth_summary_label.config(text=_("growth_summary").format(
+            date=time.strftime('%Y-%m-%d %H:%M', time.localtime(diff.old_taken_at)) if diff.old_taken_at else "?",
+            new=diff.count('new'), deleted=diff.count('deleted'), grown=diff.count('grown'), shrunk=diff.count('shrunk'),
+            delta=diff.total_delta / (1024**3)))
+        self.notebook.select(self.growth_tab)
+
     def update_storage_summary_view(self):
         summary = self.storage_summary
         self.lbl_total_files.config(text=f"{_('total_files')} {summary.get('total_files', 0)}")
@@ -0,0 +1,221 @@
+# virtual_table.py
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from dateutil import tz
+
+# Fuso horário local, para as datas mostrarem o mesmo que datetime.fromtimestamp
+_LOCAL_TZ = tz.tzlocal()
+
+Formatter = Callable[[pd.DataFrame], Sequence[str]]
+
+def format_text(field: str) -> Formatter:
+    return lambda page: page[field].astype(str)
+
+def format_size_gb(field: str = 'size') -> Formatter:
+    return lambda page: (page[field] / (1024**3)).map('{:,.4f}'.format)
+
+def format_size_delta_gb(field: str = 'delta') -> Formatter:
+    return lambda page: (page[field] / (1024**3)).map('{:+,.4f}'.format)
+
+def format_timestamp(field: str, fmt: str = '%Y-%m-%d %H:%M') -> Formatter:
+    """Converte uma coluna de timestamps POSIX de uma só vez (em vez de um datetime.fromtimestamp por linha)."""
+    return lambda page: pd.to_datetime(page[field], unit='s', utc=True).dt.tz_convert(_LOCAL_TZ).dt.strftime(fmt)
+
+
+def stable_orders(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Permutações crescente e decrescente de 'values', ambas estáveis (empates na ordem original).
+    Só há uma ordenação: a decrescente inverte a ordem dos blocos de valores iguais da
+    crescente, mantendo a ordem dentro de cada bloco, em O(n).
+    """
+    ascending = np.argsort(values, kind='stable')
+    count = len(ascending)
+    if count == 0: return ascending, ascending
+    ordered = values[ascending]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    run_lengths = np.diff(np.r_[starts, count])
+    run_of = np.repeat(np.arange(len(starts)), run_lengths)
+    offset_in_run = np.arange(count) - starts[run_of]
+    # O bloco k passa a começar onde terminava o bloco simétrico: count - (fim do bloco k)
+    descending = np.empty_like(ascending)
+    descending[count - (starts + run_lengths)[run_of] + offset_in_run] = ascending
+    return ascending, descending
+
+
+class Column(NamedTuple):
+    field: str          # coluna do DataFrame (também serve de id da coluna no Treeview)
+    heading: str
+    width: int
+    formatter: Formatter
+    anchor: str = 'w'
+
+
+class VirtualTable:
+    """
+    Treeview "virtual" sobre um DataFrame: só existem no Tk as linhas visíveis (uma página),
+    formatadas coluna a coluna quando a página muda. A barra de deslocamento, a roda do rato e
+    as teclas de navegação mexem apenas no deslocamento da página, por isso o custo de mostrar
+    um resultado não depende do número de linhas. A seleção é guardada pelos rótulos do índice
+    do DataFrame e sobrevive à mudança de página.
+    Clicar num cabeçalho ordena pela coluna tipada (não pelo texto formatado); as permutações
+    de cada coluna ficam em cache, por isso inverter o sentido não volta a ordenar.
+    """
+    def __init__(self, parent, columns: Sequence[Column], on_heading_click: Optional[Callable[[str], None]] = None):
+        self.columns = list(columns)
+        on_heading_click = on_heading_click or self.sort
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=[c.field for c in self.columns], show='headings', selectmode='extended')
+        for c in self.columns:
+            self.tree.heading(c.field, text=c.heading, command=lambda field=c.field: on_heading_click(field))
+            self.tree.column(c.field, width=c.width, anchor=c.anchor)
+        self._headings = {c.field: c.heading for c in self.columns}
+        self.v_scroll = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        h_scroll = ttk.Scrollbar(self.frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=h_scroll.set)
+        self.v_scroll.pack(side='right', fill='y'); h_scroll.pack(side='bottom', fill='x'); self.tree.pack(fill='both', expand=True)
+
+        self.data = self._source = pd.DataFrame(columns=[c.field for c in self.columns])
+        # Permutações (crescente, decrescente) de cada coluna de self._source
+        self._orders: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.offset, self.page_size = 0, 20
+        self.sort_field, self.sort_descending = None, False
+        self._page_labels: List = []
+        self._selected: Set = set()
+        # Um clique simples substitui a seleção; Ctrl/Shift (ou a reposição feita por render) acrescenta
+        self._extend_selection = False
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add='+')
+        for sequence, extend in (("<Button-1>", False), ("<Control-Button-1>", True), ("<Shift-Button-1>", True)):
+            self.tree.bind(sequence, lambda event, extend=extend: setattr(self, '_extend_selection', extend))
+        for sequence, step in (("<MouseWheel>", None), ("<Button-4>", -3), ("<Button-5>", 3)):
+            self.tree.bind(sequence, lambda event, step=step: self._on_wheel(event, step))
+        for sequence, step in (("<Down>", 1), ("<Up>", -1), ("<Next>", "page"), ("<Prior>", "-page")):
+            self.tree.bind(sequence, lambda event, step=step: self._on_key(step))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0) or "break")
+        self.tree.bind("<End>", lambda event: self.scroll_to(len(self.data)) or "break")
+
+    def pack(self, **kwargs): self.frame.pack(**kwargs)
+
+    def __len__(self): return len(self.data)
+
+    # --- Dados ---
+    def set_data(self, dataframe: pd.DataFrame):
+        self.data = self._source = dataframe
+        self._orders = {}
+        self.offset = 0
+        self._selected.clear()
+        if self.sort_field is not None: self._apply_sort()
+        self.render()
+
+    def clear(self): self.set_data(self.data.iloc[0:0])
+
+    def sort(self, field: str, descending: Optional[bool] = None):
+        """Ordena pela coluna do DataFrame; um segundo clique na mesma coluna inverte o sentido."""
+        if descending is None:
+            descending = not self.sort_descending if field == self.sort_field else False
+        self.sort_field, self.sort_descending = field, descending
+        self._apply_sort()
+        self.offset = 0
+        self.render()
+
+    def _apply_sort(self):
+        field = self.sort_field
+        for column, heading in self._headings.items():
+            arrow = (" ▼" if self.sort_descending else " ▲") if column == field else ""
+            self.tree.heading(column, text=heading + arrow)
+        if field not in self._source.columns: return
+        if field not in self._orders:
+            self._orders[field] = stable_orders(self._source[field].to_numpy())
+        self.data = self._source.take(self._orders[field][1 if self.sort_descending else 0])
+
+    def row(self, item_id: str) -> pd.Series:
+        """Linha do DataFrame correspondente a um item visível do Treeview."""
+        return self.data.iloc[int(item_id)]
+
+    def selected_rows(self) -> pd.DataFrame:
+        """Todas as linhas selecionadas, incluindo as que já não estão na página visível."""
+        if not self._selected: return self.data.iloc[0:0]
+        return self.data[self.data.index.isin(list(self._selected))]
+
+    # --- Página visível ---
+    def render(self):
+        page = self.data.iloc[self.offset:self.offset + self.page_size]
+        cells = [np.asarray(c.formatter(page), dtype=object) if len(page) else [] for c in self.columns]
+        # Os <<TreeviewSelect>> gerados por apagar/repor itens não podem apagar a seleção guardada
+        self._extend_selection = True
+        self.tree.delete(*self.tree.get_children())
+        # O iid de cada item é a sua posição no DataFrame, o que permite voltar à linha com row()
+        for position, values in enumerate(zip(*cells), start=self.offset):
+            self.tree.insert("", "end", iid=str(position), values=values)
+        self._page_labels = list(page.index)
+        if self._selected:
+            visible = [str(self.offset + i) for i, label in enumerate(self._page_labels) if label in self._selected]
+            if visible: self.tree.selection_set(visible)
+        self._update_scrollbar()
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), len(self.data) - self.page_size))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _update_scrollbar(self):
+        total = len(self.data)
+        if total <= self.page_size: self.v_scroll.set(0, 1)
+        else: self.v_scroll.set(self.offset / total, (self.offset + self.page_size) / total)
+
+    # --- Eventos ---
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(float(amount) * len(self.data))
+        elif action == 'scroll':
+            self.scroll_to(self.offset + int(amount) * (self.page_size if unit == 'pages' else 1))
+
+    def _on_wheel(self, event, step: Optional[int]):
+        if step is None:
+            # Windows envia múltiplos de 120; o macOS envia valores pequenos
+            step = -3 * (event.delta // 120) if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        self.scroll_to(self.offset + step)
+        return "break"
+
+    def _on_key(self, step):
+        children = self.tree.get_children()
+        if not children: return None
+        if step in ("page", "-page"):
+            self.scroll_to(self.offset + (self.page_size if step == "page" else -self.page_size))
+            return "break"
+        focus = self.tree.focus()
+        # Dentro da página o Treeview move o foco sozinho; só nos extremos é preciso deslocar a página
+        if (step > 0 and focus != children[-1]) or (step < 0 and focus != children[0]):
+            self._extend_selection = False
+            return None
+        self.scroll_to(self.offset + step)
+        self._extend_selection = False
+        children = self.tree.get_children()
+        if children:
+            target = children[-1] if step > 0 else children[0]
+            self.tree.focus(target); self.tree.selection_set(target)
+        return "break"
+
+    def _on_select(self, event=None):
+        selected = {self._page_labels[int(iid) - self.offset] for iid in self.tree.selection()
+                    if 0 <= int(iid) - self.offset < len(self._page_labels)}
+        if self._extend_selection: self._selected.difference_update(self._page_labels)
+        else: self._selected.clear()
+        self._selected.update(selected)
+
+    def _on_resize(self, event):
+        try: row_height = int(ttk.Style(self.tree).lookup('Treeview', 'rowheight') or 25)
+        except (ValueError, tk.TclError): row_height = 25
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        top = bbox[1] if bbox else row_height + 5  # altura do cabeçalho
+        page_size = max(1, (event.height - top) // row_height)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.offset = max(0, min(self.offset, len(self.data) - page_size))
+            self.render()